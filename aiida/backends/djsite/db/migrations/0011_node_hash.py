@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.11"
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0010_process_type'),
+    ]
+
+    operations = [
+        # The hash of a node, used to find equivalent nodes when caching, gets its own indexed column,
+        # such that cache lookups do not have to go through the DbExtra table
+        migrations.AddField(
+            model_name='dbnode',
+            name='hash',
+            field=models.CharField(max_length=255, db_index=True, null=True)
+        ),
+        # Copy the existing hashes, which are stored in the '_aiida_hash' extra
+        migrations.RunSQL("""
+            UPDATE db_dbnode SET hash = db_dbextra.tval
+            FROM db_dbextra
+            WHERE db_dbextra.dbnode_id = db_dbnode.id
+                AND db_dbextra.key = '_aiida_hash'
+                AND db_dbextra.datatype = 'txt';
+        """),
+        update_schema_version(SCHEMA_VERSION)
+    ]
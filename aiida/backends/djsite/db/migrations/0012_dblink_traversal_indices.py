@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.12"
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0011_node_hash'),
+    ]
+
+    operations = [
+        # The recursive ancestor and descendant queries follow the links of some types from
+        # one end at every step: these indices let them do so with index-only scans
+        migrations.AlterIndexTogether(
+            name='dblink',
+            index_together=set([('input', 'type', 'output'), ('output', 'type', 'input')]),
+        ),
+        update_schema_version(SCHEMA_VERSION)
+    ]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.13"
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0012_dblink_traversal_indices'),
+    ]
+
+    operations = [
+        # The materialized statistics of node creation, filled and refreshed by the query manager
+        migrations.CreateModel(
+            name='DbNodeStatistics',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('day', models.DateTimeField()),
+                ('type', models.CharField(max_length=255)),
+                ('count', models.IntegerField()),
+                ('last_node_id', models.IntegerField()),
+                ('user', models.ForeignKey(related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dbnodestatistics',
+            unique_together=set([('day', 'type', 'user')]),
+        ),
+        update_schema_version(SCHEMA_VERSION)
+    ]
@@ -135,6 +135,8 @@ class DbNode(m.Model):
     # max_length required for index by MySql
     type = m.CharField(max_length=255, db_index=True)
     process_type = m.CharField(max_length=255, db_index=True, null=True)
+    # hash of the node, used to find equivalent nodes when caching
+    hash = m.CharField(max_length=255, db_index=True, null=True)
     label = m.CharField(max_length=255, db_index=True, blank=True)
     description = m.TextField(blank=True)
     # creation time
@@ -263,7 +265,13 @@ class DbLink(m.Model):
         # The distinction between the type of a 'create' and a 'return' link is not
         # implemented at the moment, so the unique constraint is disabled.
         # unique_together = ("output", "label")
-        pass
+
+        # Cover the steps of the recursive traversals of the graph, which follow
+        # the links of some types from one end, with index-only scans
+        index_together = [
+            ("input", "type", "output"),
+            ("output", "type", "input"),
+        ]
 
     def __str__(self):
         return "{} ({}) --> {} ({})".format(
@@ -273,6 +281,26 @@ class DbLink(m.Model):
             self.output.pk, )
 
 
+@python_2_unicode_compatible
+class DbNodeStatistics(m.Model):
+    """
+    The materialized statistics of node creation: the number of nodes of each type created
+    by each user on each day, refreshed incrementally by the query manager.
+    """
+    day = m.DateTimeField()
+    type = m.CharField(max_length=255)
+    user = m.ForeignKey(AUTH_USER_MODEL, on_delete=m.CASCADE, related_name='+')
+    count = m.IntegerField()
+    # The largest pk of the nodes that were counted
+    last_node_id = m.IntegerField()
+
+    class Meta:
+        unique_together = (("day", "type", "user"),)
+
+    def __str__(self):
+        return "{} nodes of type {} on {}".format(self.count, self.type, self.day)
+
+
 attrdatatype_choice = (
     ('float', 'float'),
     ('int', 'int'),
@@ -1038,6 +1066,10 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
 
     _subspecifier_field_name = 'dbnode'
 
+    # Maximum number of nodes (or of rows) read or written with a single query
+    # by the methods that act on many nodes at once
+    _BATCH_SIZE = 1000
+
     class Meta:
         unique_together = (("dbnode", "key"))
         abstract = True
@@ -1091,41 +1123,65 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
             stored in the Db table, correctly converted
             to the right type.
         """
-        dballsubvalues = cls.objects.filter(dbnode__id=dbnodepk).values_list(
-            'key', 'datatype', 'tval', 'fval',
-            'ival', 'bval', 'dval')
-
-        data = {_[0]: {
-            "datatype": _[1],
-            "tval": _[2],
-            "fval": _[3],
-            "ival": _[4],
-            "bval": _[5],
-            "dval": _[6],
-        } for _ in dballsubvalues
-        }
+        return cls.get_all_values_for_nodepks([dbnodepk])[dbnodepk]
+
+    @classmethod
+    def get_all_values_for_nodepks(cls, dbnodepks):
+        """
+        Return the dictionaries with all attributes for the dbnodes with given PKs.
+        The rows of all the nodes are fetched with a single query for each batch
+        of _BATCH_SIZE nodes.
+
+        :param dbnodepks: an iterable of dbnode PKs
+        :return: a dictionary where each key is one of the PKs, and the value is
+            the dictionary of its level-0 attributes, correctly converted to the
+            right type (empty if the node has no attributes).
+        """
+        from collections import defaultdict
+
+        dbnodepks = list(set(dbnodepks))
+        data = defaultdict(dict)
+        for start in range(0, len(dbnodepks), cls._BATCH_SIZE):
+            dballsubvalues = cls.objects.filter(
+                dbnode__id__in=dbnodepks[start:start + cls._BATCH_SIZE]).values_list(
+                'dbnode_id', 'key', 'datatype', 'tval', 'fval',
+                'ival', 'bval', 'dval')
+
+            for _ in dballsubvalues:
+                data[_[0]][_[1]] = {
+                    "datatype": _[2],
+                    "tval": _[3],
+                    "fval": _[4],
+                    "ival": _[5],
+                    "bval": _[6],
+                    "dval": _[7],
+                }
+
         try:
-            return deserialize_attributes(data, sep=cls._sep,
-                                          original_class=cls,
-                                          original_pk=dbnodepk)
+            return {
+                dbnodepk: deserialize_attributes(data[dbnodepk], sep=cls._sep,
+                                                 original_class=cls,
+                                                 original_pk=dbnodepk)
+                for dbnodepk in dbnodepks
+            }
         except DeserializationException as e:
             exc = DbContentError(e.message)
             exc.original_exception = e
             raise exc
 
     @classmethod
-    def reset_values_for_node(cls, dbnode, attributes, with_transaction=True,
-                              return_not_store=False):
-        from django.db import transaction
-
-        # cls.validate_key(key)
+    def create_values_for_nodes(cls, attributes_for_nodes):
+        """
+        Create the list of attributes, without storing them, for the given
+        nodes, unpacking all the dictionaries and lists in memory.
 
+        :param attributes_for_nodes: a list of (dbnode, attributes) tuples, where
+          attributes is a dictionary with the level-0 attributes of the dbnode.
+          The dbnode can be also given as an integer PK, without any further check.
+        :return: a list of class instances, to be stored with bulk_create()
+        """
         nodes_to_store = []
-
-        try:
-            if with_transaction:
-                sid = transaction.savepoint()
-
+        for dbnode, attributes in attributes_for_nodes:
             if isinstance(dbnode, (int, long)):
                 dbnode_node = DbNode(id=dbnode)
             else:
@@ -1137,15 +1193,41 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
                     cls.create_value(k, v,
                                      subspecifier_value=dbnode_node,
                                      ))
+        return nodes_to_store
 
-            if return_not_store:
-                return nodes_to_store
-            else:
-                # Reset. For set, use also a filter for key__in=attributes.keys()
-                cls.objects.filter(dbnode=dbnode_node).delete()
+    @classmethod
+    def reset_values_for_nodes(cls, attributes_for_nodes, with_transaction=True):
+        """
+        Replace all the attributes of many nodes at once. The old attributes of
+        the nodes are deleted with a single DELETE and the new ones are inserted
+        with a single bulk_create, for each batch of _BATCH_SIZE nodes or rows.
+
+        :param attributes_for_nodes: a list of (dbnode, attributes) tuples, see
+          :meth:`.create_values_for_nodes`
+        :param with_transaction: if True (default), do this within a transaction,
+           so that nothing gets stored if a subitem cannot be created.
+           Otherwise, if this parameter is False, no transaction management
+           is performed.
+        """
+        from django.db import transaction
 
-                if nodes_to_store:
-                    cls.objects.bulk_create(nodes_to_store)
+        attributes_for_nodes = list(attributes_for_nodes)
+
+        try:
+            if with_transaction:
+                sid = transaction.savepoint()
+
+            # The whole tree of attributes is unpacked before hitting the DB
+            nodes_to_store = cls.create_values_for_nodes(attributes_for_nodes)
+
+            dbnodepks = [dbnode if isinstance(dbnode, (int, long)) else dbnode.pk
+                         for dbnode, _ in attributes_for_nodes]
+            for start in range(0, len(dbnodepks), cls._BATCH_SIZE):
+                cls.objects.filter(
+                    dbnode__id__in=dbnodepks[start:start + cls._BATCH_SIZE]).delete()
+
+            if nodes_to_store:
+                cls.objects.bulk_create(nodes_to_store, batch_size=cls._BATCH_SIZE)
 
             if with_transaction:
                 transaction.savepoint_commit(sid)
@@ -1154,6 +1236,15 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
                 transaction.savepoint_rollback(sid)
             raise
 
+    @classmethod
+    def reset_values_for_node(cls, dbnode, attributes, with_transaction=True,
+                              return_not_store=False):
+        if return_not_store:
+            return cls.create_values_for_nodes([(dbnode, attributes)])
+
+        cls.reset_values_for_nodes([(dbnode, attributes)],
+                                   with_transaction=with_transaction)
+
     @classmethod
     def set_value_for_node(cls, dbnode, key, value, with_transaction=True,
                            stop_if_existing=False):
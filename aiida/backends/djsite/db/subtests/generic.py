@@ -178,3 +178,28 @@ class TestDbExtrasDjango(AiidaTestCase):
         self.assertEquals(n1.get_extras(), new_attrs)
         # Also check that other nodes were not damaged
         self.assertEquals(n2.get_extras(), {'pippo2': [3, 4, 'b'], '_aiida_hash': n2.get_hash()})
+
+    def test_reset_values_for_nodes(self):
+        from aiida.backends.djsite.db.models import DbExtra
+
+        n1 = Node().store()
+        n2 = Node().store()
+        n3 = Node().store()
+
+        DbExtra.set_value_for_node(n1._dbnode, "old", [1, 2, 'a'])
+        n3_extras = n3.get_extras()
+
+        new_attrs_1 = {"newval1": "v", "newval2": [1, {"c": "d", "e": [2.5, None]}]}
+        new_attrs_2 = {"newval3": {"f": {"g": True}}}
+        DbExtra.reset_values_for_nodes([(n1._dbnode, new_attrs_1), (n2.pk, new_attrs_2)])
+
+        self.assertEquals(n1.get_extras(), new_attrs_1)
+        self.assertEquals(n2.get_extras(), new_attrs_2)
+        # Other nodes are not affected
+        self.assertEquals(n3.get_extras(), n3_extras)
+
+        self.assertEquals(DbExtra.get_all_values_for_nodepks([n1.pk, n2.pk, n3.pk, n2.pk]),
+                          {n1.pk: new_attrs_1, n2.pk: new_attrs_2, n3.pk: n3_extras})
+
+        DbExtra.reset_values_for_nodes([(n1.pk, {})])
+        self.assertEquals(DbExtra.get_all_values_for_nodepk(n1.pk), {})
@@ -195,6 +195,21 @@ table_groups_nodes = Table(
         )
 )
 
+class DbNodeStatistics(Base):
+    __tablename__ = "db_dbnodestatistics"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(DateTime(timezone=True), nullable=False)
+    type = Column(String(255), nullable=False)
+    user_id = Column(
+            Integer,
+            ForeignKey('db_dbuser.id', deferrable=True, initially="DEFERRED"),
+            nullable=False
+        )
+    count = Column(Integer, nullable=False)
+    last_node_id = Column(Integer, nullable=False)
+
+
 class DbGroup(Base):
     __tablename__ = "db_dbgroup"
 
@@ -251,6 +266,7 @@ class DbNode(Base):
     uuid = Column(UUID(as_uuid=True), default=uuid_func)
     type = Column(String(255), index=True)
     process_type = Column(String(255), index=True)
+    hash = Column(String(255), index=True)
     label = Column(String(255), index=True, nullable=True)
     description = Column(Text(), nullable=True)
     ctime = Column(DateTime(timezone=True), default=timezone.now)
@@ -310,7 +326,7 @@ class DbNode(Base):
         # and instantiate an object that has the same attributes as self.
         from aiida.backends.djsite.db.models import DbNode as DjangoSchemaDbNode
         dbnode = DjangoSchemaDbNode(
-            id=self.id, type=self.type, process_type=self.process_type, uuid=self.uuid, ctime=self.ctime,
+            id=self.id, type=self.type, process_type=self.process_type, hash=self.hash, uuid=self.uuid, ctime=self.ctime,
             mtime=self.mtime, label=self.label, description=self.description, dbcomputer_id=self.dbcomputer_id,
             user_id=self.user_id, public=self.public, nodeversion=self.nodeversion
         )
@@ -507,6 +507,22 @@ class QueryBuilderImplDjango(QueryBuilderInterface):
             returnval = res
         return returnval
 
+    def get_aiida_res_column(self, key, column):
+        """
+        Convert all the results of one projection. The attributes and extras of all the
+        nodes, for which the query returns the ID, are fetched with a single query.
+
+        :param key: the key that the entries would be returned with
+        :param column: a list of the results returned by the query
+
+        :returns: a list of aiida-compatible instances
+        """
+        if key in ('attributes', 'extras'):
+            model = DbAttribute if key == 'attributes' else DbExtra
+            values = model.get_all_values_for_nodepks(column)
+            return [values[res] for res in column]
+        return super(QueryBuilderImplDjango, self).get_aiida_res_column(key, column)
+
     def get_ormclass(self, cls, ormclasstype):
         """
         Return the valid ormclass for the connections
@@ -701,3 +717,18 @@ class QueryBuilderImplDjango(QueryBuilderInterface):
                         }
             else:
                 raise Exception("Got an empty dictionary")
+
+    def iter_batches(self, query, batch_size):
+        from django.db import transaction
+
+        with transaction.atomic():
+            # With psycopg2, stream_results makes SQLAlchemy use a named (server-side) cursor
+            results = query.execution_options(stream_results=True).yield_per(batch_size)
+            batch = []
+            for row in results:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
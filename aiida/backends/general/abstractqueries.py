@@ -7,8 +7,15 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import threading
+import time
 from abc import ABCMeta, abstractmethod
 
+# Time of the last refresh of the materialized statistics of node creation requested by
+# get_creation_statistics in this process, see its refresh_interval parameter
+_statistics_refresh = {'time': None}
+_statistics_refresh_lock = threading.Lock()
+
 
 class AbstractQueryManager(object):
     __metaclass__ = ABCMeta
@@ -108,17 +115,39 @@ class AbstractQueryManager(object):
             returnresult = zip(*returnresult)[0]
         return returnresult
 
+    def _get_statistics_session_and_classes(self):
+        """
+        Return the SQLAlchemy session and classes used by the queries of the statistics
+        of node creation. Can be overriden by the backends.
+
+        :return: a tuple (session, node class, user class, node statistics class), where
+            the node statistics class is None if the materialized statistics are not supported
+        """
+        from aiida.backends.utils import get_querybuilder_impl
+
+        impl = get_querybuilder_impl()
+        return impl.get_session(), impl.Node, impl.User, None
+
     def get_creation_statistics(
             self,
-            user_email=None
+            user_email=None,
+            materialized=False,
+            refresh_interval=None
     ):
         """
         Return a dictionary with the statistics of node creation, summarized by day.
+        The nodes are counted in the database by type and by day (GROUP BY and date_trunc),
+        without loading them.
 
         :note: Days when no nodes were created are not present in the returned `ctime_by_day` dictionary.
 
         :param user_email: If None (default), return statistics for all users.
             If an email is specified, return only the statistics for the given user.
+        :param materialized: If True, read the statistics from the materialized statistics, which
+            only write in the database when they are refreshed (see :py:meth:`refresh_creation_statistics`).
+        :param refresh_interval: If not None, the materialized statistics are first refreshed with the
+            nodes created since the last refresh, if this process did not refresh them in the last
+            ``refresh_interval`` seconds. By default they are only read.
 
         :return: a dictionary as
             follows::
@@ -131,61 +160,122 @@ class AbstractQueryManager(object):
             where in `ctime_by_day` the key is a string in the format 'YYYY-MM-DD' and the value is
             an integer with the number of nodes created that day.
         """
-        from aiida.orm.querybuilder import QueryBuilder as QB
-        from aiida.orm import User, Node
-        from collections import Counter
-        import datetime
+        import sqlalchemy as sa
 
-        def count_statistics(dataset):
+        session, node_class, user_class, statistics_class = self._get_statistics_session_and_classes()
 
-            def get_statistics_dict(dataset):
-                results = {}
-                for count, typestring in sorted(
-                        (v, k) for k, v in dataset.iteritems())[::-1]:
-                    results[typestring] = count
-                return results
+        if materialized:
+            if refresh_interval is not None and self._claim_statistics_refresh(refresh_interval):
+                self.refresh_creation_statistics()
+            count = sa.func.sum(statistics_class.count)
+            type_column = statistics_class.type
+            day_column = statistics_class.day
+            user_id_column = statistics_class.user_id
+        else:
+            count = sa.func.count(node_class.id)
+            type_column = node_class.type
+            day_column = sa.func.date_trunc('day', node_class.ctime)
+            user_id_column = node_class.user_id
 
-            count_dict = {}
+        def get_query(*columns):
+            query = session.query(*columns)
+            if user_email is not None:
+                query = query.filter(user_id_column == user_class.id, user_class.email == user_email)
+            return query
 
-            types = Counter([r[2] for r in dataset])
-            count_dict["types"] = get_statistics_dict(types)
+        statistics = {}
 
-            ctimelist = [r[1].strftime("%Y-%m-%d") for r in dataset]
-            ctime = Counter(ctimelist)
+        # Total number of nodes
+        statistics["total"] = int(get_query(count).scalar() or 0)
 
-            if len(ctimelist) > 0:
+        # Nodes per type
+        statistics["types"] = {
+            typestring: int(num_nodes) for typestring, num_nodes in
+            get_query(type_column.label('typestring'), count).group_by('typestring').all()
+        }
 
-                # For the way the string is formatted, we can just sort it alphabetically
-                firstdate = datetime.datetime.strptime(sorted(ctimelist)[0], '%Y-%m-%d')
-                lastdate = datetime.datetime.strptime(sorted(ctimelist)[-1], '%Y-%m-%d')
+        # Nodes created per day
+        statistics["ctime_by_day"] = {
+            day.strftime('%Y-%m-%d'): int(num_nodes) for day, num_nodes in
+            get_query(day_column.label('cday'), count).group_by('cday').order_by('cday').all()
+        }
 
-                curdate = firstdate
-                outdata = {}
+        return statistics
 
-                while curdate <= lastdate:
-                    curdatestring = curdate.strftime('%Y-%m-%d')
-                    outdata[curdatestring] = ctime.get(curdatestring, 0)
-                    curdate += datetime.timedelta(days=1)
-                count_dict["ctime_by_day"] = outdata
+    @staticmethod
+    def _claim_statistics_refresh(refresh_interval):
+        """
+        Return True, and record the current time as the time of the last refresh of the materialized
+        statistics, if the last one requested by get_creation_statistics in this process is older than
+        refresh_interval seconds. Only one of the concurrent requests then refreshes the statistics.
 
-            else:
-                count_dict["ctime_by_day"] = {}
+        :param refresh_interval: the minimum time between two refreshes, in seconds
+        """
+        now = time.time()
+        with _statistics_refresh_lock:
+            last_refresh = _statistics_refresh['time']
+            if last_refresh is not None and now - last_refresh < refresh_interval:
+                return False
+            _statistics_refresh['time'] = now
+            return True
+
+    def refresh_creation_statistics(self, full=False):
+        """
+        Update the materialized statistics of node creation, i.e. the number of nodes of each type
+        created by each user on each day, with the nodes created since the last refresh: only
+        the nodes with a pk larger than the ones already counted are aggregated.
 
-            return count_dict
+        :note: Deleted nodes, and nodes committed by a transaction that was still running during a
+            previous refresh while nodes with a larger pk were already committed, are only taken
+            into account by a full refresh, which should therefore be done from time to time.
 
-        statistics = {}
+        :param full: If True, rebuild the statistics from all the nodes.
+        :return: the number of nodes that were counted
+        """
+        import sqlalchemy as sa
 
-        q = QB()
-        q.append(Node, project=['id', 'ctime', 'type'], tag='node')
-        if user_email is not None:
-            q.append(User, creator_of='node', project='email', filters={'email': user_email})
-        qb_res = q.all()
+        session, node_class, _, statistics_class = self._get_statistics_session_and_classes()
+        if statistics_class is None:
+            raise NotImplementedError("The materialized statistics of node creation are not "
+                                      "supported by {}".format(self.__class__.__name__))
 
-        # total count
-        statistics["total"] = len(qb_res)
-        statistics.update(count_statistics(qb_res))
+        table = statistics_class.__table__
 
-        return statistics
+        try:
+            # Concurrent refreshes would count the same nodes twice
+            session.execute('LOCK TABLE {} IN EXCLUSIVE MODE'.format(table.name))
+
+            if full:
+                session.execute(table.delete())
+                last_node_id = 0
+            else:
+                last_node_id = session.query(sa.func.max(table.c.last_node_id)).scalar() or 0
+
+            new_statistics = session.query(
+                sa.func.date_trunc('day', node_class.ctime).label('cday'),
+                node_class.type, node_class.user_id,
+                sa.func.count(node_class.id), sa.func.max(node_class.id)
+            ).filter(node_class.id > last_node_id).group_by('cday', node_class.type, node_class.user_id).all()
+
+            num_nodes = 0
+            for day, typestring, user_id, count, max_node_id in new_statistics:
+                result = session.execute(table.update().where(sa.and_(
+                    table.c.day == day, table.c.type == typestring, table.c.user_id == user_id
+                )).values(
+                    count=table.c.count + count,
+                    last_node_id=sa.func.greatest(table.c.last_node_id, max_node_id)
+                ))
+                if result.rowcount == 0:
+                    session.execute(table.insert().values(
+                        day=day, type=typestring, user_id=user_id, count=count, last_node_id=max_node_id))
+                num_nodes += count
+
+            session.commit()
+        except:
+            session.rollback()
+            raise
+
+        return num_nodes
 
     def get_bands_and_parents_structure(self, args):
         """
@@ -143,6 +143,18 @@ class QueryBuilderInterface():
         """
         pass
 
+    def get_aiida_res_column(self, key, column):
+        """
+        Convert all the results of one projection, see :meth:`.get_aiida_res`.
+        Backends can override this to convert many results with a single query.
+
+        :param key: the key that the entries would be returned with
+        :param column: a list of the results returned by the query
+
+        :returns: a list of aiida-compatible instances
+        """
+        return [self.get_aiida_res(key, res) for res in column]
+
     @abstractmethod
     def get_ormclass(self,  cls, ormclasstype):
         pass
@@ -189,4 +201,17 @@ class QueryBuilderInterface():
         """
         pass
 
+    @abstractmethod
+    def iter_batches(self, query, batch_size):
+        """
+        Executes the query with a server-side cursor, such that the results are streamed
+        from the database rather than loaded into memory at once.
+
+        :param query: the query to execute
+        :param int batch_size: the number of rows to fetch from the cursor per batch
+
+        :returns: An iterator over lists of at most *batch_size* raw result rows.
+        """
+        pass
+
 
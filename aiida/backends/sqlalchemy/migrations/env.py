@@ -20,7 +20,7 @@ from aiida.backends.sqlalchemy.models.lock import DbLock
 from aiida.backends.sqlalchemy.models.log import DbLog
 from aiida.backends.sqlalchemy.models.node import (
     DbCalcState, DbComputer,
-    DbContentError, DbLink, DbNode)
+    DbContentError, DbLink, DbNode, DbNodeStatistics)
 from aiida.backends.sqlalchemy.models.settings import DbSetting
 from aiida.backends.sqlalchemy.models.user import DbUser
 from aiida.backends.sqlalchemy.models.workflow import (
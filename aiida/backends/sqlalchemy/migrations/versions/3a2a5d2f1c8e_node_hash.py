@@ -0,0 +1,30 @@
+"""Add the indexed hash column to DbNode
+
+Revision ID: 3a2a5d2f1c8e
+Revises: 6c629c886f84
+Create Date: 2018-05-02 10:12:41.201743
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a2a5d2f1c8e'
+down_revision = '6c629c886f84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('db_dbnode',
+        sa.Column('hash', sa.VARCHAR(length=255), autoincrement=False, nullable=True),
+    )
+    op.create_index('ix_db_dbnode_hash', 'db_dbnode', ['hash'])
+    # Copy the existing hashes, which are stored in the '_aiida_hash' extra
+    op.execute("UPDATE db_dbnode SET hash = extras->>'_aiida_hash' WHERE extras ? '_aiida_hash'")
+
+
+def downgrade():
+    op.drop_index('ix_db_dbnode_hash', table_name='db_dbnode')
+    op.drop_column('db_dbnode', 'hash')
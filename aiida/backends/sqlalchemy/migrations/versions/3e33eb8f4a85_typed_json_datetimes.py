@@ -0,0 +1,96 @@
+"""Store the datetimes in the JSON columns as typed objects
+
+Revision ID: 3e33eb8f4a85
+Revises: 3a2a5d2f1c8e
+Create Date: 2018-05-09 15:43:07.512097
+
+Datetimes used to be stored as plain isoformat strings, which meant that every string
+had to be matched against a regular expression when loading a JSON column. They are now
+stored as {"$datetime": isoformat}, see aiida.backends.sqlalchemy.utils.dumps_json.
+"""
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e33eb8f4a85'
+down_revision = '3a2a5d2f1c8e'
+branch_labels = None
+depends_on = None
+
+DATETIME_KEY = '$datetime'
+# The strings that used to be loaded as datetimes
+DATE_REGEX = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+(\+\d{2}:\d{2})?$')
+# Preselects the rows that contain such a string
+DATE_POSIX_REGEX = r'"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+(\+\d{2}:\d{2})?"'
+
+JSON_COLUMNS = [
+    ('db_dbnode', 'attributes'),
+    ('db_dbnode', 'extras'),
+    ('db_dbcomputer', 'transport_params'),
+    ('db_dbcomputer', 'metadata'),
+    ('db_dbauthinfo', 'auth_params'),
+    ('db_dbauthinfo', 'metadata'),
+    ('db_dblog', 'metadata'),
+    ('db_dbsetting', 'val'),
+]
+
+BATCH_SIZE = 1000
+
+
+def encode_datetimes(value):
+    if isinstance(value, list):
+        return [encode_datetimes(item) for item in value]
+    elif isinstance(value, dict):
+        return {key: encode_datetimes(item) for key, item in value.iteritems()}
+    elif isinstance(value, basestring) and DATE_REGEX.match(value):
+        return {DATETIME_KEY: value}
+    return value
+
+
+def decode_datetimes(value):
+    if isinstance(value, list):
+        return [decode_datetimes(item) for item in value]
+    elif isinstance(value, dict):
+        if len(value) == 1 and DATETIME_KEY in value:
+            return value[DATETIME_KEY]
+        return {key: decode_datetimes(item) for key, item in value.iteritems()}
+    return value
+
+
+def convert_json_columns(convert, condition, **params):
+    """
+    Apply the conversion to the JSON columns of all the rows that satisfy the condition.
+
+    The columns are read as text, such that the JSON is not decoded by the deserializer of the engine.
+    """
+    connection = op.get_bind()
+    for table, column in JSON_COLUMNS:
+        ids = [row[0] for row in connection.execute(sa.text(
+            'SELECT id FROM {table} WHERE {condition}'.format(
+                table=table, condition=condition.format(column=column))), **params)]
+
+        for start in range(0, len(ids), BATCH_SIZE):
+            rows = connection.execute(sa.text(
+                'SELECT id, CAST({column} AS text) FROM {table} WHERE id IN :ids'.format(
+                    table=table, column=column)),
+                ids=tuple(ids[start:start + BATCH_SIZE]))
+            values = [
+                {'row_id': row_id, 'value': json.dumps(convert(json.loads(json_text)))}
+                for row_id, json_text in rows
+            ]
+            if values:
+                connection.execute(sa.text(
+                    'UPDATE {table} SET {column} = CAST(:value AS jsonb) WHERE id = :row_id'.format(
+                        table=table, column=column)), values)
+
+
+def upgrade():
+    convert_json_columns(encode_datetimes, 'CAST({column} AS text) ~ :pattern', pattern=DATE_POSIX_REGEX)
+
+
+def downgrade():
+    convert_json_columns(decode_datetimes, 'strpos(CAST({column} AS text), :key) > 0', key='"{}"'.format(DATETIME_KEY))
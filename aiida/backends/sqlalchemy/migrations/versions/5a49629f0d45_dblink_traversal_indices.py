@@ -0,0 +1,25 @@
+"""Add the indices covering the recursive traversals to DbLink
+
+Revision ID: 5a49629f0d45
+Revises: 3e33eb8f4a85
+Create Date: 2018-05-14 11:26:53.094137
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5a49629f0d45'
+down_revision = '3e33eb8f4a85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_db_dblink_input_id_type_output_id', 'db_dblink', ['input_id', 'type', 'output_id'])
+    op.create_index('ix_db_dblink_output_id_type_input_id', 'db_dblink', ['output_id', 'type', 'input_id'])
+
+
+def downgrade():
+    op.drop_index('ix_db_dblink_output_id_type_input_id', table_name='db_dblink')
+    op.drop_index('ix_db_dblink_input_id_type_output_id', table_name='db_dblink')
@@ -0,0 +1,36 @@
+"""Add the table of the materialized statistics of node creation
+
+Revision ID: 7b4e2ce3ba15
+Revises: 5a49629f0d45
+Create Date: 2018-05-22 15:04:12.581370
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b4e2ce3ba15'
+down_revision = '5a49629f0d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('db_dbnodestatistics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('type', sa.String(length=255), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('last_node_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], [u'db_dbuser.id'], ondelete=u'CASCADE', initially=u'DEFERRED', deferrable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'type', 'user_id', name='db_dbnodestatistics_day_type_user_id_key')
+    )
+    op.create_index(op.f('ix_db_dbnodestatistics_user_id'), 'db_dbnodestatistics', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_db_dbnodestatistics_user_id'), table_name='db_dbnodestatistics')
+    op.drop_table('db_dbnodestatistics')
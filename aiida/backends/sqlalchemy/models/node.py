@@ -15,7 +15,7 @@ from sqlalchemy.orm import (
 )
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy.schema import Column, UniqueConstraint
+from sqlalchemy.schema import Column, Index, UniqueConstraint
 from sqlalchemy.types import Integer, String, Boolean, DateTime, Text
 # Specific to PGSQL. If needed to be agnostic
 # http://docs.sqlalchemy.org/en/rel_0_9/core/custom_types.html?highlight=guid#backend-agnostic-guid-type
@@ -74,6 +74,7 @@ class DbNode(Base):
     uuid = Column(UUID(as_uuid=True), default=uuid_func)
     type = Column(String(255), index=True)
     process_type = Column(String(255), index=True)
+    hash = Column(String(255), index=True, nullable=True)
     label = Column(String(255), index=True, nullable=True,
                    default="")  # Does it make sense to be nullable and have a default?
     description = Column(Text(), nullable=True, default="")
@@ -376,6 +377,10 @@ class DbLink(Base):
         # I cannot add twice the same link
         # I want unique labels among all inputs of a node
         # UniqueConstraint('output_id', 'label'),
+        # Cover the steps of the recursive traversals of the graph, which follow
+        # the links of some types from one end, with index-only scans
+        Index('ix_db_dblink_input_id_type_output_id', 'input_id', 'type', 'output_id'),
+        Index('ix_db_dblink_output_id_type_input_id', 'output_id', 'type', 'input_id'),
     )
 
     def __str__(self):
@@ -385,3 +390,34 @@ class DbLink(Base):
             self.output.get_simple_name(invalid_result="Unknown node"),
             self.output.pk
         )
+
+
+class DbNodeStatistics(Base):
+    """
+    The materialized statistics of node creation: the number of nodes of each type created
+    by each user on each day, refreshed incrementally by the query manager.
+    """
+    __tablename__ = "db_dbnodestatistics"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(DateTime(timezone=True), nullable=False)
+    type = Column(String(255), nullable=False)
+    user_id = Column(
+        Integer,
+        ForeignKey(
+            'db_dbuser.id', ondelete="CASCADE",
+            deferrable=True, initially="DEFERRED"
+        ),
+        nullable=False,
+        index=True
+    )
+    count = Column(Integer, nullable=False)
+    # The largest pk of the nodes that were counted
+    last_node_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('day', 'type', 'user_id', name='db_dbnodestatistics_day_type_user_id_key'),
+    )
+
+    def __str__(self):
+        return "{} nodes of type {} on {}".format(self.count, self.type, self.day)
@@ -29,6 +29,7 @@ from aiida.common.exceptions import (
 from aiida.common.exceptions import InputValidationError
 from aiida.backends.general.querybuilder_interface import QueryBuilderInterface
 from aiida.backends.utils import _get_column
+from aiida.backends.sqlalchemy.utils import DATETIME_KEY
 
 
 class jsonb_array_length(FunctionElement):
@@ -363,18 +364,13 @@ class QueryBuilderImplSQLA(QueryBuilderInterface):
                 type_filter = jsonb_typeof(path_in_json) == 'null'
                 casted_entity = path_in_json.cast(JSONB)  # BOOLEANS?
             elif isinstance(value, datetime):
-                # type filter here is filter whether this attributes stores
-                # a string and a filter whether this string
-                # is compatible with a datetime (using a regex)
-                #  - What about historical values (BC, or before 1000AD)??
-                #  - Different ways to represent the timezone
-
-                type_filter = jsonb_typeof(path_in_json) == 'string'
-                regex_filter = path_in_json.astext.op(
-                    "SIMILAR TO"
-                )("\d\d\d\d-[0-1]\d-[0-3]\dT[0-2]\d:[0-5]\d:\d\d\.\d+((\+|\-)\d\d:\d\d)?")
-                type_filter = and_(type_filter, regex_filter)
-                casted_entity = path_in_json.cast(DateTime)
+                # Datetimes are stored as an object with the isoformat under the DATETIME_KEY,
+                # see aiida.backends.sqlalchemy.utils.dumps_json
+                type_filter = and_(
+                    jsonb_typeof(path_in_json) == 'object',
+                    path_in_json.cast(JSONB).has_key(DATETIME_KEY)
+                )
+                casted_entity = path_in_json.cast(JSONB)[DATETIME_KEY].astext.cast(DateTime)
             else:
                 raise Exception('Unknown type {}'.format(type(value)))
             return type_filter, casted_entity
@@ -696,3 +692,19 @@ class QueryBuilderImplSQLA(QueryBuilderInterface):
         except Exception as e:
             self.get_session().rollback()
             raise e
+
+    def iter_batches(self, query, batch_size):
+        try:
+            # With psycopg2, stream_results makes SQLAlchemy use a named (server-side) cursor
+            results = query.execution_options(stream_results=True).yield_per(batch_size)
+            batch = []
+            for row in results:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        except Exception:
+            self.get_session().rollback()
+            raise
@@ -198,3 +198,51 @@ class TestDbExtrasSqla(AiidaTestCase):
         self.assertEquals(n1.get_extras(), new_attrs)
         # Also check that other nodes were not damaged
         self.assertEquals(n2.get_extras(), {'pippo2': [3, 4, 'b'], '_aiida_hash': n2.get_hash()})
+
+
+class TestJsonDatetimesSqla(AiidaTestCase):
+    """
+    Datetimes in the JSON columns are stored as typed objects
+    """
+
+    def test_roundtrip(self):
+        import datetime
+        from aiida.backends.sqlalchemy.utils import dumps_json, loads_json, DATETIME_KEY
+        from aiida.utils import timezone
+
+        now = timezone.now()
+        value = {'time': now, 'times': [now, {'nested': now}], 'string': now.isoformat()}
+        serialized = dumps_json(value)
+        self.assertEqual(loads_json(serialized), value)
+        self.assertEqual(loads_json(dumps_json({'time': now}))['time'], now)
+        self.assertIn(DATETIME_KEY, serialized)
+        # Strings that look like a datetime are not converted anymore
+        self.assertEqual(loads_json(dumps_json([now.isoformat()])), [now.isoformat()])
+        with self.assertRaises(TypeError):
+            dumps_json({'date': datetime.date.today()})
+
+    def test_query_datetime_attribute(self):
+        import datetime
+        from aiida.orm.querybuilder import QueryBuilder
+        from aiida.utils import timezone
+
+        now = timezone.now()
+        node = Node()
+        node._set_attr('time', now)
+        node._set_attr('label', now.isoformat())
+        node.store()
+
+        reloaded = Node.get_subclass_from_pk(node.pk)
+        self.assertEqual(reloaded.get_attr('time'), now)
+        self.assertEqual(reloaded.get_attr('label'), now.isoformat())
+
+        qb = QueryBuilder().append(Node, filters={
+            'id': node.pk,
+            'attributes.time': {'<': now + datetime.timedelta(days=1)}
+        }, project='id')
+        self.assertEqual(qb.all(), [[node.pk]])
+        qb = QueryBuilder().append(Node, filters={
+            'id': node.pk,
+            'attributes.time': {'>': now + datetime.timedelta(days=1)}
+        }, project='id')
+        self.assertEqual(qb.all(), [])
@@ -9,23 +9,9 @@
 ###########################################################################
 
 
-try:
-    import ultrajson as json
-    from functools import partial
-
-    # double_precision = 15, to replicate what PostgreSQL numerical type is
-    # using
-    json_dumps = partial(json.dumps, double_precision=15)
-    json_loads = partial(json.loads, precise_float=True)
-except ImportError:
-    import json
-
-    json_dumps = json.dumps
-    json_loads = json.loads
-
 import datetime
+import json
 
-import re
 from alembic import command
 from alembic.config import Config
 from alembic.runtime.environment import EnvironmentContext
@@ -99,52 +85,54 @@ def _load_dbenv_noschemacheck(profile=None, connection=None):
 _aiida_autouser_cache = None
 
 
-def dumps_json(d):
+# Datetimes are stored in JSON columns as an object with this single key and the isoformat as value
+DATETIME_KEY = '$datetime'
+
+
+def _json_default(value):
+    """
+    Encode the values that are not natively supported by JSON
+    """
+    if isinstance(value, datetime.datetime):
+        return {DATETIME_KEY: value.isoformat()}
+    raise TypeError("{!r} is not JSON serializable".format(value))
+
+
+def _json_object_hook(dictionary):
     """
-    Transforms all datetime object into isoformat and then returns the JSON
+    Decode the objects that encode a datetime
     """
+    if len(dictionary) == 1 and DATETIME_KEY in dictionary:
+        try:
+            return parser.parse(dictionary[DATETIME_KEY])
+        except (ValueError, TypeError, AttributeError):
+            return dictionary
+    return dictionary
 
-    def f(v):
-        if isinstance(v, list):
-            return [f(_) for _ in v]
-        elif isinstance(v, dict):
-            return dict((key, f(val)) for key, val in v.iteritems())
-        elif isinstance(v, datetime.datetime):
-            return v.isoformat()
-        return v
 
-    return json_dumps(f(d))
+_datetime_json_decoder = json.JSONDecoder(object_hook=_json_object_hook)
 
 
-date_reg = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+(\+\d{2}:\d{2})?$')
+def dumps_json(d):
+    """
+    Returns the JSON of d, where datetime objects are encoded as {DATETIME_KEY: isoformat}.
+
+    The whole object is serialized by the C encoder of the json module, which only calls
+    back into Python for the datetime objects.
+    """
+    return json.dumps(d, default=_json_default)
 
 
 def loads_json(s):
     """
-    Loads the json and try to parse each basestring as a datetime object
-    """
-
-    ret = json_loads(s)
-
-    def f(d):
-        if isinstance(d, list):
-            for i, val in enumerate(d):
-                d[i] = f(val)
-            return d
-        elif isinstance(d, dict):
-            for k, v in d.iteritems():
-                d[k] = f(v)
-            return d
-        elif isinstance(d, basestring):
-            if date_reg.match(d):
-                try:
-                    return parser.parse(d)
-                except (ValueError, TypeError):
-                    return d
-            return d
-        return d
-
-    return f(ret)
+    Loads the json and decodes the objects that encode a datetime.
+
+    Only the JSON documents that contain the datetime key go through the object hook, all the
+    other ones are decoded by the C decoder of the json module without calling back into Python.
+    """
+    if DATETIME_KEY in s:
+        return _datetime_json_decoder.decode(s)
+    return json.loads(s)
 
 
 # XXX the code here isn't different from the one use in Django. We may be able
@@ -69,6 +69,8 @@ db_test_list = {
         'work.work_chain': ['aiida.backends.tests.work.work_chain'],
         'work.workfunctions': ['aiida.backends.tests.work.test_workfunctions'],
         'work.job_processes': ['aiida.backends.tests.work.job_processes'],
+        'work.job_calcs': ['aiida.backends.tests.work.test_job_calcs'],
+        'work.transport_queue': ['aiida.backends.tests.work.test_transport_queue'],
         'plugin_loader': ['aiida.backends.tests.test_plugin_loader'],
         'daemon': ['aiida.backends.tests.daemon'],
         'verdi_commands': ['aiida.backends.tests.verdi_commands'],
@@ -801,6 +801,56 @@ class TestSimple(AiidaTestCase):
             # Deleting the created temporary folder
             shutil.rmtree(temp_folder, ignore_errors=True)
 
+    def test_archive_formats(self):
+        """
+        Export nodes with files and links to a tar and a zip archive, which are written
+        incrementally, and check that they are imported back.
+        """
+        import os
+        import shutil
+        import tempfile
+
+        from aiida.orm import load_node
+        from aiida.orm.calculation import Calculation
+        from aiida.orm.data.parameter import ParameterData
+        from aiida.orm.data.singlefile import SinglefileData
+        from aiida.orm.importexport import export, export_zip
+        from aiida.common.links import LinkType
+
+        temp_folder = tempfile.mkdtemp()
+        try:
+            src_file = os.path.join(temp_folder, 'content.txt')
+            with open(src_file, 'w') as f:
+                f.write('file content')
+
+            for fmt, export_function in [('tar', export), ('zip', export_zip)]:
+                self.clean_db()
+                self.insert_data()
+
+                parameters = ParameterData(dict={'a': 1, 'b': [1.5, 'x']}).store()
+                single_file = SinglefileData(file=src_file).store()
+                calc = Calculation()
+                calc.add_link_from(parameters, 'parameters', link_type=LinkType.INPUT)
+                calc.store()
+                single_file.add_link_from(calc, 'file', link_type=LinkType.CREATE)
+                uuids = (parameters.uuid, single_file.uuid, calc.uuid)
+
+                filename = os.path.join(temp_folder, 'export.{}'.format(fmt))
+                export_function([n.dbnode for n in (parameters, single_file, calc)],
+                                outfile=filename, silent=True)
+
+                self.clean_db()
+                import_data(filename, silent=True)
+
+                parameters, single_file, calc = [load_node(uuid) for uuid in uuids]
+                self.assertEquals(parameters.get_dict(), {'a': 1, 'b': [1.5, 'x']})
+                with open(single_file.get_file_abs_path()) as f:
+                    self.assertEquals(f.read(), 'file content')
+                self.assertEquals(calc.get_inputs_dict()['parameters'].uuid, parameters.uuid)
+                self.assertEquals(single_file.get_inputs()[0].uuid, calc.uuid)
+        finally:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
     def test_reexport(self):
         """
         Export something, import and reexport and check if everything is valid.
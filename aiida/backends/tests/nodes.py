@@ -134,6 +134,43 @@ class TestNodeHashing(AiidaTestCase):
         self.assertNotEquals(hash1, None)
         self.assertEquals(hash1, hash2)
 
+    def test_hash_column(self):
+        """
+        Tests that the indexed hash column follows the '_aiida_hash' extra.
+        """
+        from aiida.orm.querybuilder import QueryBuilder
+
+        n = self.create_simple_node('hash_column').store()
+        hash_ = n.get_extra('_aiida_hash')
+        self.assertEquals(n.dbnode.hash, hash_)
+        self.assertEquals(QueryBuilder().append(Node, filters={'hash': hash_}, project='id').all(), [[n.pk]])
+
+        n.clear_hash()
+        self.assertIsNone(n.get_extra('_aiida_hash'))
+        self.assertEquals(QueryBuilder().append(Node, filters={'hash': hash_}).count(), 0)
+
+        n.rehash()
+        self.assertEquals(QueryBuilder().append(Node, filters={'hash': hash_}, project='id').all(), [[n.pk]])
+
+    def test_find_same_nodes(self):
+        """
+        Tests that the cache sources of several nodes are found at once.
+        """
+        from aiida.orm.utils import find_same_nodes
+
+        stored = self.create_simple_node('find_same', 1).store()
+        other_stored = self.create_simple_node('find_same', 2).store()
+        nodes = [
+            self.create_simple_node('find_same', 1),
+            self.create_simple_node('find_same', 3),
+            self.create_simple_node('find_same', 2),
+        ]
+
+        same_nodes = find_same_nodes(nodes)
+        self.assertEquals([n.uuid if n is not None else None for n in same_nodes],
+                          [stored.uuid, None, other_stored.uuid])
+        self.assertEquals(same_nodes[0].uuid, nodes[0]._get_same_node().uuid)
+
 
 class TestTransitiveNoLoops(AiidaTestCase):
     """
@@ -1723,6 +1760,132 @@ class TestSubNodesAndLinks(AiidaTestCase):
                  for i in endnode.get_inputs(also_labels=True)]),
             set([("N2", n2.uuid)]))
 
+    def test_store_many(self):
+        """
+        Check that store_many stores the nodes with their attributes, files, hashes and
+        the links between them and to stored nodes
+        """
+        import tempfile
+        from aiida.orm.data.cif import CifData
+        from aiida.orm.implementation.general.node import _HASH_EXTRA_KEY
+        from aiida.orm.querybuilder import QueryBuilder
+
+        parent = Node().store()
+        nodes = [Data() for _ in range(3)]
+        for index, node in enumerate(nodes):
+            node._set_attr('index', index)
+            node._set_attr('nested', {'list': [index, 'a'], 'value': 1.5})
+        nodes[0].add_link_from(parent, 'parent', link_type=LinkType.CREATE)
+        nodes[1].add_link_from(nodes[0], 'first', link_type=LinkType.INPUT)
+        nodes[2].add_link_from(nodes[1], 'second', link_type=LinkType.INPUT)
+        nodes[2].add_link_from(nodes[0], 'first', link_type=LinkType.INPUT)
+
+        with tempfile.NamedTemporaryFile() as handle:
+            handle.write('content')
+            handle.flush()
+            nodes[1].add_path(handle.name, 'file.txt')
+        hashes = [node.get_hash() for node in nodes]
+
+        self.assertEqual(Node.store_many(nodes), nodes)
+
+        for index, node in enumerate(nodes):
+            self.assertTrue(node.is_stored)
+            self.assertEqual(node.get_hash(), hashes[index])
+            reloaded = load_node(node.uuid)
+            self.assertEqual(reloaded.pk, node.pk)
+            self.assertEqual(reloaded.get_attr('index'), index)
+            self.assertEqual(reloaded.get_attr('nested'), {'list': [index, 'a'], 'value': 1.5})
+            self.assertEqual(reloaded.get_extra(_HASH_EXTRA_KEY), hashes[index])
+            self.assertIn(node.uuid, [uuid for uuid, in QueryBuilder().append(
+                Node, filters={'hash': hashes[index]}, project='uuid').all()])
+        with self.assertRaises(ModificationNotAllowed):
+            nodes[0]._set_attr('index', 5)
+        with open(load_node(nodes[1].uuid).get_abs_path('file.txt')) as handle:
+            self.assertEqual(handle.read(), 'content')
+
+        self.assertEqual([n.uuid for n in parent.get_outputs()], [nodes[0].uuid])
+        self.assertEqual(
+            set((label, n.uuid) for label, n in load_node(nodes[2].uuid).get_inputs(also_labels=True)),
+            set([('second', nodes[1].uuid), ('first', nodes[0].uuid)]))
+
+        # Already stored
+        with self.assertRaises(ModificationNotAllowed):
+            Node.store_many([nodes[0]])
+
+        # Unstored source outside of the nodes to store
+        unstored_parent = Node()
+        child = Node()
+        child.add_link_from(unstored_parent, 'parent')
+        with self.assertRaises(ModificationNotAllowed):
+            Node.store_many([child])
+        self.assertFalse(child.is_stored)
+
+        # Loop between the nodes to store
+        node_a = Node()
+        node_b = Node()
+        node_b.add_link_from(node_a, 'a', link_type=LinkType.CREATE)
+        node_a.add_link_from(node_b, 'b', link_type=LinkType.CREATE)
+        with self.assertRaises(ValueError):
+            Node.store_many([node_a, node_b])
+        self.assertFalse(node_a.is_stored)
+
+        # Classes that override store cannot be stored in bulk
+        with self.assertRaises(ValueError):
+            Node.store_many([CifData()])
+
+    def test_prefetch(self):
+        """
+        Check that the prefetched attributes, extras and links are used instead of
+        querying the DB for each node, and discarded when they are modified
+        """
+        import mock
+        from aiida.orm.querybuilder import QueryBuilder
+
+        parent = Node().store()
+        nodes = []
+        for index in range(3):
+            node = Data()
+            node._set_attr('index', index)
+            node.add_link_from(parent, 'parent', link_type=LinkType.CREATE)
+            node.store()
+            node.set_extra('label', 'node_{}'.format(index))
+            nodes.append(node)
+        nodes[1].add_link_from(nodes[0], 'first', link_type=LinkType.INPUT)
+
+        with self.assertRaises(ValueError):
+            Node.prefetch(nodes, ['attributes', 'comments'])
+
+        qb = QueryBuilder(prefetch=['attributes', 'extras', 'inputs', 'outputs'])
+        qb.append(Data, filters={'id': {'in': [node.pk for node in nodes]}}, project='*')
+        loaded = {node.pk: node for node, in qb.all()}
+        self.assertEqual(set(loaded), set(node.pk for node in nodes))
+
+        not_allowed = mock.Mock(side_effect=AssertionError('The DB was queried'))
+        with mock.patch.multiple(type(parent), _db_iterattrs=not_allowed, _get_db_attr=not_allowed,
+                                 _db_iterextras=not_allowed, _get_db_extra=not_allowed,
+                                 _get_db_input_links=not_allowed, _get_db_output_links=not_allowed):
+            for index, node in enumerate(nodes):
+                reloaded = loaded[node.pk]
+                self.assertEqual(reloaded.get_attr('index'), index)
+                self.assertEqual(reloaded.get_attrs(), {'index': index})
+                self.assertEqual(reloaded.get_extra('label'), 'node_{}'.format(index))
+                self.assertEqual(reloaded.get_extra('missing', None), None)
+                self.assertEqual(
+                    [(label, n.uuid) for label, n in reloaded.get_inputs(link_type=LinkType.CREATE, also_labels=True)],
+                    [('parent', parent.uuid)])
+            self.assertEqual([n.uuid for n in loaded[nodes[1].pk].get_inputs(link_type=LinkType.INPUT)],
+                             [nodes[0].uuid])
+            self.assertEqual([n.uuid for n in loaded[nodes[0].pk].get_outputs()], [nodes[1].uuid])
+            self.assertEqual(loaded[nodes[2].pk].get_outputs(), [])
+
+        # Modifications through the node discard the prefetched data
+        reloaded = loaded[nodes[0].pk]
+        reloaded.set_extra('label', 'changed')
+        self.assertEqual(reloaded.get_extra('label'), 'changed')
+        child = Node().store()
+        child.add_link_from(reloaded, 'child')
+        self.assertEqual(set(n.uuid for n in reloaded.get_outputs()), set([nodes[1].uuid, child.uuid]))
+
     def test_has_children_has_parents(self):
         """
         This check verifies that the properties has_children has_parents of the
@@ -2336,3 +2499,37 @@ class TestNodeDeletion(AiidaTestCase):
 
         delete_nodes([wf.pk], verbosity=0, force=True, follow_returns=True)
         self._check_existence(uuids_check_existence, uuids_check_deleted)
+
+    def test_get_linked_pks(self):
+        """
+        Check the traversal of the graph in the database that is used to find the nodes to delete
+        """
+        from aiida.common.links import LinkType
+        from aiida.orm.traversal import get_linked_pks, iter_linked_pks
+
+        in1, in2, wf, slave1, outp1, outp2, slave2, outp3, outp4 = self._create_calls_n_returns_graph()
+        data_provenance = [LinkType.CREATE, LinkType.INPUT]
+
+        self.assertEquals(get_linked_pks([], data_provenance), set())
+        self.assertEquals(
+            get_linked_pks([in2.pk], data_provenance),
+            set(n.pk for n in (in2, slave1, outp1, slave2, outp2)))
+        self.assertEquals(
+            get_linked_pks([wf.pk], data_provenance + [LinkType.CALL]),
+            set(n.pk for n in (wf, slave1, outp1, slave2, outp2, outp3)))
+        self.assertEquals(
+            get_linked_pks([outp2.pk], data_provenance, direction='incoming'),
+            set(n.pk for n in (outp2, slave2, in2)))
+
+        # Every node is returned once, also when streamed in small batches
+        pks = list(iter_linked_pks([in1.pk, in2.pk], data_provenance, batch_size=2))
+        self.assertEquals(len(pks), len(set(pks)))
+        self.assertEquals(set(pks), set(n.pk for n in (in1, in2, wf, slave1, outp1, slave2, outp2, outp3)))
+
+        # Loops terminate
+        wf.add_link_from(outp4, link_type=LinkType.INPUT)
+        self.assertEquals(
+            get_linked_pks([wf.pk], [LinkType.INPUT, LinkType.RETURN]), set(n.pk for n in (wf, outp2, outp4)))
+
+        with self.assertRaises(ValueError):
+            get_linked_pks([wf.pk], data_provenance, direction='sideways')
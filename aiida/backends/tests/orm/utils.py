@@ -2,6 +2,7 @@
 from aiida.backends.testbase import AiidaTestCase
 from aiida.common.exceptions import NotExistent
 from aiida.orm import Group, Node
+from aiida.orm.identity_map import node_identity_map
 from aiida.orm.utils import load_group, load_node
 
 
@@ -73,4 +74,42 @@ class TestOrmUtils(AiidaTestCase):
         self.assertEquals(loaded_node.uuid, node.uuid)
 
         with self.assertRaises(NotExistent):
-            load_group('non-existent-uuid')
\ No newline at end of file
+            load_group('non-existent-uuid')
+
+    def test_load_node_identity_map(self):
+        """
+        Test that load_node returns the same instances within a node_identity_map block
+        """
+        nodes = [Node().store() for _ in range(3)]
+
+        # Without an identity map, a new instance is loaded every time
+        self.assertIsNot(load_node(nodes[0].pk), load_node(nodes[0].pk))
+
+        with node_identity_map() as identity_map:
+            loaded_node = load_node(nodes[0].pk)
+            self.assertIs(load_node(nodes[0].pk), loaded_node)
+            self.assertIs(load_node(uuid=nodes[0].uuid), loaded_node)
+            self.assertIs(Node.get_subclass_from_pk(nodes[0].pk), loaded_node)
+            self.assertIs(load_node(long(nodes[0].pk)), loaded_node)
+            self.assertEquals(identity_map.misses, 1)
+            self.assertEquals(identity_map.hits, 4)
+
+            # Partial uuids are not looked up in the map, but the loaded node is added to it
+            self.assertIs(load_node(nodes[1].uuid[:10]), identity_map.get(pk=nodes[1].pk))
+
+            # A node modified through another instance is loaded again
+            nodes[0].set_extra('key', 'value')
+            reloaded_node = load_node(nodes[0].pk)
+            self.assertIsNot(reloaded_node, loaded_node)
+            self.assertEquals(reloaded_node.get_extra('key'), 'value')
+
+            # A node modified through the instance in the map stays in it
+            reloaded_node.set_extra('key', 'other')
+            self.assertIs(load_node(nodes[0].pk), reloaded_node)
+
+        with node_identity_map(max_nodes=2) as identity_map:
+            for node in nodes:
+                load_node(node.pk)
+            self.assertEquals(len(identity_map), 2)
+            self.assertNotIn(nodes[0].pk, identity_map)
+            self.assertIn(nodes[2].pk, identity_map)
@@ -339,6 +339,102 @@ class TestQueryBuilder(AiidaTestCase):
         self.assertEqual(len(list(QueryBuilder().append(Node, project=['*', 'id']).iterdict())), 4)
         self.assertEqual(len(list(QueryBuilder().append(Node, project=['id']).iterdict())), 4)
 
+    def test_query_template_cache(self):
+        from aiida.orm import Node
+        from aiida.orm.querybuilder import QueryBuilder, clear_query_template_cache, _query_template_cache
+
+        nodes = [Node().store() for i in range(3)]
+
+        def get_pks(pk):
+            qb = QueryBuilder().append(Node, filters={'id': {'>=': pk}}, project='id', tag='node')
+            qb.add_filter('node', {'id': {'in': [node.pk for node in nodes]}})
+            return sorted(pk for pk, in qb.all())
+
+        clear_query_template_cache()
+        self.assertEqual(get_pks(nodes[0].pk), [node.pk for node in nodes])
+        self.assertEqual(len(_query_template_cache), 1)
+        # Same query with different values is built from the template
+        self.assertEqual(get_pks(nodes[1].pk), [node.pk for node in nodes[1:]])
+        self.assertEqual(get_pks(nodes[2].pk), [nodes[2].pk])
+        self.assertEqual(len(_query_template_cache), 1)
+
+        # The aliases of the template should be used to add custom filters
+        qb = QueryBuilder().append(Node, filters={'id': {'>=': nodes[1].pk}}, project='id', tag='node')
+        qb.add_filter('node', {'id': {'in': [node.pk for node in nodes]}})
+        query = qb.get_query().filter(qb.get_alias('node').id == nodes[1].pk)
+        self.assertEqual(query.all(), [(nodes[1].pk,)])
+
+        # The limit and the offset are bound as well
+        def get_page(limit, offset):
+            qb = QueryBuilder().append(Node, filters={'id': {'in': [node.pk for node in nodes]}}, project='id')
+            return qb.order_by({Node: ['id']}).limit(limit).offset(offset)
+
+        clear_query_template_cache()
+        pks = sorted(node.pk for node in nodes)
+        self.assertEqual([pk for pk, in get_page(2, 0).all()], pks[:2])
+        self.assertEqual([pk for pk, in get_page(2, 2).all()], pks[2:])
+        self.assertEqual([pk for pk, in get_page(1, 1).all()], pks[1:2])
+        self.assertEqual(get_page(2, 1).first(), [pks[1]])
+        self.assertEqual(len(_query_template_cache), 1)
+
+    def test_columnar_results(self):
+        import numpy as np
+        from aiida.orm import Node
+        from aiida.orm.querybuilder import QueryBuilder
+
+        nodes = []
+        for i in range(5):
+            node = Node()
+            node._set_attr('energy', float(i))
+            node._set_attr('values', [i, i])
+            node.store()
+            nodes.append(node)
+        pks = sorted(node.pk for node in nodes)
+
+        qb = QueryBuilder().append(
+            Node, filters={'id': {'in': pks}}, tag='node',
+            project=['id', 'attributes.energy', 'attributes.values'])
+        qb.order_by({'node': ['id']})
+
+        batches = list(qb.iter_batches(batch_size=2))
+        self.assertEqual([len(batch['node']['id']) for batch in batches], [2, 2, 1])
+        self.assertEqual(sum([batch['node']['id'] for batch in batches], []), pks)
+
+        arrays = qb.to_arrays(batch_size=2)
+        self.assertEqual(arrays['node']['id'].tolist(), pks)
+        self.assertEqual(arrays['node']['attributes.energy'].dtype, np.float64)
+        self.assertEqual(arrays['node']['attributes.energy'].tolist(), [0., 1., 2., 3., 4.])
+        self.assertEqual(arrays['node']['attributes.values'].shape, (5,))
+        self.assertEqual(arrays['node']['attributes.values'][4], [4, 4])
+
+        qb = QueryBuilder().append(Node, filters={'id': {'in': pks}}, tag='node')
+        self.assertEqual(sorted(node.pk for node in qb.to_arrays()['node']['*']), pks)
+
+        qb = QueryBuilder().append(Node, filters={'id': -1}, project=['id'], tag='node')
+        self.assertEqual(qb.to_arrays()['node']['id'].shape, (0,))
+
+    def test_columnar_results_conversion(self):
+        from aiida.common.datastructures import calc_states
+        from aiida.orm import JobCalculation
+        from aiida.orm.querybuilder import QueryBuilder
+
+        calc = JobCalculation(computer=self.computer,
+                              resources={'num_machines': 1, 'num_mpiprocs_per_machine': 1})
+        calc.store()
+        calc._set_state(calc_states.TOSUBMIT)
+
+        # The attributes are fetched separately with Django, and the state is a Choice with SQLAlchemy
+        qb = QueryBuilder().append(
+            JobCalculation, filters={'id': calc.pk}, tag='calc',
+            project=['attributes', 'attributes.resources', 'state'])
+        batches = list(qb.iter_batches())
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0]['calc']['attributes'], [calc.get_attrs()])
+        self.assertEqual(batches[0]['calc']['attributes.resources'], [calc.get_attr('resources')])
+        self.assertEqual(batches[0]['calc']['state'], [calc_states.TOSUBMIT])
+        self.assertEqual(batches[0], {tag: {key: [value] for key, value in row.items()}
+                                      for tag, row in qb.dict()[0].items()})
+
     def test_append_validation(self):
         from aiida.orm.querybuilder import QueryBuilder
         from aiida.orm.data.structure import StructureData
@@ -844,6 +940,49 @@ class QueryBuilderPath(AiidaTestCase):
         qb.add_filter('edge', {'depth': 6})
         self.assertTrue(set(zip(*qb.all())[0]), set([6]))
 
+    def test_query_path_depth_and_link_types(self):
+        """
+        Test that the depth and the link types of a recursive join are applied to every
+        step of the recursion
+        """
+        from aiida.orm.querybuilder import QueryBuilder
+        from aiida.orm import Node
+        from aiida.common.exceptions import InputValidationError
+        from aiida.common.links import LinkType
+
+        # A chain n0 -> n1 -> ... -> n4, with a CALL link in the middle
+        nodes = [Node().store() for _ in range(5)]
+        for index, link_type in enumerate(
+                [LinkType.INPUT, LinkType.INPUT, LinkType.CALL, LinkType.INPUT]):
+            nodes[index + 1].add_link_from(nodes[index], label='link', link_type=link_type)
+
+        def get_descendants(**kwargs):
+            qb = QueryBuilder().append(Node, filters={'id': nodes[0].pk}, tag='anc')
+            qb.append(Node, descendant_of='anc', project='id', **kwargs)
+            return set(pk for pk, in qb.all())
+
+        pks = [node.pk for node in nodes]
+        # By default, the CALL link is not followed
+        self.assertEquals(get_descendants(), set(pks[1:3]))
+        self.assertEquals(get_descendants(edge_filters={'depth': {'<': 1}}), set(pks[1:2]))
+        self.assertEquals(
+            get_descendants(edge_filters={'type': {'in': [LinkType.INPUT.value, LinkType.CALL.value]}}),
+            set(pks[1:]))
+        self.assertEquals(
+            get_descendants(edge_filters={
+                'type': {'in': [LinkType.INPUT.value, LinkType.CALL.value]}, 'depth': {'<=': 2}}),
+            set(pks[1:4]))
+        self.assertEquals(get_descendants(edge_filters={'type': LinkType.CALL.value}), set())
+
+        qb = QueryBuilder().append(Node, filters={'id': pks[4]}, tag='desc')
+        qb.append(Node, ancestor_of='desc', project='id', edge_filters={'type': LinkType.INPUT.value})
+        self.assertEquals(set(pk for pk, in qb.all()), set(pks[3:4]))
+
+        with self.assertRaises(InputValidationError):
+            get_descendants(edge_filters={'type': {'like': 'input%'}})
+        with self.assertRaises(InputValidationError):
+            get_descendants(edge_filters={'type': 'nonexistentlink'})
+
 
 class TestConsistency(AiidaTestCase):
     def test_create_node_and_query(self):
@@ -911,6 +1050,46 @@ class TestManager(AiidaTestCase):
 
         self.assertEquals(new_db_statistics, expected_db_statistics)
 
+    def test_statistics_materialized(self):
+        """
+        Test that the materialized statistics are refreshed incrementally and are the same
+        as the ones computed over all the nodes, also for a single user.
+        """
+        from aiida.backends.utils import QueryFactory
+        from aiida.orm import Node, DataFactory, Calculation
+
+        ParameterData = DataFactory('parameter')
+        qmanager = QueryFactory()()
+        user_email = self.backend.users.get_automatic_user().email
+
+        Node().store()
+        qmanager.refresh_creation_statistics(full=True)
+        statistics = qmanager.get_creation_statistics()
+        self.assertEquals(qmanager.get_creation_statistics(materialized=True), statistics)
+
+        for node in [ParameterData(), ParameterData(), Calculation()]:
+            node.store()
+        # By default the materialized statistics are only read
+        self.assertEquals(qmanager.get_creation_statistics(materialized=True), statistics)
+        self.assertEquals(qmanager.refresh_creation_statistics(), 3)
+        self.assertEquals(qmanager.refresh_creation_statistics(), 0)
+
+        # They are refreshed at most once per refresh interval
+        Node().store()
+        self.assertEquals(qmanager.get_creation_statistics(materialized=True, refresh_interval=0),
+                          qmanager.get_creation_statistics())
+        Node().store()
+        self.assertNotEquals(qmanager.get_creation_statistics(materialized=True, refresh_interval=3600),
+                             qmanager.get_creation_statistics())
+        self.assertEquals(qmanager.refresh_creation_statistics(), 1)
+
+        self.assertEquals(qmanager.get_creation_statistics(materialized=True),
+                          qmanager.get_creation_statistics())
+        self.assertEquals(qmanager.get_creation_statistics(user_email=user_email, materialized=True),
+                          qmanager.get_creation_statistics(user_email=user_email))
+        self.assertEquals(qmanager.get_creation_statistics(user_email='nobody@nowhere', materialized=True),
+                          {'total': 0, 'types': {}, 'ctime_by_day': {}})
+
     def test_statistics_default_class(self):
         """
         Test if the statistics query works properly.
@@ -666,6 +666,76 @@ class RESTApiTestSuite(RESTApiTestCase):
         """
         pass
 
+    ############### keyset pagination #############
+    def get_keyset_pages(self, url):
+        """
+        Follow the 'next' links of a keyset pagination starting from url, and
+        return the list of the pages of results
+        """
+        import re
+
+        pages = []
+        url = self._url_prefix + url
+        with self.app.test_client() as client:
+            while url is not None and len(pages) < 100:
+                rv = client.get(url)
+                self.assertEqual(rv.status_code, 200)
+                response = json.loads(rv.data)
+                pages.append(response["data"].values()[0])
+                match = re.search(r'<([^>]*)>; rel=next', rv.headers.get('Link', ''))
+                url = match.group(1) if match else None
+        return pages
+
+    def test_computers_list_cursor(self):
+        """
+        Get the full list of computers following the cursors of a keyset
+        pagination, with pages of two computers
+        """
+        computers = sorted(self.get_dummy_data()["computers"], key=lambda _: _["id"])
+        pages = self.get_keyset_pages("/computers?cursor=start&limit=2")
+
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+        self.assertEqual([computer["uuid"] for page in pages for computer in page],
+                         [computer["uuid"] for computer in computers])
+
+    def test_calculations_list_cursor_ctime(self):
+        """
+        Get the full list of calculations following the cursors of a keyset
+        pagination ordered by decreasing ctime
+        """
+        pages = self.get_keyset_pages("/calculations?cursor=start&limit=1&orderby=-ctime")
+        uuids = [calc["uuid"] for page in pages for calc in page]
+        ctimes = [calc["ctime"] for page in pages for calc in page]
+
+        self.assertEqual(sorted(uuids), sorted(calc["uuid"] for calc in self.get_dummy_data()["calculations"]))
+        self.assertEqual(ctimes, sorted(ctimes, reverse=True))
+
+    def test_cursor_invalid(self):
+        """
+        Cursors that are malformed, generated for another order or combined
+        with an offset are rejected
+        """
+        from aiida.restapi.common.utils import encode_cursor
+
+        with self.app.test_client() as client:
+            for url in ["/computers?cursor=kzz",
+                        "/computers?cursor=start&offset=2",
+                        "/computers?cursor=start&orderby=name",
+                        "/computers?orderby=-id&cursor=" + encode_cursor(['id'], False, [1])]:
+                rv = client.get(self._url_prefix + url)
+                self.assertEqual(rv.status_code, 400, url)
+
+    def test_computers_list_approximate_count(self):
+        """
+        Get the list of computers with an approximate count
+        """
+        with self.app.test_client() as client:
+            rv = client.get(self._url_prefix + "/computers?count=approximate&orderby=+id")
+            response = json.loads(rv.data)
+            self.assertEqual(rv.headers['X-Total-Count-Approximate'], 'true')
+            self.assertGreaterEqual(int(rv.headers['X-Total-Count']), 0)
+            self.assertEqual(len(response["data"]["computers"]), len(self.get_dummy_data()["computers"]))
+
     ############### single calculation ########################
     def test_calculations_details(self):
         """
@@ -804,4 +874,145 @@ class RESTApiTestSuite(RESTApiTestCase):
         cif = load_node(node_uuid)._prepare_cif()[0]
         self.assertEquals(rv.data, cif )
 
+    def test_io_tree(self):
+        """
+        Get the provenance tree of a structure, with a bound on the depth and
+        on the types of links
+        """
+        structure = self.get_dummy_data()["structuredata"][0]
+        calc = self.get_dummy_data()["calculations"][1]
+        url = self.get_url_prefix() + '/nodes/' + structure["uuid"] + '/io/tree'
+
+        with self.app.test_client() as client:
+            tree = json.loads(client.get(url + '?depth=2').data)["data"]
+            self.assertEqual(tree["root"], structure["id"])
+            levels = [node["level"] for node in tree["nodes"]]
+            self.assertEqual(levels, [0, 1, 2])
+            self.assertEqual(tree["nodes"][1]["nodeuuid"], calc["uuid"])
+            self.assertEqual(tree["adjacency"][str(calc["id"])],
+                             [[structure["id"], LinkType.INPUT.value, tree["adjacency"][str(calc["id"])][0][2]]])
+            kpoint = tree["nodes"][2]["id"]
+            self.assertEqual(tree["adjacency"][str(kpoint)][0][:2], [calc["id"], LinkType.CREATE.value])
+
+            tree = json.loads(client.get(url + '?depth=2&link_type="inputlink"').data)["data"]
+            self.assertEqual([node["id"] for node in tree["nodes"]], [structure["id"], calc["id"]])
+
+            tree = json.loads(client.get(url + '?depth=0').data)["data"]
+            self.assertEqual([node["id"] for node in tree["nodes"]], [structure["id"]])
+            self.assertEqual(tree["adjacency"], {})
+
+            for query_string in ['?depth=100', '?link_type="unknown"', '?name="a"']:
+                self.assertEqual(client.get(url + query_string).status_code, 400)
+
+        # The default and maximum depths are settings of the api
+        from aiida.restapi.common.exceptions import RestValidationError
+        from aiida.restapi.translator.node import NodeTranslator
+
+        translator = NodeTranslator(LIMIT_DEFAULT=400, DEFAULT_TREE_DEPTH=0, MAX_TREE_DEPTH=1)
+        tree = translator.get_io_tree(structure["uuid"])
+        self.assertEqual([node["id"] for node in tree["nodes"]], [structure["id"]])
+        with self.assertRaises(RestValidationError):
+            translator.get_io_tree(structure["uuid"], depth=2)
+
+    def test_translator_subclasses(self):
+        """
+        The subclasses of the translators are found once and reused
+        """
+        from aiida.restapi.translator.data import DataTranslator
+        from aiida.restapi.translator.data.structure import StructureDataTranslator
+        from aiida.restapi.translator.node import NodeTranslator
+
+        subclasses = NodeTranslator.get_subclasses()
+        self.assertIs(subclasses['StructureDataTranslator'], StructureDataTranslator)
+        self.assertIs(subclasses['DataTranslator'], DataTranslator)
+        self.assertIs(NodeTranslator.get_subclasses(), subclasses)
+
+        data_subclasses = DataTranslator.get_subclasses()
+        self.assertIn('StructureDataTranslator', data_subclasses)
+        self.assertNotIn('NodeTranslator', data_subclasses)
+        self.assertTrue(all(issubclass(subclass, DataTranslator) for subclass in data_subclasses.values()))
+        self.assertEqual(StructureDataTranslator.get_subclasses(),
+                         {'StructureDataTranslator': StructureDataTranslator})
+
+
+
+
+class RESTApiCacheTestCase(AiidaTestCase):
+    """
+    Tests of the cache of the responses of the RESTful-api
+    """
+    _url_prefix = "/api/v2"
+
+    def setUp(self):
+        self.clean_db()
+        self.insert_data()
+
+        self.app = App(__name__)
+        self.app.config['TESTING'] = True
+        self.api = AiidaApi(self.app, PREFIX=self._url_prefix, PERPAGE_DEFAULT=20, LIMIT_DEFAULT=400,
+                            CACHE_CONFIG={'CACHE_TYPE': 'lru'}, CACHING_TIMEOUTS={'computers': 60})
+
+    def test_cached_response(self):
+        """
+        A response is served from the cache, with an ETag, until the cache is cleared
+        """
+        url = self._url_prefix + '/computers/?limit=10&offset=0'
+        with self.app.test_client() as client:
+            rv = client.get(url)
+            self.assertEquals(rv.status_code, 200)
+            etag = rv.headers['ETag']
+            num_computers = len(json.loads(rv.data)['data']['computers'])
+
+            Computer(name='cached', hostname='cached.epfl.ch', transport_type='local',
+                     scheduler_type='direct').store()
+
+            # The same query string in a different order, and with the JQuery anti-caching field
+            rv = client.get(self._url_prefix + '/computers?offset=0&limit=10&_=12345')
+            self.assertEquals(rv.headers['ETag'], etag)
+            self.assertEquals(len(json.loads(rv.data)['data']['computers']), num_computers)
+
+            rv = client.get(url, headers={'If-None-Match': etag})
+            self.assertEquals(rv.status_code, 304)
+            self.assertEquals(rv.data, '')
+
+            self.api.cache.clear()
+            rv = client.get(url, headers={'If-None-Match': etag})
+            self.assertEquals(rv.status_code, 200)
+            self.assertNotEquals(rv.headers['ETag'], etag)
+            self.assertEquals(len(json.loads(rv.data)['data']['computers']), num_computers + 1)
+
+    def test_uncached_resource(self):
+        """
+        The responses of resources without a timeout are not cached
+        """
+        with self.app.test_client() as client:
+            rv = client.get(self._url_prefix + '/users/')
+            self.assertEquals(rv.status_code, 200)
+            self.assertNotIn('ETag', rv.headers)
+
+    def test_lru_backend(self):
+        """
+        The least recently used entries are evicted first
+        """
+        from aiida.restapi.common.cache import CachedResponse, LRUCacheBackend
+
+        backend = LRUCacheBackend(max_entries=2)
+        entries = [CachedResponse(200, [], str(i), str(i), 0) for i in range(3)]
+        backend.set('a', entries[0])
+        backend.set('b', entries[1])
+        backend.get('a')
+        backend.set('c', entries[2])
+        self.assertEquals(backend.get('a'), entries[0])
+        self.assertIsNone(backend.get('b'))
+        self.assertEquals(backend.get('c'), entries[2])
+
+    def test_unknown_cache_type(self):
+        """
+        The cache is disabled, rather than failing, for the cache types of former configurations
+        """
+        from aiida.restapi.common.cache import get_response_cache
 
+        self.assertIsNone(get_response_cache({'CACHE_TYPE': 'memcached'}, {'nodes': 10}))
+        api = AiidaApi(App(__name__), PREFIX=self._url_prefix, PERPAGE_DEFAULT=20, LIMIT_DEFAULT=400,
+                       CACHE_CONFIG={'CACHE_TYPE': 'memcached'}, CACHING_TIMEOUTS={'computers': 60})
+        self.assertIsNone(api.cache)
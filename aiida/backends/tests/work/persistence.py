@@ -61,4 +61,106 @@ class TestAiiDAPersister(AiidaTestCase):
         self.assertTrue(isinstance(process.calc.checkpoint, basestring))
 
         self.persister.delete_checkpoint(process.pid)
-        self.assertEquals(process.calc.checkpoint, None)
\ No newline at end of file
+        self.assertEquals(process.calc.checkpoint, None)
+    def test_checkpoint_codecs(self):
+        from aiida.work.persistence import get_checkpoint_codec
+
+        for name in ['yaml', 'pickle', 'pickle-zlib']:
+            persister = AiiDAPersister(codec=name)
+            self.assertEquals(persister.codec, get_checkpoint_codec(name))
+
+            process = DummyProcess()
+            bundle_saved = persister.save_checkpoint(process)
+            bundle_loaded = self.persister.load_checkpoint(process.calc.pk)
+            self.assertEquals(bundle_saved, bundle_loaded)
+
+    def test_load_yaml_checkpoint(self):
+        """
+        Checkpoints written in the original yaml format should still be loaded
+        """
+        import yaml
+        import plumpy
+
+        process = DummyProcess()
+        bundle = plumpy.Bundle(process)
+        process.calc._set_checkpoint(yaml.dump(bundle))
+
+        self.assertEquals(AiiDAPersister(codec='pickle-zlib').load_checkpoint(process.calc.pk), bundle)
+
+    def test_metrics(self):
+        persister = AiiDAPersister()
+        process = DummyProcess()
+        persister.save_checkpoint(process)
+        persister.save_checkpoint(process)
+
+        # The second checkpoint is written as a delta
+        metrics = persister.get_metrics()
+        self.assertEquals(metrics['checkpoints'], 2)
+        self.assertEquals(metrics['deltas'], 1)
+        self.assertEquals(metrics['last_size'], len(process.calc.checkpoint_delta))
+        self.assertEquals(metrics['total_size'], len(process.calc.checkpoint) + metrics['last_size'])
+        self.assertGreaterEqual(metrics['total_save_time'], metrics['last_save_time'])
+
+        persister.reset_metrics()
+        self.assertEquals(persister.get_metrics()['checkpoints'], 0)
+
+    def test_delta_checkpoint(self):
+        """
+        Following checkpoints should be written as deltas and loaded back to the complete bundle
+        """
+        process = DummyProcess()
+        self.persister.save_checkpoint(process)
+        self.assertIsNone(process.calc.checkpoint_delta)
+
+        bundle_saved = self.persister.save_checkpoint(process)
+        self.assertIsNotNone(process.calc.checkpoint_delta)
+        self.assertEquals(self.persister.load_checkpoint(process.calc.pk), bundle_saved)
+
+        # After loading, the next checkpoint should be a full one again
+        self.persister.save_checkpoint(process)
+        self.assertIsNone(process.calc.checkpoint_delta)
+
+        self.persister.delete_checkpoint(process.pid)
+        self.assertIsNone(process.calc.checkpoint)
+        self.assertIsNone(process.calc.checkpoint_delta)
+
+    def test_apply_checkpoint_delta(self):
+        import plumpy
+        from aiida.work.persistence import (_split_bundle, _get_chunk_digests, _get_checkpoint_digest,
+                                            encode_checkpoint_delta, apply_checkpoint_delta, PersistenceError)
+
+        base = plumpy.Bundle.__new__(plumpy.Bundle)
+        base.update({'a': 1, 'context': {'x': [1, 2], 'y': 'y'}, 'empty': {}, 'gone': True})
+        new = plumpy.Bundle.__new__(plumpy.Bundle)
+        new.update({'a': 1, 'context': {'x': [1, 2, 3], 'z': None}, 'empty': {'now': 'set'}, 'added': 2.5})
+
+        checkpoint = 'base checkpoint'
+        delta = encode_checkpoint_delta(
+            _split_bundle(new), _get_chunk_digests(_split_bundle(base)), _get_checkpoint_digest(checkpoint))
+        self.assertEquals(apply_checkpoint_delta(base, checkpoint, delta), new)
+
+        with self.assertRaises(PersistenceError):
+            apply_checkpoint_delta(base, 'other checkpoint', delta)
+
+    def test_coalesce_checkpoints(self):
+        import plumpy
+        from aiida.work.persistence import get_object_loader
+
+        persister = AiiDAPersister(coalesce_interval=60.)
+        process = DummyProcess()
+
+        self.assertIsNone(persister.save_checkpoint(process, coalesce=True))
+        self.assertIsNone(persister.save_checkpoint(process, coalesce=True))
+        self.assertEquals(persister.get_metrics()['checkpoints'], 0)
+        self.assertEquals(persister.get_metrics()['coalesced'], 1)
+
+        persister.flush()
+        self.assertEquals(persister.get_metrics()['checkpoints'], 1)
+        bundle = plumpy.Bundle(process, plumpy.LoadSaveContext(loader=get_object_loader()))
+        self.assertEquals(persister.load_checkpoint(process.calc.pk), bundle)
+
+        # A checkpoint that is not coalesced replaces the pending one
+        persister.save_checkpoint(process, coalesce=True)
+        persister.save_checkpoint(process)
+        persister.flush()
+        self.assertEquals(persister.get_metrics()['checkpoints'], 2)
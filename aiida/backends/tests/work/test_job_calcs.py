@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from aiida.backends.testbase import AiidaTestCase
+from aiida.scheduler.datastructures import JobInfo
+from aiida.work.job_calcs import JobManager
+
+
+class DummyTransportQueue(object):
+    """ A transport queue that only hands out the transport when explicitly told to """
+
+    def __init__(self):
+        self.callbacks = []
+        self.loop = None
+
+    def call_me_with_transport(self, authinfo, callback):
+        self.callbacks.append((authinfo, callback))
+
+    def open_transports(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for authinfo, callback in callbacks:
+            callback(authinfo, 'transport')
+
+
+class DummyScheduler(object):
+
+    def __init__(self, computer, can_query_by_user=False):
+        self._computer = computer
+        self._can_query_by_user = can_query_by_user
+
+    def set_transport(self, transport):
+        pass
+
+    def get_feature(self, feature_name):
+        return self._can_query_by_user
+
+    def getJobs(self, jobs=None, user=None, as_dict=False):
+        self._computer.queries.append({'jobs': jobs, 'user': user})
+        if self._computer.fail:
+            raise RuntimeError('scheduler is down')
+
+        jobdict = {}
+        for job_id in self._computer.running:
+            info = JobInfo()
+            info.job_id = job_id
+            jobdict[job_id] = info
+        return jobdict
+
+
+class DummyComputer(object):
+
+    def __init__(self, running, can_query_by_user=False):
+        self.running = running
+        self.queries = []
+        self.fail = False
+        self._can_query_by_user = can_query_by_user
+
+    def get_scheduler(self):
+        return DummyScheduler(self, self._can_query_by_user)
+
+
+class DummyTransport(object):
+
+    def get_safe_open_interval(self):
+        return 0.
+
+
+class DummyAuthInfo(object):
+
+    def __init__(self, id, computer):
+        self.id = id
+        self.computer = computer
+
+    def get_transport(self):
+        return DummyTransport()
+
+
+class TestJobManager(AiidaTestCase):
+
+    def setUp(self):
+        super(TestJobManager, self).setUp()
+        self.transport_queue = DummyTransportQueue()
+        self.job_manager = JobManager(self.transport_queue)
+        self.results = {}
+
+    def _request(self, authinfo, job_id):
+        def callback(authinfo, transport, job_info):
+            self.results[job_id] = job_info
+
+        def errback(exc_info):
+            self.results[job_id] = exc_info[1]
+
+        self.job_manager.request_job_info_update(authinfo, job_id, callback, errback)
+
+    def test_single_query_per_authinfo(self):
+        """ All requests for the same authinfo should be served by a single scheduler query """
+        computer_a = DummyComputer(running=['1', '2'])
+        computer_b = DummyComputer(running=['10'])
+        authinfo_a = DummyAuthInfo(1, computer_a)
+        authinfo_b = DummyAuthInfo(2, computer_b)
+
+        for job_id in ['1', '2', '3']:
+            self._request(authinfo_a, job_id)
+        self._request(authinfo_b, '10')
+
+        # Only one transport request per authinfo
+        self.assertEqual(len(self.transport_queue.callbacks), 2)
+        self.transport_queue.open_transports()
+
+        self.assertEqual(computer_a.queries, [{'jobs': ['1', '2', '3'], 'user': None}])
+        self.assertEqual(computer_b.queries, [{'jobs': ['10'], 'user': None}])
+        self.assertEqual(self.results['1'].job_id, '1')
+        self.assertEqual(self.results['2'].job_id, '2')
+        self.assertIsNone(self.results['3'])
+        self.assertEqual(self.results['10'].job_id, '10')
+
+        # A new request should schedule a new poll
+        self._request(authinfo_a, '1')
+        self.assertEqual(len(self.transport_queue.callbacks), 1)
+        self.transport_queue.open_transports()
+        self.assertEqual(len(computer_a.queries), 2)
+
+    def test_query_by_user(self):
+        """ Schedulers that can be queried by user should not be passed the job ids """
+        computer = DummyComputer(running=['1'], can_query_by_user=True)
+        authinfo = DummyAuthInfo(1, computer)
+
+        self._request(authinfo, '1')
+        self._request(authinfo, '2')
+        self.transport_queue.open_transports()
+
+        self.assertEqual(computer.queries, [{'jobs': None, 'user': '$USER'}])
+        self.assertEqual(self.results['1'].job_id, '1')
+        self.assertIsNone(self.results['2'])
+
+    def test_failed_query(self):
+        """ If the scheduler query fails, all the waiting requests should get the exception """
+        computer = DummyComputer(running=['1'])
+        computer.fail = True
+        authinfo = DummyAuthInfo(1, computer)
+
+        self._request(authinfo, '1')
+        self._request(authinfo, '2')
+        self.transport_queue.open_transports()
+
+        self.assertIsInstance(self.results['1'], RuntimeError)
+        self.assertIsInstance(self.results['2'], RuntimeError)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+import tornado.concurrent
+import tornado.ioloop
+
+from aiida.backends.testbase import AiidaTestCase
+from aiida.work.transports import TransportQueue
+
+
+class DummyTransport(object):
+    """ A transport that counts how many times it has been opened """
+
+    def __init__(self, authinfo):
+        self._authinfo = authinfo
+        self._enters = 0
+        self.alive = True
+
+    def __enter__(self):
+        if self._enters == 0:
+            self._authinfo.opened += 1
+        self._enters += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._enters -= 1
+        if self._enters == 0:
+            self._authinfo.closed += 1
+
+    def get_safe_open_interval(self):
+        return 0.
+
+    def is_alive(self):
+        return self.alive
+
+
+class DummyAuthInfo(object):
+
+    def __init__(self, id):
+        self.id = id
+        self.opened = 0
+        self.closed = 0
+
+    def get_transport(self):
+        return DummyTransport(self)
+
+
+class TestTransportQueue(AiidaTestCase):
+
+    def setUp(self):
+        super(TestTransportQueue, self).setUp()
+        self.loop = tornado.ioloop.IOLoop()
+
+    def tearDown(self):
+        self.loop.close()
+        super(TestTransportQueue, self).tearDown()
+
+    def _get_transport(self, queue, authinfo):
+        """ Run the loop until the queue passes us a transport and return it """
+        future = tornado.concurrent.Future()
+        queue.call_me_with_transport(authinfo, lambda authinfo, transport: future.set_result(transport))
+        return self.loop.run_sync(lambda: future)
+
+    def test_transport_reused(self):
+        """ The open transport should be kept and reused by following requests """
+        queue = TransportQueue(self.loop, idle_timeout=60, max_open=10)
+        authinfo = DummyAuthInfo(1)
+
+        first = self._get_transport(queue, authinfo)
+        second = self._get_transport(queue, authinfo)
+        self.assertIs(first, second)
+        self.assertEqual(authinfo.opened, 1)
+        self.assertEqual(authinfo.closed, 0)
+
+        queue.close()
+        self.assertEqual(authinfo.closed, 1)
+
+    def test_dead_transport_reopened(self):
+        """ A pooled transport that is no longer alive should be replaced by a new one """
+        queue = TransportQueue(self.loop, idle_timeout=60, max_open=10)
+        authinfo = DummyAuthInfo(1)
+
+        first = self._get_transport(queue, authinfo)
+        first.alive = False
+        second = self._get_transport(queue, authinfo)
+        self.assertIsNot(first, second)
+        self.assertEqual(authinfo.opened, 2)
+        self.assertEqual(authinfo.closed, 1)
+        queue.close()
+
+    def test_transport_requested_in_callback(self):
+        """ A transport of the same authinfo opened by a callback should replace the pooled one, not leak """
+        queue = TransportQueue(self.loop, idle_timeout=60, max_open=10)
+        authinfo = DummyAuthInfo(1)
+        future = tornado.concurrent.Future()
+
+        def request_again(authinfo, transport):
+            # The entry of the authinfo has been popped, so this opens a second transport
+            queue.call_me_with_transport(authinfo, lambda authinfo, transport: future.set_result(transport))
+
+        queue.call_me_with_transport(authinfo, request_again)
+        second = self.loop.run_sync(lambda: future)
+        self.assertEqual(authinfo.opened, 2)
+        self.assertEqual(authinfo.closed, 1)
+
+        self.assertIs(self._get_transport(queue, authinfo), second)
+        self.assertEqual(authinfo.opened, 2)
+
+        queue.close()
+        self.assertEqual(authinfo.closed, 2)
+
+    def test_max_open(self):
+        """ The least recently used transports should be closed when exceeding the maximum """
+        queue = TransportQueue(self.loop, idle_timeout=60, max_open=1)
+        authinfo_a = DummyAuthInfo(1)
+        authinfo_b = DummyAuthInfo(2)
+
+        self._get_transport(queue, authinfo_a)
+        self._get_transport(queue, authinfo_b)
+        self.assertEqual(authinfo_a.closed, 1)
+        self.assertEqual(authinfo_b.closed, 0)
+        queue.close()
+        self.assertEqual(authinfo_b.closed, 1)
+
+    def test_no_pooling(self):
+        """ With a zero idle timeout transports should be closed right after use """
+        queue = TransportQueue(self.loop, idle_timeout=0, max_open=10)
+        authinfo = DummyAuthInfo(1)
+
+        self._get_transport(queue, authinfo)
+        self._get_transport(queue, authinfo)
+        self.assertEqual(authinfo.opened, 2)
+        self.assertEqual(authinfo.closed, 2)
@@ -47,6 +47,22 @@ def QueryFactory():
     return QueryManager
 
 
+def get_querybuilder_impl():
+    """
+    Return the implementation of the QueryBuilder of the backend, which gives access to
+    the SQLAlchemy session and classes of the database for the queries that cannot be
+    expressed with the QueryBuilder.
+    """
+    if settings.BACKEND == BACKEND_SQLA:
+        from aiida.backends.sqlalchemy.querybuilder_sqla import QueryBuilderImplSQLA
+        return QueryBuilderImplSQLA()
+    elif settings.BACKEND == BACKEND_DJANGO:
+        from aiida.backends.djsite.querybuilder_django.querybuilder_django import QueryBuilderImplDjango
+        return QueryBuilderImplDjango()
+    else:
+        raise ConfigurationError('Invalid settings.BACKEND: {}'.format(settings.BACKEND))
+
+
 def is_dbenv_loaded():
     """
     Return True of the dbenv was already loaded (with a call to load_dbenv),
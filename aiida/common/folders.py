@@ -24,6 +24,24 @@ group_writable = True
 _valid_sections = ['node', 'workflow']
 
 
+def _unshare_file(abs_path):
+    """
+    Replace the file by a private, writable copy if it has other hard links, such that
+    writing to it does not modify the content seen by the other links.
+    """
+    if not os.path.isfile(abs_path) or os.stat(abs_path).st_nlink <= 1:
+        return
+
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(abs_path), prefix='.tmp')
+    os.close(handle)
+    try:
+        shutil.copyfile(abs_path, tmp_path)
+        os.rename(tmp_path, abs_path)
+    except (IOError, OSError):
+        os.remove(tmp_path)
+        raise
+
+
 class Folder(object):
     """
     A class to manage generic folders, avoiding to get out of
@@ -235,6 +253,10 @@ class Folder(object):
         # go beyond the folder limits
         dest_abs_path = self.get_abs_path(filename)
 
+        # The file may be shared with other folders through the object store
+        if os.path.isfile(dest_abs_path):
+            os.remove(dest_abs_path)
+
         with open(dest_abs_path, 'w') as f:
             shutil.copyfileobj(src_filelike, f)
 
@@ -291,8 +313,14 @@ class Folder(object):
         """
         Open a file in the current folder and return the corresponding
         file object.
+
+        If the file is opened for writing and it is a hard link shared with other
+        folders (e.g. through the object store), it is first replaced by a private copy.
         """
-        return open(self.get_abs_path(name), mode)
+        abs_path = self.get_abs_path(name)
+        if any(char in mode for char in 'wa+'):
+            _unshare_file(abs_path)
+        return open(abs_path, mode)
 
     @property
     def abspath(self):
@@ -528,6 +556,41 @@ class RepositoryFolder(Folder):
         """
         return RepositoryFolder(self.section, self.uuid)
 
+    def get_object_store(self):
+        """
+        Return the content-addressed object store in which the repository files are deduplicated.
+        """
+        from aiida.common.objectstore import ObjectStore
+        # Objects are shared between folders, so they are never writable
+        return ObjectStore(mode_file=self.mode_file & 0o444)
+
+    def deduplicate(self):
+        """
+        Move the files of this folder into the object store, replacing them with hard links
+        to the objects, such that identical files of different nodes are kept only once.
+
+        The folder keeps behaving as a normal folder, but its files become read-only.
+
+        :return: a tuple with the number of files and the number of bytes that were freed
+        """
+        if not self.exists():
+            return 0, 0
+        return self.get_object_store().add_folder(self.abspath)
+
+    def replace_with_folder(self, srcdir, move=False, overwrite=False):
+        """
+        Copies or moves the source folder to this folder, see :py:meth:`Folder.replace_with_folder`.
+
+        If the ``repository.deduplicate`` property is set, the files are then deduplicated
+        through the object store.
+        """
+        from aiida.common.setup import get_property
+
+        super(RepositoryFolder, self).replace_with_folder(srcdir, move=move, overwrite=overwrite)
+
+        if get_property('repository.deduplicate'):
+            self.deduplicate()
+
 
         # NOTE! The get_subfolder method will return a Folder object, and not a RepositoryFolder object
 
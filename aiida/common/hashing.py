@@ -8,6 +8,7 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 from passlib.context import CryptContext
+import os
 import random
 import hashlib
 import time
@@ -23,6 +24,7 @@ except ImportError: # Python2
 import numpy as np
 
 from .folders import Folder
+from .lru import LRUCache
 
 """
 Here we define a single password hashing instance for the full AiiDA.
@@ -41,6 +43,16 @@ UNUSABLE_PASSWORD_SUFFIX_LENGTH = 40
 
 HASHING_KEY="HashingKey"
 
+# Size of the chunks in which files are read when hashing folders
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+# Maximum number of file digests that are kept in the cache used when hashing folders
+FILE_DIGEST_CACHE_SIZE = 100000
+# Files modified less than this number of seconds ago are not cached, since a following
+# modification may not change their modification time
+_FILE_DIGEST_RACY_INTERVAL = 2.
+
+_file_digest_cache = LRUCache(FILE_DIGEST_CACHE_SIZE)
+
 pwd_context = CryptContext(
     # The list of hashes that we support
     schemes=["pbkdf2_sha256", "des_crypt"],
@@ -261,13 +273,44 @@ def _(object_to_hash, **kwargs):
 def _(object_to_hash, **kwargs):
     return make_hash_with_type('d', str(object_to_hash))
 
+def clear_file_digest_cache():
+    """
+    Empty the cache of file digests used when hashing folders
+    """
+    _file_digest_cache.clear()
+
+
+def _make_file_hash(abs_path):
+    """
+    Return the hash of a file in a folder, equal to ``make_hash_with_type('pf', content)``.
+
+    The file is read in chunks, so that memory usage does not depend on its size. The digest
+    is cached on the device and inode of the file, and reused as long as its size, modification
+    and change times are unchanged. Files that are hard links to the same inode, e.g. files that
+    were deduplicated through the object store, therefore share their cache entry.
+    """
+    stat = os.stat(abs_path)
+    cache_key = (stat.st_dev, stat.st_ino)
+    signature = (stat.st_size, stat.st_mtime, stat.st_ctime)
+
+    cached = _file_digest_cache.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    sha = hashlib.sha224('pf')
+    with open(abs_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(FILE_HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    if time.time() - stat.st_mtime > _FILE_DIGEST_RACY_INTERVAL:
+        _file_digest_cache.set(cache_key, (signature, digest))
+
+    return digest
+
+
 @make_hash.register(Folder)
 def _(folder, **kwargs):
-    # make sure file is closed after being read
-    def _read_file(folder, name):
-        with folder.open(name) as f:
-            return f.read()
-
     ignored_folder_content = kwargs.get('ignored_folder_content', [])
 
     return make_hash_with_type(
@@ -276,7 +319,7 @@ def _(folder, **kwargs):
             (
                 name,
                 folder.get_subfolder(name) if folder.isdir(name) else
-                make_hash_with_type('pf', _read_file(folder, name))
+                _make_file_hash(folder.get_abs_path(name))
             )
             for name in sorted(folder.get_content_list())
             if name not in ignored_folder_content
@@ -304,6 +347,148 @@ def _(object_to_hash, **kwargs):
             make_hash(object_to_hash.tobytes(), **kwargs)
         )
 
+
+# Prefix of the hashes computed by make_streaming_hash, such that they can never be
+# mistaken for hashes of the original make_hash, whose results are plain hexdigests
+STREAMING_HASH_PREFIX = 'v2:'
+
+
+def make_streaming_hash(object_to_hash, **kwargs):
+    """
+    Make a hash of the object, like :py:func:`make_hash`, but by feeding a type-tagged,
+    length-prefixed canonical byte representation of the whole object into a single
+    sha224 instance, instead of hashing every leaf and hashing again the joined
+    hexdigests at every level. This avoids most of the allocations and string
+    concatenations when hashing large nested dictionaries or lists.
+
+    The resulting hash is different from the one of :py:func:`make_hash`, and carries
+    the :py:data:`STREAMING_HASH_PREFIX` to identify the version of the algorithm.
+
+    :param object_to_hash: the object to hash
+    :returns: the versioned hash
+    """
+    hasher = hashlib.sha224()
+    _update_hash(object_to_hash, hasher, **kwargs)
+    return STREAMING_HASH_PREFIX + hasher.hexdigest()
+
+
+def get_hash_function(version=None):
+    """
+    Return the function used to hash nodes for the given version of the hashing algorithm.
+
+    :param version: 1 for :py:func:`make_hash`, 2 for :py:func:`make_streaming_hash`.
+        If None, the value of the ``hashing.version`` property is used.
+    """
+    if version is None:
+        from aiida.common.setup import get_property
+        version = get_property('hashing.version')
+
+    try:
+        return _HASH_FUNCTIONS[version]
+    except KeyError:
+        raise ValueError("Unknown hashing version {}, valid versions are: {}".format(
+            version, sorted(_HASH_FUNCTIONS.keys())))
+
+
+def _update_with_type(hasher, type_chr, payload):
+    """
+    Feed a value to the hasher, as the type character followed by the length of the payload and the payload
+    """
+    hasher.update(b'%s%d:%s' % (type_chr, len(payload), payload))
+
+
+@singledispatch
+def _update_hash(object_to_hash, hasher, **kwargs):
+    raise ValueError("Value of type {} cannot be hashed".format(
+        type(object_to_hash))
+    )
+
+@_update_hash.register(abc.Sequence)
+def _(sequence, hasher, **kwargs):
+    hasher.update(b'L%d:' % len(sequence))
+    for item in sequence:
+        _update_hash(item, hasher, **kwargs)
+
+@_update_hash.register(abc.Set)
+def _(object_to_hash, hasher, **kwargs):
+    hasher.update(b'S%d:' % len(object_to_hash))
+    for item in sorted(object_to_hash):
+        _update_hash(item, hasher, **kwargs)
+
+@_update_hash.register(abc.Mapping)
+def _(mapping, hasher, **kwargs):
+    hasher.update(b'D%d:' % len(mapping))
+    for key in sorted(mapping.keys()):
+        _update_hash(key, hasher, **kwargs)
+        _update_hash(mapping[key], hasher, **kwargs)
+
+@_update_hash.register(numbers.Real)
+def _(object_to_hash, hasher, **kwargs):
+    _update_with_type(hasher, b'f', truncate_float64(object_to_hash).tobytes())
+
+@_update_hash.register(numbers.Complex)
+def _(object_to_hash, hasher, **kwargs):
+    _update_with_type(
+        hasher, b'c',
+        truncate_float64(object_to_hash.real).tobytes() + truncate_float64(object_to_hash.imag).tobytes()
+    )
+
+@_update_hash.register(numbers.Integral)
+def _(object_to_hash, hasher, **kwargs):
+    _update_with_type(hasher, b'i', str(object_to_hash))
+
+@_update_hash.register(basestring)
+def _(object_to_hash, hasher, **kwargs):
+    # Strings and their unicode counterparts, as returned by the database, must hash the same
+    if isinstance(object_to_hash, unicode):
+        object_to_hash = object_to_hash.encode('utf-8')
+    _update_with_type(hasher, b's', object_to_hash)
+
+@_update_hash.register(bool)
+def _(object_to_hash, hasher, **kwargs):
+    _update_with_type(hasher, b'b', str(object_to_hash))
+
+@_update_hash.register(type(None))
+def _(object_to_hash, hasher, **kwargs):
+    hasher.update(b'n0:')
+
+@_update_hash.register(datetime)
+def _(object_to_hash, hasher, **kwargs):
+    _update_with_type(hasher, b'd', str(object_to_hash))
+
+@_update_hash.register(Folder)
+def _(folder, hasher, **kwargs):
+    ignored_folder_content = kwargs.get('ignored_folder_content', [])
+    names = [name for name in sorted(folder.get_content_list()) if name not in ignored_folder_content]
+
+    hasher.update(b'P%d:' % len(names))
+    for name in names:
+        _update_hash(name, hasher, **kwargs)
+        if folder.isdir(name):
+            _update_hash(folder.get_subfolder(name), hasher, **kwargs)
+        else:
+            _update_with_type(hasher, b'F', _make_file_hash(folder.get_abs_path(name)))
+
+@_update_hash.register(np.ndarray)
+def _(object_to_hash, hasher, **kwargs):
+    if object_to_hash.dtype == np.float64:
+        data = truncate_array64(object_to_hash).tobytes()
+    elif object_to_hash.dtype == np.complex128:
+        data = truncate_array64(object_to_hash.real).tobytes() + truncate_array64(object_to_hash.imag).tobytes()
+    else:
+        data = object_to_hash.tobytes()
+
+    # Unlike the original make_hash, the dtype and shape are part of the hash
+    _update_with_type(hasher, b'a', '{}{}'.format(object_to_hash.dtype.str, object_to_hash.shape))
+    _update_with_type(hasher, b'A', data)
+
+
+_HASH_FUNCTIONS = {
+    1: make_hash,
+    2: make_streaming_hash,
+}
+
+
 def truncate_float64(x, num_bits=4):
     mask = ~(2**num_bits - 1)
     int_repr = np.float64(x).view(np.int64)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+A bounded mapping that evicts the least recently used entries first.
+"""
+import threading
+from collections import OrderedDict
+
+__all__ = ['LRUCache']
+
+
+class LRUCache(object):
+    """
+    A thread-safe mapping bounded by the number of its entries and, optionally, by their
+    total size, which evicts the least recently used entries first. The entry that was
+    set last is never evicted, even if it exceeds the bounds on its own.
+    """
+
+    def __init__(self, max_entries, max_size=None, on_evict=None):
+        """
+        :param int max_entries: the maximum number of entries
+        :param int max_size: the maximum total size of the entries, None for no bound
+        :param on_evict: if given, a function called with the key and the value of each
+            entry that is evicted to respect the bounds
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._on_evict = on_evict
+        # key -> (value, size), from the least to the most recently used
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def size(self):
+        """
+        The total size of the entries
+        """
+        return self._size
+
+    def get(self, key, default=None):
+        """
+        Return the value of an entry and mark it as the most recently used one.
+
+        :param key: the key of the entry
+        :param default: the value returned if there is no entry with the key
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._entries[key] = entry
+            return entry[0]
+
+    def peek(self, key, default=None):
+        """
+        Return the value of an entry, without marking it as used.
+
+        :param key: the key of the entry
+        :param default: the value returned if there is no entry with the key
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            return default if entry is None else entry[0]
+
+    def set(self, key, value, size=0):
+        """
+        Set the entry of a key, as the most recently used one, and evict the least
+        recently used entries that exceed the bounds.
+
+        :param key: the key of the entry
+        :param value: the value of the entry
+        :param int size: the size of the entry, counted in the bound on the total size
+        """
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, size)
+            self._size += size
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries or
+                    (self.max_size is not None and self._size > self.max_size)):
+                evicted_key = next(iter(self._entries))
+                evicted_value = self._pop(evicted_key)
+                if self._on_evict is not None:
+                    self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key, default=None):
+        """
+        Remove an entry and return its value.
+
+        :param key: the key of the entry
+        :param default: the value returned if there is no entry with the key
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._pop(key)
+
+    def clear(self):
+        """
+        Remove all the entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._size -= entry[1]
+        return entry[0]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+A content-addressed store for the files of the repository.
+
+Every object is a file whose name is the SHA-256 hexdigest of its content, sharded
+on the first two characters of the key. The files in the node folders are hard links
+to these objects, so identical files occupy the disk (and an inode) only once while
+all the code that accesses the repository through absolute paths keeps working.
+The number of references to an object is therefore its link count minus one, and
+objects that are no longer referenced by any folder can be garbage collected.
+"""
+import hashlib
+import os
+import tempfile
+
+__all__ = ['ObjectStore']
+
+# Size of the chunks in which files are read when computing their key
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ObjectStore(object):
+    """
+    A store of immutable objects, addressed by the hash of their content.
+    """
+
+    def __init__(self, basepath=None, mode_file=0o440):
+        """
+        :param basepath: the absolute path of the store, if None the `objects` folder
+            of the repository is used
+        :param mode_file: the mode of the object files. Objects are shared between folders,
+            so they should not be writable.
+        """
+        if basepath is None:
+            from aiida.common.utils import get_repository_folder
+            basepath = get_repository_folder('objects')
+
+        self._basepath = os.path.abspath(basepath)
+        self._mode_file = mode_file
+
+    @property
+    def basepath(self):
+        """
+        The absolute path of the store.
+        """
+        return self._basepath
+
+    @staticmethod
+    def compute_key(filepath):
+        """
+        Return the key of the object that has the same content as the given file.
+
+        :param filepath: the absolute path of the file
+        """
+        sha = hashlib.sha256()
+        with open(filepath, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def get_object_path(self, key):
+        """
+        Return the absolute path of the object with the given key.
+        """
+        return os.path.join(self._basepath, key[:2], key[2:])
+
+    def has_object(self, key):
+        """
+        Return True if the store contains the object with the given key.
+        """
+        return os.path.isfile(self.get_object_path(key))
+
+    def get_reference_count(self, key):
+        """
+        Return the number of repository files that are a hard link to the object.
+        """
+        return os.stat(self.get_object_path(key)).st_nlink - 1
+
+    def iter_keys(self):
+        """
+        Iterate over the keys of all the objects in the store.
+        """
+        if not os.path.isdir(self._basepath):
+            return
+
+        for shard in sorted(os.listdir(self._basepath)):
+            shard_path = os.path.join(self._basepath, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for name in sorted(os.listdir(shard_path)):
+                if not name.startswith('.'):
+                    yield shard + name
+
+    def add_file(self, filepath):
+        """
+        Add the file to the store and replace it with a hard link to the stored object.
+
+        If the store does not contain an object with the same content yet, the file itself
+        becomes the object, so no data is copied.
+
+        :param filepath: the absolute path of the file, which should not be a symlink
+        :return: a tuple with the key of the object and the number of bytes that were freed
+        """
+        key = self.compute_key(filepath)
+        object_path = self.get_object_path(key)
+        file_stat = os.stat(filepath)
+
+        if os.path.isfile(object_path):
+            object_stat = os.stat(object_path)
+            if (object_stat.st_dev, object_stat.st_ino) == (file_stat.st_dev, file_stat.st_ino):
+                return key, 0
+
+            self._link(object_path, filepath)
+            # The space is only freed if this was the last link to the original file
+            return key, file_stat.st_size if file_stat.st_nlink == 1 else 0
+
+        os.chmod(filepath, self._mode_file)
+        self._link(filepath, object_path)
+        return key, 0
+
+    def add_folder(self, abspath):
+        """
+        Add all the files in the folder, recursively, to the store. Symlinks are left untouched.
+
+        :param abspath: the absolute path of the folder
+        :return: a tuple with the number of files and the number of bytes that were freed
+        """
+        num_files = 0
+        freed = 0
+        for dirpath, _, filenames in os.walk(abspath, followlinks=False):
+            for filename in filenames:
+                filepath = os.path.join(dirpath, filename)
+                if os.path.islink(filepath) or not os.path.isfile(filepath):
+                    continue
+                _, saved = self.add_file(filepath)
+                num_files += 1
+                freed += saved
+
+        return num_files, freed
+
+    def garbage_collect(self):
+        """
+        Remove the objects that are no longer referenced by any file in the repository.
+
+        :return: a tuple with the number of objects that were removed and their total size in bytes
+        """
+        num_removed = 0
+        freed = 0
+        for key in list(self.iter_keys()):
+            object_path = self.get_object_path(key)
+            object_stat = os.stat(object_path)
+            if object_stat.st_nlink == 1:
+                os.remove(object_path)
+                num_removed += 1
+                freed += object_stat.st_size
+
+        return num_removed, freed
+
+    def get_statistics(self):
+        """
+        Return a dictionary with the number of objects, the number of references to them, the
+        size of the objects on disk and the size the referencing files would take without deduplication.
+        """
+        statistics = {'objects': 0, 'references': 0, 'size': 0, 'referenced_size': 0}
+        for key in self.iter_keys():
+            object_stat = os.stat(self.get_object_path(key))
+            references = object_stat.st_nlink - 1
+            statistics['objects'] += 1
+            statistics['references'] += references
+            statistics['size'] += object_stat.st_size
+            statistics['referenced_size'] += object_stat.st_size * references
+
+        return statistics
+
+    @staticmethod
+    def _link(source, dest):
+        """
+        Atomically make dest a hard link to source, replacing dest if it exists.
+        """
+        dirname = os.path.dirname(dest)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # Possibly created concurrently by another process
+                if not os.path.isdir(dirname):
+                    raise
+
+        # Create the link under a temporary name first, such that dest is never missing
+        handle, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.tmp')
+        os.close(handle)
+        os.remove(tmp_path)
+        try:
+            os.link(source, tmp_path)
+            os.rename(tmp_path, dest)
+        except OSError:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -61,6 +61,22 @@ TEST_KEYWORD = 'test_'
 # Default timeout in seconds for circus client calls
 DEFAULT_DAEMON_TIMEOUT = 20
 
+# Default time in seconds after which an unused transport opened by the daemon is closed,
+# and maximum number of transports a daemon worker keeps open at the same time
+DEFAULT_TRANSPORT_IDLE_TIMEOUT = 300
+DEFAULT_TRANSPORT_MAX_OPEN = 20
+
+# Whether the files of stored nodes are deduplicated through the content-addressed object store
+DEFAULT_REPOSITORY_DEDUPLICATE = False
+
+# Version of the algorithm used to compute the hash of nodes, see aiida.common.hashing.get_hash_function
+DEFAULT_HASHING_VERSION = 1
+
+# Codec used to encode the checkpoints of processes, see aiida.work.persistence
+DEFAULT_CHECKPOINT_CODEC = 'pickle-zlib'
+# Time in milliseconds during which the checkpoints of consecutive running states of a process are coalesced
+DEFAULT_CHECKPOINT_COALESCE_INTERVAL = 0
+
 
 def get_aiida_dir():
     return os.path.expanduser(AIIDA_CONFIG_FOLDER)
@@ -776,6 +792,51 @@ _property_table = {
         "The timeout in seconds for calls to the circus client",
         DEFAULT_DAEMON_TIMEOUT,
         None),
+    "transport.idle_timeout": (
+        "transport_idle_timeout",
+        "int",
+        "The time in seconds after which a transport that is kept open by the daemon "
+        "is closed if it has not been used; set to 0 to close transports right after use",
+        DEFAULT_TRANSPORT_IDLE_TIMEOUT,
+        None),
+    "transport.max_open": (
+        "transport_max_open",
+        "int",
+        "The maximum number of transports that a daemon worker keeps open at the same "
+        "time; the least recently used ones are closed first",
+        DEFAULT_TRANSPORT_MAX_OPEN,
+        None),
+    "repository.deduplicate": (
+        "repository_deduplicate",
+        "bool",
+        "Boolean whether the files of stored nodes are replaced by hard links to a "
+        "content-addressed object store, such that identical files are kept only once on disk",
+        DEFAULT_REPOSITORY_DEDUPLICATE,
+        None),
+    "hashing.version": (
+        "hashing_version",
+        "int",
+        "The version of the algorithm used to compute the hash of nodes: 1 for the original "
+        "algorithm, 2 for the faster streaming one. Hashes of different versions never match, "
+        "so existing nodes have to be rehashed to be found as cache for new ones",
+        DEFAULT_HASHING_VERSION,
+        [1, 2]),
+    "checkpoint.codec": (
+        "checkpoint_codec",
+        "string",
+        "The codec used to encode the checkpoints of processes: 'yaml' for the original human "
+        "readable format, 'pickle' or 'pickle-zlib' for the faster and more compact binary formats. "
+        "Checkpoints are always loaded with the codec they were saved with",
+        DEFAULT_CHECKPOINT_CODEC,
+        ['yaml', 'pickle', 'pickle-zlib']),
+    "checkpoint.coalesce_interval": (
+        "checkpoint_coalesce_interval",
+        "int",
+        "The time in milliseconds during which the checkpoints of consecutive running states of a "
+        "process are held back and written as a single one. A process that is lost in the meantime "
+        "restarts from the previous checkpoint; set to 0 to write every checkpoint straight away",
+        DEFAULT_CHECKPOINT_COALESCE_INTERVAL,
+        None),
     "verdishell.modules": (
         "modules_for_verdi_shell",
         "string",
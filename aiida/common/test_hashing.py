@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class FolderHashTest(unittest.TestCase):
+    """
+    Tests for the hashing of folders with make_hash.
+    """
+
+    def setUp(self):
+        from aiida.common.hashing import clear_file_digest_cache
+
+        clear_file_digest_cache()
+        self.tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmpdir, 'sub'))
+        self._write('file.txt', 'content')
+        self._write(os.path.join('sub', 'other.txt'), 'other content')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, relpath, content, age=10):
+        path = os.path.join(self.tmpdir, relpath)
+        with open(path, 'w') as handle:
+            handle.write(content)
+        # Make the file old enough to be cached
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+    def test_hash_value(self):
+        """
+        The hash of a folder should be independent of the way files are read.
+        """
+        from aiida.common.folders import Folder
+        from aiida.common.hashing import make_hash, make_hash_with_type
+
+        folder = Folder(self.tmpdir)
+        subfolder = Folder(os.path.join(self.tmpdir, 'sub'))
+        self.assertEquals(
+            make_hash(subfolder),
+            make_hash_with_type('pd', make_hash([('other.txt', make_hash_with_type('pf', 'other content'))])))
+
+        expected = make_hash_with_type('pd', make_hash([
+            ('file.txt', make_hash_with_type('pf', 'content')),
+            ('sub', subfolder),
+        ]))
+        self.assertEquals(make_hash(folder), expected)
+        # Second time, from the cache
+        self.assertEquals(make_hash(folder), expected)
+
+    def test_cache_invalidation(self):
+        """
+        Modifying a file should change the hash of the folder.
+        """
+        from aiida.common.folders import Folder
+        from aiida.common.hashing import make_hash
+
+        folder = Folder(self.tmpdir)
+        before = make_hash(folder)
+
+        self._write('file.txt', 'changed', age=20)
+        after = make_hash(folder)
+        self.assertNotEquals(before, after)
+
+        self._write('file.txt', 'content', age=30)
+        self.assertEquals(make_hash(folder), before)
+
+
+class StreamingHashTest(unittest.TestCase):
+    """
+    Tests for make_streaming_hash.
+    """
+
+    def test_versioned(self):
+        from aiida.common.hashing import make_hash, make_streaming_hash, get_hash_function, STREAMING_HASH_PREFIX
+
+        value = {'a': [1, 2.5, 'b']}
+        self.assertTrue(make_streaming_hash(value).startswith(STREAMING_HASH_PREFIX))
+        self.assertNotEquals(make_streaming_hash(value), make_hash(value))
+        self.assertIs(get_hash_function(1), make_hash)
+        self.assertIs(get_hash_function(2), make_streaming_hash)
+        with self.assertRaises(ValueError):
+            get_hash_function(3)
+
+    def test_equal_values(self):
+        """
+        Values that are equal should have the same hash, independently of ordering and string type.
+        """
+        from aiida.common.hashing import make_streaming_hash
+
+        first = {'3': 4, 3: 4, 'a': {'1': 'hello', 2: 'goodbye', 1: 'here'}, 'c': set([2, '5', 'a', 5])}
+        second = {'c': set([5, 'a', '5', 2]), 'a': {2: 'goodbye', 1: 'here', '1': 'hello'}, 3: 4, '3': 4}
+        self.assertEquals(make_streaming_hash(first), make_streaming_hash(second))
+        self.assertEquals(make_streaming_hash({'key': 'value'}), make_streaming_hash({u'key': u'value'}))
+        self.assertEquals(make_streaming_hash([1, 2]), make_streaming_hash((1, 2)))
+
+    def test_different_values(self):
+        """
+        Values of different types or structure should have different hashes.
+        """
+        import numpy as np
+        from aiida.common.hashing import make_streaming_hash
+
+        values = [
+            1, 1.5, '1', True, None, [], {}, ['ab'], ['a', 'b'], [['a'], 'b'], {'a': 'b'}, {'ab': ''},
+            np.zeros(4), np.zeros((2, 2)), np.zeros(4, dtype=np.int64)
+        ]
+        hashes = set(make_streaming_hash(value) for value in values)
+        self.assertEquals(len(hashes), len(values))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+import unittest
+
+from aiida.common.lru import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    """
+    Tests for the bounded LRU mapping.
+    """
+
+    def test_max_entries(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b', 'missing'), 'missing')
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_peek(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # Peeking does not mark the entry as used
+        self.assertEqual(cache.peek('a'), 1)
+        cache.set('c', 3)
+        self.assertNotIn('a', cache)
+
+    def test_max_size(self):
+        evicted = []
+        cache = LRUCache(10, max_size=10, on_evict=lambda key, value: evicted.append((key, value)))
+        cache.set('a', 1, size=4)
+        cache.set('b', 2, size=4)
+        cache.set('a', 3, size=5)
+        self.assertEqual(cache.size, 9)
+        self.assertEqual(evicted, [])
+
+        cache.set('c', 4, size=3)
+        self.assertEqual(evicted, [('b', 2)])
+        self.assertEqual(cache.size, 8)
+
+        # The last entry is kept even if it exceeds the bound on its own
+        cache.set('d', 5, size=20)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('d'), 5)
+        self.assertEqual(evicted, [('b', 2), ('a', 3), ('c', 4)])
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(10, max_size=100)
+        cache.set('a', 1, size=10)
+        cache.set('b', 2, size=20)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        self.assertEqual(cache.size, 20)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
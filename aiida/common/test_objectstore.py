@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class ObjectStoreTest(unittest.TestCase):
+    """
+    Tests for the ObjectStore class.
+    """
+
+    def setUp(self):
+        from aiida.common.objectstore import ObjectStore
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ObjectStore(os.path.join(self.tmpdir, 'objects'))
+
+        for folder in ['first', 'second']:
+            os.makedirs(os.path.join(self.tmpdir, folder, 'sub'))
+            with open(os.path.join(self.tmpdir, folder, 'pseudo.upf'), 'w') as handle:
+                handle.write('pseudopotential')
+            with open(os.path.join(self.tmpdir, folder, 'sub', 'output'), 'w') as handle:
+                handle.write('output of {}'.format(folder))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_deduplication(self):
+        """
+        Identical files of different folders should become links to the same object.
+        """
+        first = os.path.join(self.tmpdir, 'first')
+        second = os.path.join(self.tmpdir, 'second')
+
+        self.assertEquals(self.store.add_folder(first), (2, 0))
+        self.assertEquals(self.store.add_folder(second), (2, len('pseudopotential')))
+
+        first_stat = os.stat(os.path.join(first, 'pseudo.upf'))
+        second_stat = os.stat(os.path.join(second, 'pseudo.upf'))
+        self.assertEquals(first_stat.st_ino, second_stat.st_ino)
+        self.assertNotEquals(
+            os.stat(os.path.join(first, 'sub', 'output')).st_ino,
+            os.stat(os.path.join(second, 'sub', 'output')).st_ino)
+
+        key = self.store.compute_key(os.path.join(first, 'pseudo.upf'))
+        self.assertTrue(self.store.has_object(key))
+        self.assertEquals(self.store.get_reference_count(key), 2)
+        self.assertEquals(len(list(self.store.iter_keys())), 3)
+
+        with open(os.path.join(second, 'pseudo.upf')) as handle:
+            self.assertEquals(handle.read(), 'pseudopotential')
+
+        # Adding a folder twice should not change anything
+        self.assertEquals(self.store.add_folder(second), (2, 0))
+        self.assertEquals(self.store.get_reference_count(key), 2)
+
+    def test_garbage_collect(self):
+        """
+        Objects should only be removed once no folder references them anymore.
+        """
+        first = os.path.join(self.tmpdir, 'first')
+        second = os.path.join(self.tmpdir, 'second')
+        self.store.add_folder(first)
+        self.store.add_folder(second)
+
+        shutil.rmtree(first)
+        self.assertEquals(self.store.garbage_collect(), (1, len('output of first')))
+
+        statistics = self.store.get_statistics()
+        self.assertEquals(statistics['objects'], 2)
+        self.assertEquals(statistics['references'], 2)
+
+        shutil.rmtree(second)
+        self.assertEquals(self.store.garbage_collect()[0], 2)
+        self.assertEquals(list(self.store.iter_keys()), [])
+
+    def test_write_shared_file(self):
+        """
+        Writing to a deduplicated file through a Folder should not modify the other links.
+        """
+        from aiida.common.folders import Folder
+
+        first = os.path.join(self.tmpdir, 'first')
+        second = os.path.join(self.tmpdir, 'second')
+        self.store.add_folder(first)
+        self.store.add_folder(second)
+        os.chmod(os.path.join(second, 'pseudo.upf'), 0o660)
+
+        with Folder(second).open('pseudo.upf', 'w') as handle:
+            handle.write('modified')
+
+        with open(os.path.join(first, 'pseudo.upf')) as handle:
+            self.assertEquals(handle.read(), 'pseudopotential')
+        with open(os.path.join(second, 'pseudo.upf')) as handle:
+            self.assertEquals(handle.read(), 'modified')
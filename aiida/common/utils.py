@@ -129,6 +129,9 @@ def get_repository_folder(subfolder=None):
         elif subfolder == "repository":
             retval = os.path.abspath(
                 os.path.join(REPOSITORY_PATH, 'repository'))
+        elif subfolder == "objects":
+            retval = os.path.abspath(
+                os.path.join(REPOSITORY_PATH, 'objects'))
         else:
             raise ValueError("Invalid 'subfolder' passed to "
                              "get_repository_folder: {}".format(subfolder))
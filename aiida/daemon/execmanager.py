@@ -218,13 +218,6 @@ def submit_calc(calc, authinfo, transport=None):
                         t.put(code.get_abs_path(f), f)
                     t.chmod(code.get_local_executable(), 0o755)  # rwxr-xr-x
 
-            # copy all files, recursively with folders
-            for f in folder.get_content_list():
-                execlogger.debug("[submission of calc {}] "
-                                 "copying file/folder {}...".format(calc.pk, f),
-                                 extra=logger_extra)
-                t.put(folder.get_abs_path(f), f)
-
             # local_copy_list is a list of tuples,
             # each with (src_abs_path, dest_rel_path)
             # NOTE: validation of these lists are done
@@ -233,13 +226,12 @@ def submit_calc(calc, authinfo, transport=None):
             remote_copy_list = calcinfo.remote_copy_list
             remote_symlink_list = calcinfo.remote_symlink_list
 
+            # copy all files, recursively with folders, followed by the local copy list
+            upload_list = [(folder.get_abs_path(f), f) for f in folder.get_content_list()]
             if local_copy_list is not None:
-                for src_abs_path, dest_rel_path in local_copy_list:
-                    execlogger.debug("[submission of calc {}] "
-                                     "copying local file/folder to {}".format(
-                        calc.pk, dest_rel_path),
-                        extra=logger_extra)
-                    t.put(src_abs_path, dest_rel_path)
+                upload_list.extend(local_copy_list)
+
+            upload_files(calc, t, upload_list, logger_extra=logger_extra)
 
             if remote_copy_list is not None:
                 for (remote_computer_uuid, remote_abs_path,
@@ -322,6 +314,43 @@ def submit_calc(calc, authinfo, transport=None):
             t.close()
 
 
+def upload_files(calc, transport, upload_list, logger_extra=None):
+    """
+    Upload the given files and folders to the current working directory of the transport.
+
+    All the entries are sent at once as a single tar stream that is unpacked on the remote.
+    If that fails, for example because the remote has no tar, the entries are uploaded one by one.
+
+    :param calc: the calculation for which the files are uploaded
+    :param transport: an already opened transport
+    :param upload_list: a list of tuples (src_abs_path, dest_rel_path)
+    :param logger_extra: the extras to pass to the logger
+    """
+    import time
+
+    if not upload_list:
+        return
+
+    start = time.time()
+    try:
+        num_files, size = transport.put_bundle(upload_list)
+    except (IOError, NotImplementedError) as exception:
+        execlogger.warning("[submission of calc {}] "
+                           "bundled upload failed, copying files one by one: {}".format(calc.pk, exception),
+                           extra=logger_extra)
+        for src_abs_path, dest_rel_path in upload_list:
+            execlogger.debug("[submission of calc {}] "
+                             "copying file/folder {}...".format(calc.pk, dest_rel_path),
+                             extra=logger_extra)
+            transport.put(src_abs_path, dest_rel_path)
+    else:
+        elapsed = time.time() - start
+        execlogger.debug("[submission of calc {}] "
+                         "uploaded {} files ({:.1f} kB) in {:.2f} s ({:.1f} kB/s)".format(
+                             calc.pk, num_files, size / 1024., elapsed, size / 1024. / max(elapsed, 1e-6)),
+                         extra=logger_extra)
+
+
 def retrieve_all(job, transport, retrieved_temporary_folder, logger_extra=None):
     try:
         job._set_state(calc_states.RETRIEVING)
@@ -483,10 +512,18 @@ def retrieve_files_from_list(calculation, transport, folder, retrieve_list):
     treated as the work directory of the folder and the depth integer determines
     upto what level of the original remotepath nesting the files will be copied.
 
+    All the files are first retrieved at once with a single remote tar command, see
+    :py:meth:`aiida.transport.transport.Transport.get_bundle`. If that fails, for example
+    because the remote has no GNU tar, they are retrieved one by one.
+
     :param transport: the Transport instance
     :param folder: an absolute path to a folder to copy files in
     :param retrieve_list: the list of files to retrieve
     """
+    import shutil
+    import time
+
+    to_retrieve = []
     for item in retrieve_list:
         if isinstance(item, list):
             tmp_rname, tmp_lname, depth = item
@@ -499,7 +536,7 @@ def retrieve_files_from_list(calculation, transport, folder, retrieve_list):
                     local_names.append(os.path.sep.join([tmp_lname] + to_append))
             else:
                 remote_names = [tmp_rname]
-                to_append = remote_names.split(os.path.sep)[-depth:] if depth > 0 else []
+                to_append = tmp_rname.split(os.path.sep)[-depth:] if depth > 0 else []
                 local_names = [os.path.sep.join([tmp_lname] + to_append)]
             if depth > 1:  # create directories in the folder, if needed
                 for this_local_file in local_names:
@@ -517,5 +554,26 @@ def retrieve_files_from_list(calculation, transport, folder, retrieve_list):
                 local_names = [os.path.split(item)[1]]
 
         for rem, loc in zip(remote_names, local_names):
+            to_retrieve.append((rem, os.path.join(folder, loc)))
+
+    if not to_retrieve:
+        return
+
+    start = time.time()
+    try:
+        num_files, size = transport.get_bundle(to_retrieve)
+    except (IOError, NotImplementedError) as exception:
+        transport.logger.warning("[retrieval of calc {}] bundled retrieval failed, retrieving files one by one: "
+                                 "{}".format(calculation.pk, exception))
+        for rem, loc in to_retrieve:
+            # Remove what may have been partially retrieved, since `get` nests folders in existing ones
+            if os.path.isdir(loc):
+                shutil.rmtree(loc)
+            elif os.path.exists(loc):
+                os.remove(loc)
             transport.logger.debug("[retrieval of calc {}] Trying to retrieve remote item '{}'".format(calculation.pk, rem))
-            transport.get(rem, os.path.join(folder, loc), ignore_nonexisting=True)
+            transport.get(rem, loc, ignore_nonexisting=True)
+    else:
+        elapsed = time.time() - start
+        transport.logger.debug("[retrieval of calc {}] retrieved {} files ({:.1f} kB) in {:.2f} s ({:.1f} kB/s)".format(
+            calculation.pk, num_files, size / 1024., elapsed, size / 1024. / max(elapsed, 1e-6)))
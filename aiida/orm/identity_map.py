@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+An optional identity map of the nodes loaded from the database.
+
+Within a ``with node_identity_map():`` block, :py:func:`~aiida.orm.utils.load_node` and
+``Node.get_subclass_from_pk``/``Node.get_subclass_from_uuid`` return the same node instance
+for the same pk, without querying the database again. The map is bounded both in the number
+of nodes and in their (estimated) memory, evicting the least recently used nodes first::
+
+    from aiida.orm.identity_map import node_identity_map
+
+    with node_identity_map(max_nodes=10000) as identity_map:
+        for pk in pks:
+            node = load_node(pk)
+            ...
+        print identity_map.hits, identity_map.misses
+
+Each thread has its own stack of maps, and only the innermost one is used.
+"""
+import sys
+import threading
+from contextlib import contextmanager
+from uuid import UUID
+
+from aiida.common.lru import LRUCache
+
+__all__ = ['NodeIdentityMap', 'node_identity_map', 'get_node_identity_map', 'invalidate_node']
+
+# Default maximum number of nodes in an identity map
+IDENTITY_MAP_MAX_NODES = 10000
+# Default maximum estimated memory of the nodes in an identity map, in bytes
+IDENTITY_MAP_MAX_MEMORY = 256 * 1024 * 1024
+# Rough size of a node with its backend model, without the attributes
+_NODE_BASE_SIZE = 4096
+
+_local = threading.local()
+
+
+class NodeIdentityMap(object):
+    """
+    A map from pk to node instance, with LRU eviction bounded by the number of nodes and
+    their estimated memory, and with counters of the hits and misses of the lookups.
+    """
+
+    def __init__(self, max_nodes=IDENTITY_MAP_MAX_NODES, max_memory=IDENTITY_MAP_MAX_MEMORY):
+        """
+        :param int max_nodes: the maximum number of nodes kept in the map
+        :param int max_memory: the maximum estimated memory of the nodes kept in the map, in bytes
+        """
+        if max_nodes < 1 or max_memory < 1:
+            raise ValueError("The maximum number of nodes and memory must be positive")
+
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+
+        # pk -> node, with the estimated size of the nodes
+        self._nodes = LRUCache(max_nodes, max_size=max_memory,
+                               on_evict=lambda pk, node: self._pks_by_uuid.pop(node.uuid, None))
+        self._pks_by_uuid = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, pk):
+        return pk in self._nodes
+
+    @property
+    def memory(self):
+        """
+        The estimated memory of the nodes in the map, in bytes
+        """
+        return self._nodes.size
+
+    def get(self, pk=None, uuid=None):
+        """
+        Return the node with the given pk or full UUID, and count the hit or miss.
+
+        :param pk: the pk of the node
+        :param uuid: the full UUID of the node, with or without dashes, used if no pk is given
+        :return: the node, or None if it is not in the map
+        """
+        if pk is None:
+            try:
+                uuid = unicode(UUID(uuid))
+            except (TypeError, ValueError):
+                uuid = None
+
+        with self._lock:
+            if pk is None:
+                pk = self._pks_by_uuid.get(uuid)
+            node = self._nodes.get(pk)
+            if node is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return node
+
+    def add(self, node):
+        """
+        Add a stored node to the map, or mark it as the most recently used one. An
+        existing entry for the same pk with a different instance is replaced.
+
+        :param node: a stored node
+        :return: the node
+        """
+        if not node.is_stored:
+            raise ValueError("Only stored nodes can be added to the identity map")
+
+        size = _get_node_size(node)
+        with self._lock:
+            self._discard(node.pk)
+            self._pks_by_uuid[node.uuid] = node.pk
+            self._nodes.set(node.pk, node, size=size)
+        return node
+
+    def invalidate(self, node):
+        """
+        Remove the entry of the pk of the node, unless it is the node itself, whose
+        state reflects the changes that it made.
+
+        :param node: a node
+        """
+        with self._lock:
+            mapped_node = self._nodes.peek(node.pk)
+            if mapped_node is not None and mapped_node is not node:
+                self._discard(node.pk)
+
+    def discard(self, pk):
+        """
+        Remove the node with the given pk from the map, if present.
+
+        :param pk: the pk of the node
+        """
+        with self._lock:
+            self._discard(pk)
+
+    def clear(self):
+        """
+        Remove all the nodes from the map. The counters are not reset.
+        """
+        with self._lock:
+            self._nodes.clear()
+            self._pks_by_uuid.clear()
+
+    def _discard(self, pk):
+        node = self._nodes.pop(pk)
+        if node is not None:
+            self._pks_by_uuid.pop(node.uuid, None)
+
+
+def _get_stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+@contextmanager
+def node_identity_map(max_nodes=IDENTITY_MAP_MAX_NODES, max_memory=IDENTITY_MAP_MAX_MEMORY):
+    """
+    Context manager to use a new identity map of nodes in the current thread.
+
+    :param int max_nodes: the maximum number of nodes kept in the map
+    :param int max_memory: the maximum estimated memory of the nodes kept in the map, in bytes
+    :return: the :py:class:`NodeIdentityMap`
+    """
+    identity_map = NodeIdentityMap(max_nodes=max_nodes, max_memory=max_memory)
+    stack = _get_stack()
+    stack.append(identity_map)
+    try:
+        yield identity_map
+    finally:
+        stack.remove(identity_map)
+
+
+def get_node_identity_map():
+    """
+    Return the identity map in use in the current thread, or None if there is none.
+    """
+    stack = _get_stack()
+    return stack[-1] if stack else None
+
+
+def invalidate_node(node):
+    """
+    Remove the other instances of a node that was modified from the identity maps of
+    the current thread. Called by the nodes when they modify their data in the DB.
+
+    :param node: the modified node
+    """
+    if node.is_stored:
+        for identity_map in _get_stack():
+            identity_map.invalidate(node)
+
+
+def _get_node_size(node):
+    """
+    Estimate the memory of a node, including its loaded attributes and extras and its
+    prefetched data.
+    """
+    size = _NODE_BASE_SIZE + _get_deep_size(node._prefetched)
+    # Only the values that are already loaded, e.g. by SQLAlchemy, are counted
+    dbnode_dict = getattr(node._dbnode, '__dict__', {})
+    for key in ('attributes', 'extras'):
+        size += _get_deep_size(dbnode_dict.get(key))
+    return size
+
+
+def _get_deep_size(value, seen=None):
+    """
+    Estimate the memory of a value, following the items of dictionaries, lists, tuples and sets.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_get_deep_size(key, seen) + _get_deep_size(item, seen) for key, item in value.iteritems())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_get_deep_size(item, seen) for item in value)
+    return size
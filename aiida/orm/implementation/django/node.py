@@ -32,6 +32,11 @@ class Node(AbstractNode):
     @classmethod
     def get_subclass_from_uuid(cls, uuid):
         from aiida.backends.djsite.db.models import DbNode
+        from aiida.orm.identity_map import get_node_identity_map
+        identity_map = get_node_identity_map()
+        node = identity_map.get(uuid=uuid) if identity_map is not None else None
+        if isinstance(node, cls):
+            return node
         try:
             node = DbNode.objects.get(uuid=uuid).get_aiida_class()
         except ObjectDoesNotExist:
@@ -39,6 +44,8 @@ class Node(AbstractNode):
         if not isinstance(node, cls):
             raise NotExistent("UUID={} is not an instance of {}".format(
                 uuid, cls.__name__))
+        if identity_map is not None:
+            identity_map.add(node)
         return node
 
     @staticmethod
@@ -49,6 +56,11 @@ class Node(AbstractNode):
     @classmethod
     def get_subclass_from_pk(cls, pk):
         from aiida.backends.djsite.db.models import DbNode
+        from aiida.orm.identity_map import get_node_identity_map
+        identity_map = get_node_identity_map()
+        node = identity_map.get(pk=pk) if identity_map is not None else None
+        if isinstance(node, cls):
+            return node
         try:
             node = DbNode.objects.get(pk=pk).get_aiida_class()
         except ObjectDoesNotExist:
@@ -56,6 +68,8 @@ class Node(AbstractNode):
         if not isinstance(node, cls):
             raise NotExistent("pk= {} is not an instance of {}".format(
                 pk, cls.__name__))
+        if identity_map is not None:
+            identity_map.add(node)
         return node
 
     @classmethod
@@ -373,6 +387,12 @@ class Node(AbstractNode):
         return DbExtra.del_value_for_node(self._dbnode, key)
         self._increment_version_number_db()
 
+    def _set_db_hash(self, hash_):
+        from aiida.backends.djsite.db.models import DbNode
+        # Update only the hash column, which does not touch the mtime
+        DbNode.objects.filter(pk=self._dbnode.pk).update(hash=hash_)
+        self._dbnode.hash = hash_
+
     def _db_iterextras(self):
         from aiida.backends.djsite.db.models import DbExtra
         extraslist = DbExtra.list_all_node_elements(self._dbnode)
@@ -687,6 +707,60 @@ class Node(AbstractNode):
 
         from aiida.backends.djsite.db.models import DbExtra
         # I store the hash without cleaning and without incrementing the nodeversion number
-        DbExtra.set_value_for_node(self._dbnode, _HASH_EXTRA_KEY, self.get_hash())
+        hash_ = self.get_hash()
+        DbExtra.set_value_for_node(self._dbnode, _HASH_EXTRA_KEY, hash_)
+        self._set_db_hash(hash_)
 
         return self
+
+    @classmethod
+    def _db_store_many(cls, nodes, hashes, with_transaction=True):
+        """
+        Insert the rows of the nodes, of their attributes, of their hashes and of their
+        cached input links with one bulk_create() per table. See :meth:`.store_many`.
+
+        :param nodes: the list of nodes to store
+        :param hashes: a dictionary with the hash of each node, keyed on its UUID
+        :parameter with_transaction: if False, no transaction is used. This
+          is meant to be used ONLY if the outer calling function has already
+          a transaction open!
+        """
+        from django.db import transaction
+        from aiida.common.utils import EmptyContextManager
+        from aiida.backends.djsite.db.models import DbNode, DbAttribute, DbExtra
+
+        if with_transaction:
+            context_man = transaction.atomic()
+        else:
+            context_man = EmptyContextManager()
+
+        with context_man:
+            dbnodes = [node._dbnode for node in nodes]
+            for dbnode in dbnodes:
+                dbnode.hash = hashes[dbnode.uuid]
+            DbNode.objects.bulk_create(dbnodes, batch_size=cls._STORE_MANY_BATCH_SIZE)
+
+            # bulk_create does not set the primary keys on PostgreSQL with this version of Django
+            pks = {}
+            uuids = [dbnode.uuid for dbnode in dbnodes]
+            for start in range(0, len(uuids), cls._STORE_MANY_BATCH_SIZE):
+                pks.update(DbNode.objects.filter(
+                    uuid__in=uuids[start:start + cls._STORE_MANY_BATCH_SIZE]).values_list('uuid', 'pk'))
+            for dbnode in dbnodes:
+                dbnode.pk = pks[dbnode.uuid]
+                dbnode._state.adding = False
+                dbnode._state.db = DbNode.objects.db
+
+            attributes = DbAttribute.create_values_for_nodes(
+                [(node._dbnode, node._attrs_cache) for node in nodes])
+            extras = DbExtra.create_values_for_nodes(
+                [(node._dbnode, {_HASH_EXTRA_KEY: hashes[node.uuid]}) for node in nodes])
+            links = []
+            for node in nodes:
+                for label, (src, link_type) in node._inputlinks_cache.items():
+                    links.append(DbLink(input_id=src.pk, output_id=node.pk,
+                                        label=label, type=link_type.value))
+
+            DbAttribute.objects.bulk_create(attributes, batch_size=cls._STORE_MANY_BATCH_SIZE)
+            DbExtra.objects.bulk_create(extras, batch_size=cls._STORE_MANY_BATCH_SIZE)
+            DbLink.objects.bulk_create(links, batch_size=cls._STORE_MANY_BATCH_SIZE)
@@ -33,6 +33,7 @@ class AbstractCalculation(Sealable):
     PROCESS_STATE_KEY = 'process_state'
     FINISH_STATUS_KEY = 'finish_status'
     CHECKPOINT_KEY = 'checkpoints'
+    CHECKPOINT_DELTA_KEY = 'checkpoint_delta'
 
     # The link_type might not be correct while the object is being created.
     _hash_ignored_inputs = ['CALL']
@@ -45,6 +46,7 @@ class AbstractCalculation(Sealable):
             cls.PROCESS_STATE_KEY,
             cls.FINISH_STATUS_KEY,
             cls.CHECKPOINT_KEY,
+            cls.CHECKPOINT_DELTA_KEY,
         )
 
     @classproperty
@@ -329,6 +331,31 @@ class AbstractCalculation(Sealable):
         """
         if self.checkpoint is not None:
             self._del_attr(self.CHECKPOINT_KEY)
+        self._del_checkpoint_delta()
+
+    @property
+    def checkpoint_delta(self):
+        """
+        Return the changes of the checkpoint bundle with respect to the checkpoint set for the Calculation
+
+        :returns: checkpoint delta if it exists, None otherwise
+        """
+        return self.get_attr(self.CHECKPOINT_DELTA_KEY, None)
+
+    def _set_checkpoint_delta(self, checkpoint_delta):
+        """
+        Set the changes of the checkpoint bundle with respect to the checkpoint set for the Calculation
+
+        :param checkpoint_delta: string representation of the checkpoint delta
+        """
+        return self._set_attr(self.CHECKPOINT_DELTA_KEY, checkpoint_delta)
+
+    def _del_checkpoint_delta(self):
+        """
+        Delete the checkpoint delta set for the Calculation
+        """
+        if self.checkpoint_delta is not None:
+            self._del_attr(self.CHECKPOINT_DELTA_KEY)
 
     @property
     def called(self):
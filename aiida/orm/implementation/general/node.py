@@ -20,7 +20,7 @@ try:
 except ImportError:
     import pathlib2 as pathlib
 
-from aiida.backends.utils import validate_attribute_key
+from aiida.backends.utils import validate_attribute_key, AIIDA_ATTRIBUTE_SEP
 from aiida.common.caching import get_use_cache
 from aiida.common.exceptions import InternalError, ModificationNotAllowed, UniquenessError, ValidationError
 from aiida.common.folders import SandboxFolder
@@ -28,6 +28,7 @@ from aiida.common.lang import override
 from aiida.common.links import LinkType
 from aiida.common.utils import abstractclassmethod
 from aiida.common.utils import combomethod
+from aiida.orm.identity_map import invalidate_node
 from aiida.plugins.loader import get_query_type_from_type_string, get_type_string_from_class
 
 _NO_DEFAULT = tuple()
@@ -137,6 +138,12 @@ class AbstractNode(object):
     # Flag that determines whether the class can be cached.
     _cacheable = True
 
+    # Maximum number of rows inserted with a single statement by store_many
+    _STORE_MANY_BATCH_SIZE = 1000
+
+    # The data of stored nodes that can be loaded in bulk with prefetch
+    _PREFETCH_KEYS = ('attributes', 'extras', 'inputs', 'outputs')
+
     def get_desc(self):
         """
         Returns a string with infos retrieved from a node's properties.
@@ -212,6 +219,8 @@ class AbstractNode(object):
         # Empty cache of input links in any case
         self._attrs_cache = {}
         self._inputlinks_cache = {}
+        # Data of the stored node loaded in bulk by prefetch, keyed on one of _PREFETCH_KEYS
+        self._prefetched = {}
 
         self._temp_folder = None
         self._repo_folder = None
@@ -518,6 +527,8 @@ class AbstractNode(object):
         # If both are stored, write directly on the DB
         if self.is_stored and src.is_stored:
             self._add_dblink_from(src, label, link_type)
+            self._prefetched.pop('inputs', None)
+            src._prefetched.pop('outputs', None)
         else:  # at least one is not stored: add to the internal cache
             self._add_cachelink_from(src, label, link_type)
 
@@ -554,6 +565,8 @@ class AbstractNode(object):
         # If both are stored, write directly on the DB
         if self.is_stored and src.is_stored:
             self._replace_dblink_from(src, label, link_type)
+            self._prefetched.pop('inputs', None)
+            src._prefetched.pop('outputs', None)
             # If the link was in the local cache, remove it
             # (this could happen if I first store the output node, then
             # the input node.
@@ -588,6 +601,7 @@ class AbstractNode(object):
         # If both are stored, remove also from the DB
         if self.is_stored:
             self._remove_dblink_from(label)
+            self._prefetched.pop('inputs', None)
 
     @abstractmethod
     def _replace_dblink_from(self, src, label, link_type):
@@ -646,6 +660,95 @@ class AbstractNode(object):
         """
         return True
 
+    @classmethod
+    def prefetch(cls, nodes, keys=('attributes', 'inputs', 'outputs'), batch_size=1000):
+        """
+        Load in bulk the attributes, extras, inputs and/or outputs of many stored nodes,
+        with one query for each kind of data and batch of nodes, instead of one or more
+        queries for each node. Each node keeps its data, which is then returned by
+        get_attr(), get_attrs(), get_extra(), get_extras(), get_inputs(), get_outputs()
+        and the methods based on them, without hitting the DB.
+
+        Usage::
+
+            nodes = [row[0] for row in qb.all()]
+            Node.prefetch(nodes, ['attributes', 'outputs'])
+            for node in nodes:
+                print node.get_attr('energy'), len(node.get_outputs())
+
+        :note: the prefetched data is a snapshot. It is discarded when it is modified
+            through the node itself, but not when it is modified through another
+            instance of the same node or by another process: call prefetch() again
+            to refresh it.
+
+        :param nodes: an iterable of nodes. Unstored nodes are ignored.
+        :param keys: the data to load, a subset of ``_PREFETCH_KEYS``, i.e.
+            ``('attributes', 'extras', 'inputs', 'outputs')``
+        :param batch_size: the number of nodes whose data is loaded with one query
+        :return: the list of the nodes
+        """
+        from collections import defaultdict
+        from aiida.orm.node import Node
+        from aiida.orm.querybuilder import QueryBuilder
+
+        nodes = list(nodes)
+        keys = cls._validate_prefetch_keys(keys)
+
+        nodes_by_pk = defaultdict(list)
+        for node in nodes:
+            if node.is_stored:
+                nodes_by_pk[node.pk].append(node)
+        pks = list(nodes_by_pk)
+
+        columns = [key for key in ('attributes', 'extras') if key in keys]
+        relationships = [(key, relationship) for key, relationship in
+                         (('inputs', 'input_of'), ('outputs', 'output_of')) if key in keys]
+
+        for start in range(0, len(pks), batch_size):
+            prefetched = {pk: {key: [] for key, _ in relationships} for pk in pks[start:start + batch_size]}
+            filters = {'id': {'in': list(prefetched)}}
+
+            if columns:
+                qb = QueryBuilder().append(Node, filters=filters, project=['id'] + columns, tag='node')
+                for results in qb.iter_batches(batch_size=batch_size):
+                    for index, pk in enumerate(results['node']['id']):
+                        for column in columns:
+                            prefetched[pk][column] = results['node'][column][index]
+
+            for key, relationship in relationships:
+                qb = QueryBuilder().append(Node, filters=filters, project=['id'], tag='node')
+                qb.append(Node, project=['*'], edge_project=['label', 'type'], edge_tag='link', tag='linked',
+                          **{relationship: 'node'})
+                for results in qb.iter_batches(batch_size=batch_size):
+                    for pk, linked, label, type_ in zip(
+                            results['node']['id'], results['linked']['*'],
+                            results['link']['label'], results['link']['type']):
+                        prefetched[pk][key].append((label, linked, LinkType(type_)))
+
+            for pk, values in prefetched.iteritems():
+                for node in nodes_by_pk[pk]:
+                    node._prefetched.update(values)
+
+        return nodes
+
+    @classmethod
+    def _validate_prefetch_keys(cls, keys):
+        """
+        Check the keys of the data to prefetch.
+
+        :param keys: an iterable of keys, see :meth:`.prefetch`
+        :return: a tuple of the keys
+        :raise ValueError: if one of the keys cannot be prefetched
+        """
+        if isinstance(keys, basestring):
+            keys = (keys,)
+        keys = tuple(keys)
+        invalid_keys = set(keys) - set(cls._PREFETCH_KEYS)
+        if invalid_keys:
+            raise ValueError("Cannot prefetch {}, the valid keys are {}".format(
+                ', '.join(sorted(invalid_keys)), ', '.join(cls._PREFETCH_KEYS)))
+        return keys
+
     def get_inputs_dict(self, only_in_db=False, link_type=None):
         """
         Return a dictionary where the key is the label of the input link, and
@@ -716,7 +819,7 @@ class AbstractNode(object):
         if link_type is not None and not isinstance(link_type, LinkType):
             raise TypeError('link_type should be a LinkType object')
 
-        inputs_list = self._get_db_input_links(link_type=link_type)
+        inputs_list = self._get_input_links(link_type=link_type)
 
         if not only_in_db:
             # Needed for the check
@@ -742,6 +845,19 @@ class AbstractNode(object):
 
         return [i[1] for i in filtered_list]
 
+    def _get_input_links(self, link_type):
+        """
+        Return a list of tuples (label, aiida_class) for each input link in the DB,
+        from the prefetched inputs if available.
+
+        :param link_type: if not None, a link type to filter results
+        :return:  a list of tuples (label, aiida_class)
+        """
+        prefetched = self._prefetched.get('inputs')
+        if prefetched is None:
+            return self._get_db_input_links(link_type=link_type)
+        return [(label, node) for label, node, type_ in prefetched if link_type is None or type_ is link_type]
+
     @abstractclassmethod
     def _get_db_input_links(self, link_type):
         """
@@ -769,7 +885,7 @@ class AbstractNode(object):
         if link_type is not None and not isinstance(link_type, LinkType):
             raise TypeError('link_type should be a LinkType object')
 
-        outputs_list = self._get_db_output_links(link_type=link_type)
+        outputs_list = self._get_output_links(link_type=link_type)
 
         if node_type is None:
             filtered_list = outputs_list
@@ -781,6 +897,19 @@ class AbstractNode(object):
 
         return [i[1] for i in filtered_list]
 
+    def _get_output_links(self, link_type):
+        """
+        Return a list of tuples (label, aiida_class) for each output link,
+        from the prefetched outputs if available.
+
+        :param link_type: if not None, a link type to filter results
+        :return:  a list of tuples (label, aiida_class)
+        """
+        prefetched = self._prefetched.get('outputs')
+        if prefetched is None:
+            return self._get_db_output_links(link_type=link_type)
+        return [(label, node) for label, node, type_ in prefetched if link_type is None or type_ is link_type]
+
     @abstractmethod
     def _get_db_output_links(self, link_type):
         """
@@ -852,6 +981,8 @@ class AbstractNode(object):
                 self._attrs_cache[key] = value
         else:
             self._set_db_attr(key, clean_value(value))
+            self._prefetched.pop('attributes', None)
+            invalidate_node(self)
 
     def _append_to_attr(self, key, value, clean=True):
         """
@@ -916,6 +1047,8 @@ class AbstractNode(object):
                     "DbAttribute {} does not exist".format(key))
         else:
             self._del_db_attr(key)
+            self._prefetched.pop('attributes', None)
+            invalidate_node(self)
 
     @abstractmethod
     def _del_db_attr(self, key):
@@ -957,6 +1090,12 @@ class AbstractNode(object):
                 except KeyError:
                     raise AttributeError(
                         "DbAttribute '{}' does not exist".format(key))
+            elif 'attributes' in self._prefetched and AIIDA_ATTRIBUTE_SEP not in key:
+                try:
+                    return self._prefetched['attributes'][key]
+                except KeyError:
+                    raise AttributeError(
+                        "DbAttribute '{}' does not exist".format(key))
             else:
                 return self._get_db_attr(key)
         except AttributeError:
@@ -998,6 +1137,8 @@ class AbstractNode(object):
                 "The extras of a node can be set only after "
                 "storing the node")
         self._set_db_extra(key, clean_value(value), exclusive)
+        self._prefetched.pop('extras', None)
+        invalidate_node(self)
 
     def set_extra_exclusive(self, key, value):
         """
@@ -1056,6 +1197,8 @@ class AbstractNode(object):
                 "storing the node")
 
         self._reset_db_extras(clean_value(new_extras))
+        self._prefetched.pop('extras', None)
+        invalidate_node(self)
 
     @abstractmethod
     def _reset_db_extras(self, new_extras):
@@ -1090,6 +1233,11 @@ class AbstractNode(object):
             if not self.is_stored:
                 raise AttributeError("DbExtra '{}' does not exist yet, the "
                                      "node is not stored".format(key))
+            elif 'extras' in self._prefetched and AIIDA_ATTRIBUTE_SEP not in key:
+                try:
+                    return self._prefetched['extras'][key]
+                except KeyError:
+                    raise AttributeError("DbExtra '{}' does not exist".format(key))
             else:
                 return self._get_db_extra(key)
         except AttributeError as e:
@@ -1137,6 +1285,8 @@ class AbstractNode(object):
                 "The extras of a node can be set and deleted "
                 "only after storing the node")
         self._del_db_extra(key)
+        self._prefetched.pop('extras', None)
+        invalidate_node(self)
 
     @abstractmethod
     def _del_db_extra(self, key):
@@ -1172,8 +1322,12 @@ class AbstractNode(object):
             # Return without value, meaning that this is an empty generator
             return
             yield  # Needed after return to convert it to a generator
-        for extra in self._db_iterextras():
-            yield extra
+        if 'extras' in self._prefetched:
+            for extra in self._prefetched['extras'].iteritems():
+                yield extra
+        else:
+            for extra in self._db_iterextras():
+                yield extra
 
     def iterattrs(self):
         """
@@ -1184,6 +1338,9 @@ class AbstractNode(object):
         if self._to_be_stored:
             for k, v in self._attrs_cache.iteritems():
                 yield (k, v)
+        elif 'attributes' in self._prefetched:
+            for k, v in self._prefetched['attributes'].iteritems():
+                yield (k, v)
         else:
             for k, v in self._db_iterattrs():
                 yield k, v
@@ -1199,6 +1356,9 @@ class AbstractNode(object):
         if self._to_be_stored:
             for k in self._attrs_cache.iterkeys():
                 yield k
+        elif 'attributes' in self._prefetched:
+            for k in self._prefetched['attributes'].iterkeys():
+                yield k
         else:
             for k in self._db_attrs():
                 yield k
@@ -1604,6 +1764,7 @@ class AbstractNode(object):
             else:
                 # call implementation-dependent store method
                 self._db_store(with_transaction)
+            invalidate_node(self)
 
             # Set up autogrouping used by verdi run
             from aiida.orm.autogroup import current_autogroup, Autogroup, VERDIAUTOGROUP_TYPE
@@ -1625,6 +1786,149 @@ class AbstractNode(object):
         # n = Node().store()
         return self
 
+    @classmethod
+    def store_many(cls, nodes, with_transaction=True):
+        """
+        Store many new nodes at once, together with their attributes, their repository
+        folders and their cached input links, in a single transaction.
+
+        This is much faster than calling store() on each node, since the rows of the nodes,
+        attributes and links are inserted in bulk. Moreover, the links do not need to be
+        checked for loops against the existing graph, since no stored node can be the
+        descendant of a node that is being stored.
+
+        Usage::
+
+            Node.store_many([ParameterData(dict=d) for d in dictionaries])
+
+        :note: the nodes are always stored as new nodes, caching is not used.
+
+        :note: the nodes of classes that override store() cannot be stored in bulk,
+            since their additional logic would be skipped.
+
+        :param nodes: a list of unstored nodes. The source of every cached input link
+            must be either stored or one of the nodes.
+        :parameter with_transaction: if False, no transaction is used. This
+          is meant to be used ONLY if the outer calling function has already
+          a transaction open!
+        :return: the list of the stored nodes
+        """
+        nodes = list(nodes)
+        uuids = set()
+        for node in nodes:
+            if not node._to_be_stored:
+                raise ModificationNotAllowed(
+                    "Node with pk= {} was already stored".format(node.pk))
+            if node.uuid in uuids:
+                raise ValueError("Node with UUID={} was passed twice".format(node.uuid))
+            if getattr(type(node).store, '__func__', None) is not AbstractNode.store.__func__:
+                raise ValueError(
+                    "Nodes of class {} cannot be stored in bulk, since the class "
+                    "overrides store(): store them one by one".format(type(node).__name__))
+            uuids.add(node.uuid)
+
+        for node in nodes:
+            node._validate()
+
+        cls._check_store_many_links(nodes, uuids)
+
+        hashes = {node.uuid: node.get_hash() for node in nodes}
+
+        # As in store(), the files are moved first, and put back if the nodes cannot be stored
+        moved_nodes = []
+        try:
+            for node in nodes:
+                node._repository_folder.replace_with_folder(
+                    node._get_temp_folder().abspath, move=True, overwrite=True)
+                moved_nodes.append(node)
+
+            cls._db_store_many(nodes, hashes, with_transaction=with_transaction)
+        except:
+            for node in moved_nodes:
+                node._get_temp_folder().replace_with_folder(
+                    node._repository_folder.abspath, move=True, overwrite=True)
+            raise
+
+        for node in nodes:
+            del node._attrs_cache
+            node._temp_folder = None
+            node._to_be_stored = False
+            node._inputlinks_cache.clear()
+
+        # Set up autogrouping used by verdi run
+        from aiida.orm.autogroup import current_autogroup, Autogroup, VERDIAUTOGROUP_TYPE
+        from aiida.orm import Group
+
+        if current_autogroup is not None:
+            if not isinstance(current_autogroup, Autogroup):
+                raise ValidationError(
+                    "current_autogroup is not an AiiDA Autogroup")
+
+            nodes_to_group = [node for node in nodes if current_autogroup.is_to_be_grouped(node)]
+            group_name = current_autogroup.get_group_name()
+            if nodes_to_group and group_name is not None:
+                g = Group.get_or_create(
+                    name=group_name, type_string=VERDIAUTOGROUP_TYPE)[0]
+                g.add_nodes(nodes_to_group)
+
+        return nodes
+
+    @staticmethod
+    def _check_store_many_links(nodes, uuids):
+        """
+        Check that the sources of the cached input links of the nodes are either stored
+        or among the nodes, and that the links between the nodes do not form a loop.
+
+        :param nodes: the list of nodes to store
+        :param uuids: the set of the UUIDs of the nodes
+        :raise ModificationNotAllowed: if the source of a link is neither stored nor among the nodes
+        :raise ValueError: if the links would generate a loop
+        """
+        parents = {}
+        for node in nodes:
+            parents[node.uuid] = set()
+            for label, (src, link_type) in node._inputlinks_cache.items():
+                if src.uuid == node.uuid:
+                    raise ValueError("Cannot link to itself")
+                if src.is_stored:
+                    continue
+                if src.uuid not in uuids:
+                    raise ModificationNotAllowed(
+                        "Cannot store the input link '{}' of node (UUID={}) because "
+                        "the source node is neither stored nor among the nodes to "
+                        "store".format(label, node.uuid))
+                # As in _add_dblink_from, only these links must not form loops
+                if link_type is LinkType.CREATE or link_type is LinkType.INPUT:
+                    parents[node.uuid].add(src.uuid)
+
+        # Remove the nodes without unvisited parents until none is left
+        while parents:
+            roots = [uuid for uuid, node_parents in parents.items() if not node_parents]
+            if not roots:
+                raise ValueError(
+                    "The links between the nodes you are attempting to store would generate a loop")
+            for uuid in roots:
+                del parents[uuid]
+            for node_parents in parents.values():
+                node_parents.difference_update(roots)
+
+    @abstractclassmethod
+    def _db_store_many(cls, nodes, hashes, with_transaction=True):
+        """
+        Insert the rows of the nodes, of their attributes, of their hashes and of their
+        cached input links into the DB, in bulk. See :meth:`.store_many`.
+
+        :note: this only writes to the DB. The repository folders have already been
+            moved and the caches of the nodes are cleared by the caller.
+
+        :param nodes: the list of nodes to store
+        :param hashes: a dictionary with the hash of each node, keyed on its UUID
+        :parameter with_transaction: if False, no transaction is used. This
+          is meant to be used ONLY if the outer calling function has already
+          a transaction open!
+        """
+        pass
+
     def _store_from_cache(self, cache_node, with_transaction):
         new_node = cache_node.copy(include_updatable_attrs=True)
         inputlinks_cache = self._inputlinks_cache
@@ -1680,9 +1984,9 @@ class AbstractNode(object):
         """
         Making a hash based on my attributes
         """
-        from aiida.common.hashing import make_hash
+        from aiida.common.hashing import get_hash_function
         try:
-            return make_hash(self._get_objects_to_hash(), **kwargs)
+            return get_hash_function()(self._get_objects_to_hash(), **kwargs)
         except Exception as e:
             if ignore_errors:
                 return None
@@ -1713,13 +2017,32 @@ class AbstractNode(object):
         """
         Re-generates the stored hash of the Node.
         """
-        self.set_extra(_HASH_EXTRA_KEY, self.get_hash())
+        self._set_hash(self.get_hash())
 
     def clear_hash(self):
         """
         Sets the stored hash of the Node to None.
         """
-        self.set_extra(_HASH_EXTRA_KEY, None)
+        self._set_hash(None)
+
+    def _set_hash(self, hash_):
+        """
+        Store the hash of the Node, both in the ``_aiida_hash`` extra and in the indexed
+        hash column that is used to look up equivalent nodes.
+        """
+        self.set_extra(_HASH_EXTRA_KEY, hash_)
+        self._set_db_hash(hash_)
+
+    @abstractmethod
+    def _set_db_hash(self, hash_):
+        """
+        Set the indexed hash column of the node directly in the DB, without incrementing the node version.
+
+        DO NOT USE DIRECTLY.
+
+        :param hash_: the hash, or None
+        """
+        pass
 
     def _get_same_node(self):
         """
@@ -1752,10 +2075,12 @@ class AbstractNode(object):
         from aiida.orm.querybuilder import QueryBuilder
 
         hash_ = self.get_hash()
-        if hash_:
-            qb = QueryBuilder()
-            qb.append(self.__class__, filters={'extras._aiida_hash': hash_}, project='*', subclassing=False)
-            same_nodes = (n[0] for n in qb.iterall())
+        if not hash_:
+            return iter(())
+
+        qb = QueryBuilder()
+        qb.append(self.__class__, filters={'hash': hash_}, project='*', subclassing=False)
+        same_nodes = (n[0] for n in qb.iterall())
         return (n for n in same_nodes if n._is_valid_cache())
 
     def _is_valid_cache(self):
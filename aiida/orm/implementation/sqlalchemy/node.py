@@ -100,6 +100,11 @@ class Node(AbstractNode):
     def get_subclass_from_uuid(cls, uuid):
         from aiida.orm.querybuilder import QueryBuilder
         from sqlalchemy.exc import DatabaseError
+        from aiida.orm.identity_map import get_node_identity_map
+        identity_map = get_node_identity_map()
+        node = identity_map.get(uuid=uuid) if identity_map is not None else None
+        if isinstance(node, cls):
+            return node
         try:
             qb = QueryBuilder()
             qb.append(cls, filters={'uuid': {'==': str(uuid)}})
@@ -112,6 +117,8 @@ class Node(AbstractNode):
             if not isinstance(node, cls):
                 raise NotExistent("UUID={} is not an instance of {}".format(
                     uuid, cls.__name__))
+            if identity_map is not None:
+                identity_map.add(node)
             return node
         except DatabaseError as de:
             raise ValueError(de.message)
@@ -120,6 +127,7 @@ class Node(AbstractNode):
     def get_subclass_from_pk(cls, pk):
         from aiida.orm.querybuilder import QueryBuilder
         from sqlalchemy.exc import DatabaseError
+        from aiida.orm.identity_map import get_node_identity_map
         # If it is not an int make a final attempt
         # to convert to an integer. If you fail,
         # raise an exception.
@@ -128,6 +136,10 @@ class Node(AbstractNode):
         except:
             raise ValueError("Incorrect type for int")
 
+        identity_map = get_node_identity_map()
+        node = identity_map.get(pk=pk) if identity_map is not None else None
+        if isinstance(node, cls):
+            return node
         try:
             qb = QueryBuilder()
             qb.append(cls, filters={'id': {'==': pk}})
@@ -140,6 +152,8 @@ class Node(AbstractNode):
             if not isinstance(node, cls):
                 raise NotExistent("pk= {} is not an instance of {}".format(
                     pk, cls.__name__))
+            if identity_map is not None:
+                identity_map.add(node)
             return node
         except DatabaseError as de:
             raise ValueError(de.message)
@@ -414,6 +428,16 @@ class Node(AbstractNode):
             raise AttributeError("DbExtra {} does not exist".format(
                 key))
 
+    def _set_db_hash(self, hash_):
+        try:
+            self._dbnode.hash = hash_
+            self._dbnode.save()
+        except:
+            from aiida.backends.sqlalchemy import get_scoped_session
+            session = get_scoped_session()
+            session.rollback()
+            raise
+
     def _del_db_extra(self, key):
         try:
             self._dbnode.del_extra(key)
@@ -740,9 +764,99 @@ class Node(AbstractNode):
                 self._repository_folder.abspath, move=True, overwrite=True)
             raise
 
-        self._dbnode.set_extra(_HASH_EXTRA_KEY, self.get_hash())
+        hash_ = self.get_hash()
+        # The hash column is saved together with the extra
+        self._dbnode.hash = hash_
+        self._dbnode.set_extra(_HASH_EXTRA_KEY, hash_)
         return self
 
+    @classmethod
+    def _db_store_many(cls, nodes, hashes, with_transaction=True):
+        """
+        Insert the rows of the nodes, whose attributes and extras are JSON columns, and of
+        their cached input links with multi-row INSERT statements. See :meth:`.store_many`.
+
+        :param nodes: the list of nodes to store
+        :param hashes: a dictionary with the hash of each node, keyed on its UUID
+        :parameter with_transaction: if False, no transaction is used. This
+          is meant to be used ONLY if the outer calling function has already
+          a transaction open!
+        """
+        from sqlalchemy.orm import make_transient_to_detached
+        from aiida.backends.sqlalchemy import get_scoped_session
+        session = get_scoped_session()
+
+        node_table = DbNode.__table__
+        link_table = DbLink.__table__
+        dbnodes = [node._dbnode for node in nodes]
+
+        try:
+            rows = []
+            for node in nodes:
+                dbnode = node._dbnode
+                # The rows are inserted directly, the objects must not be flushed by the session
+                if dbnode in session:
+                    session.expunge(dbnode)
+                dbnode.attributes = node._attrs_cache
+                dbnode.extras = {_HASH_EXTRA_KEY: hashes[node.uuid]}
+                dbnode.hash = hashes[node.uuid]
+                rows.append(cls._get_dbnode_insert_values(dbnode))
+
+            ids = {}
+            for start in range(0, len(rows), cls._STORE_MANY_BATCH_SIZE):
+                result = session.execute(
+                    node_table.insert().values(rows[start:start + cls._STORE_MANY_BATCH_SIZE]).returning(
+                        node_table.c.uuid, node_table.c.id))
+                ids.update((unicode(uuid), id_) for uuid, id_ in result)
+
+            # The sources of the links are either stored or among the nodes that were just inserted
+            links = [
+                {'input_id': ids.get(src.uuid, src.pk), 'output_id': ids[node.uuid],
+                 'label': label, 'type': link_type.value}
+                for node in nodes
+                for label, (src, link_type) in node._inputlinks_cache.items()
+            ]
+            for start in range(0, len(links), cls._STORE_MANY_BATCH_SIZE):
+                session.execute(link_table.insert().values(links[start:start + cls._STORE_MANY_BATCH_SIZE]))
+
+            if with_transaction:
+                session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+
+        for dbnode in dbnodes:
+            dbnode.id = ids[unicode(dbnode.uuid)]
+            make_transient_to_detached(dbnode)
+            session.add(dbnode)
+
+    @staticmethod
+    def _get_dbnode_insert_values(dbnode):
+        """
+        Return the values of the columns of an unsaved DbNode, as they would be inserted by
+        the session, applying the Python defaults of the columns that are not set.
+
+        :param dbnode: an unsaved DbNode
+        :return: a dictionary of the values, keyed on the column names
+        """
+        values = {}
+        for column in DbNode.__table__.columns:
+            if column.primary_key:
+                continue
+            value = getattr(dbnode, column.key, None)
+            if value is None and column.default is not None:
+                default = column.default
+                value = default.arg(None) if default.is_callable else default.arg
+            values[column.key] = value
+
+        # The foreign keys are only set by the session on flush, from the relationships
+        if values['user_id'] is None and dbnode.user is not None:
+            values['user_id'] = dbnode.user.id
+        if values['dbcomputer_id'] is None and dbnode.dbcomputer is not None:
+            values['dbcomputer_id'] = dbnode.dbcomputer.id
+
+        return values
+
     @property
     def uuid(self):
         return unicode(self._dbnode.uuid)
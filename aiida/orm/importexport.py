@@ -8,6 +8,7 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 import HTMLParser
+import json
 import sys
 
 from aiida.common import exceptions
@@ -20,6 +21,8 @@ from aiida.orm.user import User
 
 IMPORTGROUP_TYPE = 'aiida.import'
 COMP_DUPL_SUFFIX = ' (Imported #{})'
+# Number of entries read at once from the database when exporting
+EXPORT_BATCH_SIZE = 1000
 
 # Giving names to the various entities. Attributes and links are not AiiDA
 # entities but we will refer to them as entities in the file (to simplify
@@ -655,6 +658,7 @@ def import_data_dj(in_path, ignore_unknown_nodes=False,
                 if model_name == NODE_ENTITY_NAME:
                     if not silent:
                         print "STORING NEW NODE ATTRIBUTES..."
+                    attributes_for_nodes = []
                     for unique_id, new_pk in just_saved.iteritems():
                         import_entry_id = import_entry_ids[unique_id]
                         # Get attributes from import file
@@ -672,10 +676,10 @@ def import_data_dj(in_path, ignore_unknown_nodes=False,
                         # Here I have to deserialize the attributes
                         deserialized_attributes = deserialize_attributes(
                             attributes, attributes_conversion)
-                        models.DbAttribute.reset_values_for_node(
-                            dbnode=new_pk,
-                            attributes=deserialized_attributes,
-                            with_transaction=False)
+                        attributes_for_nodes.append((new_pk, deserialized_attributes))
+
+                    models.DbAttribute.reset_values_for_nodes(
+                        attributes_for_nodes, with_transaction=False)
 
             if not silent:
                 print "STORING NODE LINKS..."
@@ -1641,6 +1645,51 @@ def fill_in_query(partial_query, originating_entity_str, current_entity_str,
                       new_tag_suffixes)
 
 
+class _JsonObjectStream(object):
+    """
+    A JSON object whose (key, value) pairs are only generated while it is written by
+    :py:func:`_dump_json_stream`, such that they do not have to be all in memory.
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+
+class _JsonArrayStream(object):
+    """
+    A JSON array whose values are only generated while it is written by :py:func:`_dump_json_stream`.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+
+def _dump_json_stream(value, fileobj):
+    """
+    Write a value as JSON to a file object, like json.dump, writing the items of the
+    :py:class:`_JsonObjectStream` and :py:class:`_JsonArrayStream` it contains one by one.
+    """
+    if isinstance(value, _JsonObjectStream):
+        fileobj.write('{')
+        for index, (key, item) in enumerate(value.items):
+            if index > 0:
+                fileobj.write(', ')
+            # Like json.dump, convert the keys that are not strings
+            fileobj.write(json.dumps(key if isinstance(key, basestring) else str(key)))
+            fileobj.write(': ')
+            _dump_json_stream(item, fileobj)
+        fileobj.write('}')
+    elif isinstance(value, _JsonArrayStream):
+        fileobj.write('[')
+        for index, item in enumerate(value.values):
+            if index > 0:
+                fileobj.write(', ')
+            _dump_json_stream(item, fileobj)
+        fileobj.write(']')
+    else:
+        json.dump(value, fileobj)
+
+
 def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
                 allowed_licenses=None, forbidden_licenses=None,
                 silent=False, use_querybuilder_ancestors=False):
@@ -1667,13 +1716,14 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
       license
     """
     import json
+    import tempfile
     import aiida
 
     from aiida.orm import Node, Calculation, Data
     from aiida.common.links import LinkType
     from aiida.common.folders import RepositoryFolder
     from aiida.orm.querybuilder import QueryBuilder
-    from aiida.backends.utils import QueryFactory
+    from aiida.orm.traversal import get_linked_pks
     if not silent:
         print("STARTING EXPORT...")
 
@@ -1712,8 +1762,9 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
                 qb.append(Node, ancestor_of='low_node', project=['id'])
                 additional_ids = [_ for _, in qb.all()]
             else:
-                q = QueryFactory()()
-                additional_ids = [_ for _, in q.get_all_parents(given_node_entry_ids, return_values=['id'])]
+                # Traverse the upwards provenance in the database, with a single recursive query
+                additional_ids = get_linked_pks(
+                    given_node_entry_ids, [LinkType.CREATE, LinkType.INPUT], direction='incoming')
 
             given_node_entry_ids = given_node_entry_ids.union(additional_ids)
 
@@ -1742,6 +1793,7 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
     if len(given_computer_entry_ids) > 0:
         given_entities.append(COMPUTER_ENTITY_NAME)
 
+    entity_separator = '_'
     entries_to_add = dict()
     for given_entity in given_entities:
         project_cols = ["id"]
@@ -1770,6 +1822,16 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
                   filters={"id": {"in": entry_ids_to_add}},
                   project=project_cols,
                   tag=given_entity, outerjoin=True)
+
+        foreign_fields = {k: v for k, v in
+                          all_fields_info[given_entity].iteritems()
+                          if 'requires' in v}
+
+        for k, v in foreign_fields.iteritems():
+            ref_model_name = v['requires']
+            fill_in_query(qb, given_entity, ref_model_name,
+                          [given_entity], entity_separator)
+
         entries_to_add[given_entity] = qb
 
     # TODO (Spyros) To see better! Especially for functional licenses
@@ -1782,27 +1844,26 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
         node_licenses = list((a, b) for [a, b] in qb.all() if b is not None)
         check_licences(node_licenses, allowed_licenses, forbidden_licenses)
 
+    if not any(qb.count() for qb in entries_to_add.values()):
+        if not silent:
+            print "No nodes to store, exiting..."
+        return
+
     ############################################################
     ##### Start automatic recursive export data generation #####
     ############################################################
-    if not silent:
-        print "STORING DATABASE ENTRIES..."
-
-    export_data = dict()
-    entity_separator = '_'
-    for entity_name, partial_query in entries_to_add.iteritems():
+    # The entries, attributes and links are written to data.json while they are
+    # read from the database, so that they never are all in memory at once.
+    # Only the entries of the entities related to the nodes (users, computers)
+    # are collected, since there are few of them.
+    counts = {'entries': 0, 'nodes': 0}
 
-        foreign_fields = {k: v for k, v in
-                          all_fields_info[entity_name].iteritems()
-                          # all_fields_info[model_name].iteritems()
-                          if 'requires' in v}
-
-        for k, v in foreign_fields.iteritems():
-            ref_model_name = v['requires']
-            fill_in_query(partial_query, entity_name, ref_model_name,
-                          [entity_name], entity_separator)
-
-        for temp_d in partial_query.iterdict():
+    def iter_entries(entity_name, partial_query, related_entries):
+        """
+        Yield the (id, serialized entry) pairs of entity_name, and add the serialized entries
+        of the related entities to the related_entries dictionary.
+        """
+        for temp_d in partial_query.iterdict(batch_size=EXPORT_BATCH_SIZE):
             for k in temp_d.keys():
                 # Get current entity
                 current_entity = k.split(entity_separator)[-1]
@@ -1812,94 +1873,86 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
                 if temp_d[k]["id"] is None:
                     continue
 
-                temp_d2 = {
-                    temp_d[k]["id"]:
-                        serialize_dict(temp_d[k],
-                                       remove_fields=['id'],
-                                       rename_fields=
-                                       model_fields_to_file_fields[current_entity])}
-                try:
-                    export_data[current_entity].update(temp_d2)
-                except KeyError:
-                    export_data[current_entity] = temp_d2
-
-    ######################################
-    # Manually manage links and attributes
-    ######################################
-    # I use .get because there may be no nodes to export
-    all_nodes_pk = list()
-    if export_data.has_key(NODE_ENTITY_NAME):
-        all_nodes_pk.extend(export_data.get(NODE_ENTITY_NAME).keys())
-
-    if sum(len(model_data) for model_data in export_data.values()) == 0:
+                serialized = serialize_dict(temp_d[k],
+                                            remove_fields=['id'],
+                                            rename_fields=
+                                            model_fields_to_file_fields[current_entity])
+                if current_entity == entity_name:
+                    yield temp_d[k]["id"], serialized
+                else:
+                    related_entries.setdefault(current_entity, {})[temp_d[k]["id"]] = serialized
+
+    def iter_export_data():
+        related_entries = {}
+        for entity_name, partial_query in entries_to_add.iteritems():
+            if entity_name != NODE_ENTITY_NAME:
+                related_entries.setdefault(entity_name, {}).update(
+                    iter_entries(entity_name, partial_query, related_entries))
+        if NODE_ENTITY_NAME in entries_to_add:
+            yield NODE_ENTITY_NAME, _JsonObjectStream(
+                iter_entries(NODE_ENTITY_NAME, entries_to_add[NODE_ENTITY_NAME], related_entries))
+        for entity_name, entries in related_entries.iteritems():
+            counts['entries'] += len(entries)
+            yield entity_name, entries
+
+    def iter_node_attributes(conversion_file):
         if not silent:
-            print "No nodes to store, exiting..."
-        return
-
-    if not silent:
-        print "Exporting a total of {} db entries, of which {} nodes.".format(
-            sum(len(model_data) for model_data in export_data.values()),
-            len(all_nodes_pk))
-
-    ## ATTRIBUTES
-    if not silent:
-        print "STORING NODE ATTRIBUTES..."
-    node_attributes = {}
-    node_attributes_conversion = {}
-
-    # A second QueryBuilder query to get the attributes. See if this can be
-    # optimized
-    if len(all_nodes_pk) > 0:
-        all_nodes_query = QueryBuilder()
-        all_nodes_query.append(Node, filters={"id": {"in": all_nodes_pk}},
-                               project=["*"])
-        for res in all_nodes_query.iterall():
-            n = res[0]
-            (node_attributes[str(n.pk)],
-             node_attributes_conversion[str(n.pk)]) = serialize_dict(
-                n.get_attrs(), track_conversion=True)
+            print "STORING NODE ATTRIBUTES..."
+        qb = QueryBuilder()
+        qb.append(Node, filters={"id": {"in": given_node_entry_ids}},
+                  project=["id", "attributes"], tag='node')
+        for batch in qb.iter_batches(batch_size=EXPORT_BATCH_SIZE):
+            for pk, attributes in zip(batch['node']['id'], batch['node']['attributes']):
+                serialized, conversion = serialize_dict(attributes or {}, track_conversion=True)
+                # The conversions are written after all the attributes, from this file
+                conversion_file.write(json.dumps([str(pk), conversion]) + '\n')
+                counts['nodes'] += 1
+                yield str(pk), serialized
+
+    def iter_node_attributes_conversion(conversion_file):
+        conversion_file.seek(0)
+        for line in conversion_file:
+            pk, conversion = json.loads(line)
+            yield pk, conversion
 
-    if not silent:
-        print "STORING NODE LINKS..."
     ## All 'parent' links (in this way, I can automatically export a node
     ## that will get automatically attached to a parent node in the end DB,
     ## if the parent node is already present in the DB)
-    links_uuid = list()
-    # Export links only if there are nodes to be extracted
-    if len(all_nodes_pk) > 0:
+    def iter_links_uuid():
+        if not silent:
+            print "STORING NODE LINKS..."
         links_qb = QueryBuilder()
         links_qb.append(Node, project=['uuid'], tag='input')
         links_qb.append(Node,
                         project=['uuid'], tag='output',
-                        filters={'id': {'in': all_nodes_pk}},
+                        filters={'id': {'in': given_node_entry_ids}},
                         edge_filters={'type': {'in': (LinkType.CREATE.value, LinkType.INPUT.value)}},
                         edge_project=['label', 'type'], output_of='input')
 
-        for input_uuid, output_uuid, link_label, link_type in links_qb.iterall():
-            links_uuid.append({
+        for input_uuid, output_uuid, link_label, link_type in links_qb.iterall(batch_size=EXPORT_BATCH_SIZE):
+            yield {
                 'input': str(input_uuid),
                 'output': str(output_uuid),
                 'label': str(link_label),
                 'type': str(link_type)
-            })
+            }
 
     if not silent:
         print "STORING GROUP ELEMENTS..."
     groups_uuid = dict()
-    # If a group is in the exported date, we export the group/node correlation
-    if GROUP_ENTITY_NAME in export_data:
-        for curr_group in export_data[GROUP_ENTITY_NAME]:
-            group_uuid_qb = QueryBuilder()
-            group_uuid_qb.append(entity_names_to_entities[GROUP_ENTITY_NAME],
-                                 filters={'id': {'==': curr_group}},
-                                 project=['uuid'], tag='group')
-            group_uuid_qb.append(entity_names_to_entities[NODE_ENTITY_NAME],
-                                 project=['uuid'], member_of='group')
-            for res in group_uuid_qb.iterall():
-                if groups_uuid.has_key(str(res[0])):
-                    groups_uuid[str(res[0])].append(str(res[1]))
-                else:
-                    groups_uuid[str(res[0])] = [str(res[1])]
+    # If a group is exported, we export the group/node correlation
+    for curr_group in given_group_entry_ids:
+        group_uuid_qb = QueryBuilder()
+        group_uuid_qb.append(entity_names_to_entities[GROUP_ENTITY_NAME],
+                             filters={'id': {'==': curr_group}},
+                             project=['uuid'], tag='group')
+        group_uuid_qb.append(entity_names_to_entities[NODE_ENTITY_NAME],
+                             project=['uuid'], member_of='group')
+        for res in group_uuid_qb.iterall():
+            if groups_uuid.has_key(str(res[0])):
+                groups_uuid[str(res[0])].append(str(res[1]))
+            else:
+                groups_uuid[str(res[0])] = [str(res[1])]
 
     ######################################
     # Now I store
@@ -1908,22 +1961,25 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
     nodesubfolder = folder.get_subfolder('nodes', create=True,
                                          reset_limit=True)
 
-    # Add the proper signatures to the exported data
-    for entity_name in export_data.keys():
-        export_data[entity_name] = (
-            export_data.pop(entity_name))
-
     if not silent:
-        print "STORING DATA..."
+        print "STORING DATABASE ENTRIES..."
 
-    with folder.open('data.json', 'w') as f:
-        json.dump({
-            'node_attributes': node_attributes,
-            'node_attributes_conversion': node_attributes_conversion,
-            'export_data': export_data,
-            'links_uuid': links_uuid,
-            'groups_uuid': groups_uuid,
-        }, f)
+    conversion_file = tempfile.TemporaryFile()
+    try:
+        with folder.open('data.json', 'w') as f:
+            _dump_json_stream(_JsonObjectStream([
+                ('export_data', _JsonObjectStream(iter_export_data())),
+                ('node_attributes', _JsonObjectStream(iter_node_attributes(conversion_file))),
+                ('node_attributes_conversion', _JsonObjectStream(iter_node_attributes_conversion(conversion_file))),
+                ('links_uuid', _JsonArrayStream(iter_links_uuid())),
+                ('groups_uuid', groups_uuid),
+            ]), f)
+    finally:
+        conversion_file.close()
+
+    if not silent:
+        print "Exported a total of {} db entries, of which {} nodes.".format(
+            counts['entries'] + counts['nodes'], counts['nodes'])
 
     # Add proper signature to unique identifiers & all_fields_info
     # Ignore if a key doesn't exist in any of the two dictionaries
@@ -1942,13 +1998,13 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
         print "STORING FILES..."
 
     # If there are no nodes, there are no files to store
-    if len(all_nodes_pk) > 0:
+    if len(given_node_entry_ids) > 0:
         # Large speed increase by not getting the node itself and looping in memory
         # in python, but just getting the uuid
         uuid_query = QueryBuilder()
-        uuid_query.append(Node, filters={"id": {"in": all_nodes_pk}},
+        uuid_query.append(Node, filters={"id": {"in": given_node_entry_ids}},
                           project=["uuid"])
-        for res in uuid_query.all():
+        for res in uuid_query.iterall(batch_size=EXPORT_BATCH_SIZE):
             uuid = str(res[0])
             sharded_uuid = export_shard_uuid(uuid)
 
@@ -1958,7 +2014,7 @@ def export_tree(what, folder, also_parents=True, also_calc_outputs=True,
                 sharded_uuid, create=False,
                 reset_limit=True)
             # In this way, I copy the content of the folder, and not the folder
-            # itself
+            # itself. When the folder is an archive, the files are written to it directly.
             thisnodefolder.insert_path(src=RepositoryFolder(
                 section=Node._section_name, uuid=uuid).abspath,
                                        dest_name='.')
@@ -2028,24 +2084,30 @@ def get_all_parents_dj(node_pks):
 
 
 class MyWritingZipFile(object):
+    """
+    A file to write in a zip archive. The content is written to a temporary file
+    on disk, which is added to the archive when it is closed.
+    """
+
     def __init__(self, zipfile, fname):
         self._zipfile = zipfile
         self._fname = fname
         self._buffer = None
 
     def open(self):
-        import StringIO
+        import tempfile
 
         if self._buffer is not None:
             raise IOError("Cannot open again!")
-        self._buffer = StringIO.StringIO()
+        self._buffer = tempfile.NamedTemporaryFile()
 
     def write(self, data):
         self._buffer.write(data)
 
     def close(self):
-        self._buffer.seek(0)
-        self._zipfile.writestr(self._fname, self._buffer.read())
+        self._buffer.flush()
+        self._zipfile.write(self._buffer.name, self._fname)
+        self._buffer.close()
         self._buffer = None
 
     def __enter__(self):
@@ -2056,6 +2118,23 @@ class MyWritingZipFile(object):
         self.close()
 
 
+class MyWritingTarFile(MyWritingZipFile):
+    """
+    A file to write in a tar archive. The content is written to a temporary file
+    on disk, which is added to the archive when it is closed.
+    """
+
+    def __init__(self, tarfile, fname):
+        super(MyWritingTarFile, self).__init__(zipfile=None, fname=fname)
+        self._tarfile = tarfile
+
+    def close(self):
+        self._buffer.flush()
+        self._tarfile.add(self._buffer.name, arcname=self._fname)
+        self._buffer.close()
+        self._buffer = None
+
+
 class ZipFolder(object):
     """
     To improve: if zipfile is closed, do something
@@ -2167,6 +2246,89 @@ class ZipFolder(object):
             self._zipfile.write(src, base_filename)
 
 
+class TarFolder(object):
+    """
+    A folder inside a tar archive that is being written, with the same interface as
+    :py:class:`ZipFolder`, such that files are written directly to the archive.
+    """
+
+    def __init__(self, tarfolder_or_fname, mode=None, subfolder='.'):
+        """
+        :param tarfolder_or_fname: either another TarFolder instance,
+          of which you want to get a subfolder, or a filename to create.
+        :param mode: the mode to open the file with, see the tarfile.open docs,
+          by default 'w:gz'. Can be specified only if tarfolder_or_fname is a
+          string (the filename to generate)
+        :param subfolder: the subfolder that specified the "current working
+          directory" in the tar file. If tarfolder_or_fname is a TarFolder,
+          subfolder is a relative path from tarfolder_or_fname.subfolder
+        """
+        import os
+        import tarfile
+
+        if isinstance(tarfolder_or_fname, basestring):
+            # PAX_FORMAT: virtually no limitations, better support for unicode
+            #   characters
+            # dereference=True: at the moment, we should not have any symlink or
+            #   hardlink in the AiiDA repository; therefore, do not store symlinks
+            #   or hardlinks, but store the actual destinations.
+            #   This also simplifies the checks on import.
+            self._tarfile = tarfile.open(tarfolder_or_fname, mode or 'w:gz',
+                                         format=tarfile.PAX_FORMAT, dereference=True)
+            self._pwd = subfolder
+        else:
+            if mode is not None:
+                raise ValueError("Cannot specify 'mode' when passing a TarFolder")
+            self._tarfile = tarfolder_or_fname._tarfile
+            self._pwd = os.path.join(tarfolder_or_fname.pwd, subfolder)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        self._tarfile.close()
+
+    @property
+    def pwd(self):
+        return self._pwd
+
+    def open(self, fname, mode='w'):
+        if mode != 'w':
+            raise ValueError("Files in a TarFolder can only be opened for writing")
+        return MyWritingTarFile(
+            tarfile=self._tarfile, fname=self._get_internal_path(fname))
+
+    def _get_internal_path(self, filename):
+        import os
+        return os.path.normpath(os.path.join(self.pwd, filename))
+
+    def get_subfolder(self, subfolder, create=False, reset_limit=False):
+        # reset_limit: ignored
+        # create: ignored, the directories are created in the archive with the files
+        return TarFolder(self, subfolder=subfolder)
+
+    def insert_path(self, src, dest_name=None, overwrite=True):
+        """
+        Add a file or a folder, recursively, to the archive.
+
+        :param src: the absolute path of the file or folder to add
+        :param dest_name: the name in the archive, relative to this folder; by default
+          the basename of src
+        :param overwrite: ignored, the files of a tar archive cannot be replaced
+        """
+        import os
+
+        if not os.path.isabs(src):
+            raise ValueError("src must be an absolute path in insert_file")
+        if dest_name is None:
+            dest_name = os.path.basename(src)
+
+        self._tarfile.add(src, arcname=self._get_internal_path(dest_name))
+
+
 def export_zip(what, outfile='testzip', overwrite=False,
                silent=False, use_compression=True, **kwargs):
     import os
@@ -2201,44 +2363,20 @@ def export(what, outfile='export_data.aiida.tar.gz', overwrite=False, silent=Fal
     :raise IOError: if overwrite==False and the filename already exists.
     """
     import os
-    import tarfile
     import time
 
-    from aiida.common.folders import SandboxFolder
-
     if not overwrite and os.path.exists(outfile):
         raise IOError("The output file '{}' already "
                       "exists".format(outfile))
 
-    folder = SandboxFolder()
-    t1 = time.time()
-    export_tree(what, folder=folder, silent=silent, **kwargs)
-
-    t2 = time.time()
-
-    if not silent:
-        print "COMPRESSING..."
-
-    # PAX_FORMAT: virtually no limitations, better support for unicode
-    #   characters
-    # dereference=True: at the moment, we should not have any symlink or
-    #   hardlink in the AiiDA repository; therefore, do not store symlinks
-    #   or hardlinks, but store the actual destinations.
-    #   This also simplifies the checks on import.
-    t3 = time.time()
-    with tarfile.open(outfile, "w:gz", format=tarfile.PAX_FORMAT,
-                      dereference=True) as tar:
-        tar.add(folder.abspath, arcname="")
-
-        #        import shutil
-        #        shutil.make_archive(outfile, 'zip', folder.abspath)#, base_dir='aiida')
-    t4 = time.time()
+    # The entries and the files are written directly to the compressed archive,
+    # without copying them to a temporary folder first
+    t = time.time()
+    with TarFolder(outfile, mode='w:gz') as folder:
+        export_tree(what, folder=folder, silent=silent, **kwargs)
 
     if not silent:
-        filecr_time = t2 - t1
-        filecomp_time = t4 - t3
-        print "Exported in {:6.2g}s, compressed in {:6.2g}s, total: {:6.2g}s.".format(filecr_time, filecomp_time,
-                                                                                      filecr_time + filecomp_time)
+        print "Exported and compressed in {:6.2g}s.".format(time.time() - t)
 
     if not silent:
         print "DONE."
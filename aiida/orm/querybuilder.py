@@ -21,6 +21,8 @@ when instantiated by the user.
 
 # Warnings are issued for deprecations:
 import warnings
+import datetime
+from collections import namedtuple
 # Checking for correct input with the inspect module
 from inspect import isclass as inspect_isclass
 from aiida.orm.node import Node
@@ -29,14 +31,56 @@ from aiida.orm.node import Node
 from sqlalchemy import and_, or_, not_, func as sa_func, select, join
 from sqlalchemy.types import Integer
 from sqlalchemy.orm import aliased
-from sqlalchemy.sql.expression import cast
+from sqlalchemy.sql.expression import bindparam, cast, ClauseElement, Executable
 from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.compiler import compiles
 ## AIIDA modules:
 # For exception handling
 from aiida.common.exceptions import InputValidationError, ConfigurationError
 # The way I get column as a an attribute to the orm class
 from aiida.backends.utils import _get_column
 from aiida.common.links import LinkType
+from aiida.common.lru import LRUCache
+
+# Maximum number of built queries that are kept in the cache of query templates
+QUERY_TEMPLATE_CACHE_SIZE = 256
+# Operators on columns whose values are passed to the database as bind parameters
+_BINDABLE_OPERATORS = ('==', '>', '<', '>=', '<=', 'like', 'ilike', 'in')
+# Values of these types map to a single bind parameter, None and booleans are rendered as SQL constants
+_BINDABLE_TYPES = (int, long, float, basestring, datetime.datetime, datetime.date)
+# Placeholder for a bound value in the key of a query template
+_BOUND_VALUE = '__bound_value__'
+# Names of the bind parameters of the limit and of the offset
+_LIMIT_PARAM = 'qb_limit'
+_OFFSET_PARAM = 'qb_offset'
+
+QueryTemplate = namedtuple('QueryTemplate', [
+    'query', 'tag_to_alias_map', 'aliased_path', 'tags_location_dict',
+    'tag_to_projected_entity_dict', 'attrkeys_as_in_sql_result', 'nr_of_projections'
+])
+
+_query_template_cache = LRUCache(QUERY_TEMPLATE_CACHE_SIZE)
+
+
+def clear_query_template_cache():
+    """
+    Empty the cache of query templates used by :meth:`QueryBuilder.get_query`
+    """
+    _query_template_cache.clear()
+
+
+class _Explain(Executable, ClauseElement):
+    """
+    The EXPLAIN statement of a query, which returns the plan of the query in JSON format
+    """
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, 'postgresql')
+def _compile_explain(element, compiler, **kwargs):
+    return 'EXPLAIN (FORMAT JSON) {}'.format(compiler.process(element.statement, **kwargs))
 
 
 class QueryBuilder(object):
@@ -58,6 +102,8 @@ class QueryBuilder(object):
     # namely tag of first entity + _EDGE_TAG_DELIM + tag of second entity
     _EDGE_TAG_DELIM = '--'
     _VALID_PROJECTION_KEYS = ('func', 'cast')
+    # The number of results for which the data of the nodes is prefetched at once, if no batch size is given
+    _PREFETCH_BATCH_SIZE = 1000
 
     def __init__(self, *args, **kwargs):
         """
@@ -88,6 +134,9 @@ class QueryBuilder(object):
         :param order_by:
             How to order the results. As the 2 above, can be set also at later stage,
             check :func:`QueryBuilder.order_by` for more information.
+        :param prefetch:
+            The data to load in bulk for the nodes that are returned,
+            check :func:`QueryBuilder.prefetch` for more information.
 
         """
         from aiida.backends.settings import BACKEND
@@ -213,10 +262,13 @@ class QueryBuilder(object):
         if order_spec:
             self.order_by(order_spec)
 
+        # The data of the returned nodes to load in bulk, can also be set with QueryBuilder.prefetch
+        self.prefetch(kwargs.pop('prefetch', None))
+
         # I've gone through all the keywords, popping each item
         # If kwargs is not empty, there is a problem:
         if kwargs:
-            valid_keys = ('path', 'filters', 'project', 'limit', 'offset', 'order_by')
+            valid_keys = ('path', 'filters', 'project', 'limit', 'offset', 'order_by', 'prefetch')
             raise InputValidationError(
                 "Received additional keywords: {}"
                 "\nwhich I cannot process"
@@ -1027,6 +1079,29 @@ class QueryBuilder(object):
         self._limit = limit
         return self
 
+    def prefetch(self, keys):
+        """
+        Set the data to load in bulk for the nodes returned by :func:`QueryBuilder.all`,
+        :func:`QueryBuilder.iterall`, :func:`QueryBuilder.dict` and :func:`QueryBuilder.iterdict`.
+        The data is loaded for each batch of results with a few queries, rather than with
+        one or more queries for each node when it is accessed, see
+        :func:`~aiida.orm.implementation.general.node.AbstractNode.prefetch`.
+
+        Usage::
+
+            qb = QueryBuilder().append(Calculation, project='*')
+            qb.prefetch(['attributes', 'outputs'])
+            for calc, in qb.iterall():
+                print calc.get_attr('state', None), len(calc.get_outputs())
+
+        :param keys: None, or a subset of ``('attributes', 'extras', 'inputs', 'outputs')``
+        """
+        if keys:
+            self._prefetch = Node._validate_prefetch_keys(keys)
+        else:
+            self._prefetch = None
+        return self
+
     def offset(self, offset):
         """
         Set the offset. If offset is set, that many rows are skipped before returning.
@@ -1042,12 +1117,16 @@ class QueryBuilder(object):
         self._offset = offset
         return self
 
-    def _build_filters(self, alias, filter_spec):
+    def _build_filters(self, alias, filter_spec, bind_path=None):
         """
         Recurse through the filter specification and apply filter operations.
 
         :param alias: The alias of the ORM class the filter will be applied on
         :param filter_spec: the specification as given by the queryhelp
+        :param bind_path:
+            The location of the filter specification in the filters of the queryhelp.
+            If given, the values that were selected by :meth:`._get_query_template_key`
+            are replaced by named bind parameters.
 
         :returns: an instance of *sqlalchemy.sql.elements.BinaryExpression*.
         """
@@ -1055,8 +1134,11 @@ class QueryBuilder(object):
         for path_spec, filter_operation_dict in filter_spec.items():
             if path_spec in ('and', 'or', '~or', '~and', '!and', '!or'):
                 subexpressions = [
-                    self._build_filters(alias, sub_filter_spec)
-                    for sub_filter_spec in filter_operation_dict
+                    self._build_filters(
+                        alias, sub_filter_spec,
+                        None if bind_path is None else bind_path + (path_spec, index)
+                    )
+                    for index, sub_filter_spec in enumerate(filter_operation_dict)
                 ]
                 if path_spec == 'and':
                     expressions.append(and_(*subexpressions))
@@ -1084,20 +1166,143 @@ class QueryBuilder(object):
                 # ~ is_attribute = bool(attr_key)
                 if not isinstance(filter_operation_dict, dict):
                     filter_operation_dict = {'==': filter_operation_dict}
-                [
-                    expressions.append(
-                        self._impl.get_filter_expr(
-                            operator, value, attr_key,
-                            is_attribute=is_attribute,
-                            column=column, column_name=column_name,
-                            alias=alias
-                        )
+                for operator, value in filter_operation_dict.items():
+                    expr = self._impl.get_filter_expr(
+                        operator, value, attr_key,
+                        is_attribute=is_attribute,
+                        column=column, column_name=column_name,
+                        alias=alias
                     )
-                    for operator, value
-                    in filter_operation_dict.items()
-                ]
+                    if bind_path is not None:
+                        bind_names = self._bind_names.get(bind_path + (path_spec, operator), None)
+                        if bind_names is not None:
+                            expr = self._bind_filter_values(expr, bind_names)
+                    expressions.append(expr)
         return and_(*expressions)
 
+    def _bind_filter_values(self, expr, bind_names):
+        """
+        Replace the literal values of a filter expression by named bind parameters,
+        such that the query can be reused for other values.
+
+        :param expr: the filter expression on a column
+        :param bind_names: the names of the bind parameters, in the order of the values
+        :returns: the filter expression with named bind parameters
+        """
+        from sqlalchemy.sql import bindparam, visitors
+        from sqlalchemy.sql.elements import BindParameter
+
+        bindparams = [
+            element for element in visitors.iterate(expr, {})
+            if isinstance(element, BindParameter)
+        ]
+        if len(bindparams) != len(bind_names):
+            # The values do not map one to one onto bind parameters, so the query cannot be reused
+            self._query_template_cacheable = False
+            return expr
+
+        replacements = {
+            id(element): bindparam(name, value=element.value, type_=element.type)
+            for element, name in zip(bindparams, bind_names)
+        }
+        return visitors.replacement_traverse(expr, {}, lambda element: replacements.get(id(element), None))
+
+    def _get_filter_template(self, filter_spec, bind_path, params):
+        """
+        Return a copy of the filter specification where the values that can be passed
+        as bind parameters are replaced by a placeholder with their type.
+
+        :param filter_spec: the specification as given by the queryhelp
+        :param bind_path: the location of the filter specification in the filters of the queryhelp
+        :param params: dictionary to which the bound values are added, keyed on the name of the bind parameter
+        :returns: the filter specification of the template
+        """
+        template = {}
+        for path_spec, filter_operation_dict in sorted(filter_spec.items()):
+            if path_spec in ('and', 'or', '~or', '~and', '!and', '!or'):
+                template[path_spec] = [
+                    self._get_filter_template(sub_filter_spec, bind_path + (path_spec, index), params)
+                    for index, sub_filter_spec in enumerate(filter_operation_dict)
+                ]
+                continue
+
+            column_name = path_spec.split('.')[0]
+            is_attribute = path_spec.split('.')[1:] or column_name in ('attributes', 'extras')
+            if not isinstance(filter_operation_dict, dict):
+                filter_operation_dict = {'==': filter_operation_dict}
+
+            template[path_spec] = {}
+            for operator, value in sorted(filter_operation_dict.items()):
+                base_operator = operator.lstrip('~!')
+                values = value if base_operator == 'in' else [value]
+                # Filters on attributes are not bound, since the query depends on the type of the values
+                if (
+                        is_attribute or
+                        base_operator not in _BINDABLE_OPERATORS or
+                        not isinstance(values, (list, tuple)) or
+                        not values or
+                        not all([isinstance(v, _BINDABLE_TYPES) and not isinstance(v, bool) for v in values])
+                ):
+                    template[path_spec][operator] = value
+                    continue
+
+                bind_names = []
+                for bound_value in values:
+                    bind_name = 'qb_param_{}'.format(len(params))
+                    params[bind_name] = bound_value
+                    bind_names.append(bind_name)
+                self._bind_names[bind_path + (path_spec, operator)] = bind_names
+                template[path_spec][operator] = [_BOUND_VALUE, [type(v).__name__ for v in values]]
+
+        return template
+
+    def _get_query_template_key(self):
+        """
+        Return the key of the query in the cache of query templates, together with the values
+        of its bind parameters. Queries whose queryhelp only differs in the values of filters
+        on columns, of the limit or of the offset share the same key.
+
+        :returns: a tuple with the key, or None if the query cannot be cached, and the dictionary of bound values
+        """
+        from aiida.backends.settings import BACKEND
+        from aiida.common.hashing import make_hash
+
+        self._bind_names = {}
+        params = {}
+
+        # The filters of the recursive joins and of their edges are built into the query with their values
+        recursive_tags = set()
+        for vertice in self._path:
+            if vertice['joining_keyword'] in ('descendant_of', 'ancestor_of'):
+                recursive_tags.update([vertice['joining_value'], vertice['edge_tag']])
+        filters = {}
+        for tag, filter_spec in sorted(self._filters.items()):
+            if tag in recursive_tags:
+                filters[tag] = filter_spec
+            else:
+                filters[tag] = self._get_filter_template(filter_spec, (tag,), params)
+
+        try:
+            key = make_hash({
+                'backend': BACKEND,
+                'path': self._path,
+                'filters': filters,
+                'project': self._projections,
+                'order_by': self._order_by,
+                'limit': self._limit is not None,
+                'offset': self._offset is not None,
+            })
+        except ValueError:
+            self._bind_names = {}
+            return None, {}
+
+        if self._limit is not None:
+            params[_LIMIT_PARAM] = self._limit
+        if self._offset is not None:
+            params[_OFFSET_PARAM] = self._offset
+
+        return key, params
+
     @staticmethod
     def _check_dbentities(entities_cls_joined, entities_cls_to_join, relationship):
         """
@@ -1206,11 +1411,79 @@ class QueryBuilder(object):
         )
         return aliased_edge
 
-    def _join_descendants_recursive(self, joined_entity, entity_to_join, isouterjoin, filter_dict, expand_path=False):
+    @staticmethod
+    def _get_recursive_join_options(edge_filters):
+        """
+        Return the options of a recursive join that are given by the filters on its edge,
+        such that they are applied at every step of the recursion rather than on its result.
+
+        *   the filters on *depth* with the operators ``==``, ``<`` and ``<=`` bound
+            the depth of the recursion (the depth of direct links is 0);
+        *   the filters on *type* with the operators ``==`` and ``in`` give the types
+            of the links that are followed, by default the CREATE and INPUT links.
+
+        :param dict edge_filters: the filters on the edge of the recursive join
+        :returns: a tuple with the maximum depth, or None, and the tuple of link types
+        """
+        max_depth = None
+        depth_filters = edge_filters.get('depth', {})
+        if not isinstance(depth_filters, dict):
+            depth_filters = {'==': depth_filters}
+        for operator, value in depth_filters.items():
+            if not isinstance(value, (int, long)):
+                continue
+            if operator in ('==', '<='):
+                bound = value
+            elif operator == '<':
+                bound = value - 1
+            else:
+                continue
+            max_depth = bound if max_depth is None else min(max_depth, bound)
+
+        type_filters = edge_filters.get('type', {})
+        if not isinstance(type_filters, dict):
+            type_filters = {'==': type_filters}
+        if not type_filters:
+            return max_depth, (LinkType.CREATE.value, LinkType.INPUT.value)
+
+        link_types = None
+        for operator, value in type_filters.items():
+            if operator == '==':
+                values = [value]
+            elif operator == 'in':
+                values = value
+            else:
+                raise InputValidationError(
+                    "The link types of a recursive join can only be filtered with '==' or 'in', not '{}'"
+                    "".format(operator)
+                )
+            try:
+                values = [LinkType(value).value for value in values]
+            except ValueError as e:
+                raise InputValidationError("Invalid link type for a recursive join: {}".format(e))
+            link_types = values if link_types is None else [_ for _ in link_types if _ in values]
+
+        return max_depth, tuple(link_types)
+
+    @staticmethod
+    def _get_recursive_step_filters(aliased_walk, link, max_depth, link_types):
+        """
+        Return the filters of a step of a recursive join, applied to the links that extend the walk.
+        """
+        expressions = [link.type.in_(link_types)]
+        if max_depth is not None:
+            expressions.append(aliased_walk.c.depth < max_depth)
+        return and_(*expressions)
+
+    def _join_descendants_recursive(self, joined_entity, entity_to_join, isouterjoin, filter_dict, expand_path=False,
+                                    max_depth=None, link_types=(LinkType.CREATE.value, LinkType.INPUT.value)):
         """
         joining descendants using the recursive functionality
-        :TODO: Move the filters to be done inside the recursive query (for example on depth)
-        :TODO: Pass an option to also show the path, if this is wanted.
+
+        :param filter_dict: the filters of joined_entity, applied to the seed of the recursion
+        :param bool expand_path: whether to build the path to each descendant
+        :param int max_depth: if given, the recursion stops at this depth (0 for the direct outputs)
+        :param link_types: the types of the links that are followed
         """
 
         self._check_dbentities(
@@ -1238,7 +1511,7 @@ class QueryBuilder(object):
             )
         ).where(and_(
             in_recursive_filters,  # I apply filters for speed here
-            link1.type.in_((LinkType.CREATE.value, LinkType.INPUT.value))  # I follow input and create links
+            link1.type.in_(link_types)  # By default, I follow input and create links
         )).cte(recursive=True)
 
         aliased_walk = aliased(walk)
@@ -1258,7 +1531,7 @@ class QueryBuilder(object):
                     link2,
                     link2.input_id == aliased_walk.c.descendant_id,
                 )
-            ).where(link2.type.in_((LinkType.CREATE.value, LinkType.INPUT.value)))
+            ).where(self._get_recursive_step_filters(aliased_walk, link2, max_depth, link_types))
         ))  # .alias()
 
         self._query = self._query.join(
@@ -1271,12 +1544,15 @@ class QueryBuilder(object):
         )
         return descendants_recursive.c
 
-    def _join_ancestors_recursive(self, joined_entity, entity_to_join, isouterjoin, filter_dict, expand_path=False):
+    def _join_ancestors_recursive(self, joined_entity, entity_to_join, isouterjoin, filter_dict, expand_path=False,
+                                  max_depth=None, link_types=(LinkType.CREATE.value, LinkType.INPUT.value)):
         """
         joining ancestors using the recursive functionality
-        :TODO: Move the filters to be done inside the recursive query (for example on depth)
-        :TODO: Pass an option to also show the path, if this is wanted.
 
+        :param filter_dict: the filters of joined_entity, applied to the seed of the recursion
+        :param bool expand_path: whether to build the path to each ancestor
+        :param int max_depth: if given, the recursion stops at this depth (0 for the direct inputs)
+        :param link_types: the types of the links that are followed
         """
         self._check_dbentities(
             (joined_entity, self._impl.Node),
@@ -1301,7 +1577,7 @@ class QueryBuilder(object):
             join(
                 node1, link1, link1.output_id == node1.id
             )
-        ).where(and_(in_recursive_filters, link1.type.in_((LinkType.CREATE.value, LinkType.INPUT.value)))).cte(
+        ).where(and_(in_recursive_filters, link1.type.in_(link_types))).cte(
             recursive=True)
 
         aliased_walk = aliased(walk)
@@ -1321,8 +1597,8 @@ class QueryBuilder(object):
                     link2,
                     link2.output_id == aliased_walk.c.ancestor_id,
                 )
-            ).where(link2.type.in_((LinkType.CREATE.value, LinkType.INPUT.value)))
-            # I can't follow RETURN or CALL links
+            ).where(self._get_recursive_step_filters(aliased_walk, link2, max_depth, link_types))
+            # By default, I don't follow RETURN or CALL links
         ))
 
         self._query = self._query.join(
@@ -1653,6 +1929,63 @@ class QueryBuilder(object):
     def _build(self):
         """
         build the query and return a sqlalchemy.Query instance
+
+        Built queries are cached as templates, keyed on the queryhelp where the values of the
+        filters on columns, the limit and the offset are replaced by bind parameters. If a query
+        with the same template was built before, by this or by another instance, it is reused
+        with the current values.
+        """
+        template_key, params = self._get_query_template_key()
+        if template_key is not None:
+            template = _query_template_cache.get(template_key)
+            if template is not None:
+                return self._build_from_template(template, params)
+
+        self._query_template_cacheable = template_key is not None
+        query = self._build_query()
+
+        if self._query_template_cacheable:
+            template = QueryTemplate(
+                query=query.with_session(None),
+                tag_to_alias_map=dict(self._tag_to_alias_map),
+                aliased_path=list(self._aliased_path),
+                tags_location_dict=dict(self.tags_location_dict),
+                tag_to_projected_entity_dict={
+                    tag: dict(projected_entities_dict)
+                    for tag, projected_entities_dict in self.tag_to_projected_entity_dict.items()
+                },
+                attrkeys_as_in_sql_result=dict(self._attrkeys_as_in_sql_result),
+                nr_of_projections=self.nr_of_projections,
+            )
+            _query_template_cache.set(template_key, template)
+
+        return query
+
+    def _build_from_template(self, template, params):
+        """
+        Set the query and the state that is otherwise set by :meth:`._build_query` from a query template.
+
+        :param template: the :class:`QueryTemplate` of the query
+        :param params: the values of the bind parameters of the template
+        :returns: the sqlalchemy.Query instance
+        """
+        # The query refers to the aliases of the template, so these should be used for custom filters
+        self._tag_to_alias_map = dict(template.tag_to_alias_map)
+        self._aliased_path = list(template.aliased_path)
+        self.tags_location_dict = dict(template.tags_location_dict)
+        self.tag_to_projected_entity_dict = {
+            tag: dict(projected_entities_dict)
+            for tag, projected_entities_dict in template.tag_to_projected_entity_dict.items()
+        }
+        self._attrkeys_as_in_sql_result = dict(template.attrkeys_as_in_sql_result)
+        self.nr_of_projections = template.nr_of_projections
+
+        self._query = template.query.with_session(self._impl.get_session()).params(**params)
+        return self._query
+
+    def _build_query(self):
+        """
+        build the query from the queryhelp and return a sqlalchemy.Query instance
         """
 
         # self.tags_location_dict is a dictionary that
@@ -1700,8 +2033,10 @@ class QueryBuilder(object):
                         (self._filters[edge_tag].get('path', None) is not None) or
                         any(['path' in d.keys() for d in self._projections[edge_tag]])
                 )
+                # The filters on the depth and the type of the edge are also applied at every step of the recursion
+                max_depth, link_types = self._get_recursive_join_options(self._filters[edge_tag])
                 aliased_edge = connection_func(toconnectwith, alias, isouterjoin=isouterjoin, filter_dict=filter_dict,
-                                               expand_path=expand_path)
+                                               expand_path=expand_path, max_depth=max_depth, link_types=link_types)
             else:
                 aliased_edge = connection_func(toconnectwith, alias, isouterjoin=isouterjoin)
             if aliased_edge is not None:
@@ -1709,6 +2044,10 @@ class QueryBuilder(object):
 
         ######################### FILTERS ##############################
 
+        recursive_edge_tags = set([
+            vertice['edge_tag'] for vertice in self._path
+            if vertice['joining_keyword'] in ('descendant_of', 'ancestor_of')
+        ])
         for tag, filter_specs in self._filters.items():
             try:
                 alias = self._tag_to_alias_map[tag]
@@ -1719,8 +2058,11 @@ class QueryBuilder(object):
                     'The tags I know are:\n{}'
                     ''.format(tag, self._tag_to_alias_map.keys())
                 )
+            if tag in recursive_edge_tags:
+                # The link types were applied by the recursive join, its edge has no type column
+                filter_specs = {key: value for key, value in filter_specs.items() if key != 'type'}
             self._query = self._query.filter(
-                self._build_filters(alias, filter_specs)
+                self._build_filters(alias, filter_specs, (tag,))
             )
 
         ######################### PROJECTIONS ##########################
@@ -1770,12 +2112,13 @@ class QueryBuilder(object):
                         self._build_order(alias, entitytag, entityspec)
 
         ######################### LIMIT ################################
+        # The limit and the offset are bind parameters, such that the query template can be reused for other values
         if self._limit is not None:
-            self._query = self._query.limit(self._limit)
+            self._query = self._query.limit(bindparam(_LIMIT_PARAM, value=self._limit, type_=Integer))
 
         ######################## OFFSET ################################
         if self._offset is not None:
-            self._query = self._query.offset(self._offset)
+            self._query = self._query.offset(bindparam(_OFFSET_PARAM, value=self._offset, type_=Integer))
 
         ################ LAST BUT NOT LEAST ############################
         # pop the entity that I added to start the query
@@ -1985,6 +2328,9 @@ class QueryBuilder(object):
             One row of results as a list
         """
         query = self.get_query()
+        if self._offset is not None:
+            # The query is sliced to get the first row, which needs the offset as an integer rather than as a bind parameter
+            query = query.offset(self._offset)
         resultrow = self._impl.first(query)
         try:
             returnval = [
@@ -2020,13 +2366,22 @@ class QueryBuilder(object):
             raise NotExistent("No result was found")
         return res[0]
 
-    def count(self):
+    def count(self, approximate=False):
         """
         Counts the number of rows returned by the backend.
 
+        :param bool approximate:
+            If True, return the number of rows estimated by the planner of PostgreSQL
+            from the statistics of the tables, without running the query. The estimate
+            is obtained in constant time, but can be far off, especially with filters
+            on attributes.
+
         :returns: the number of rows as an integer
         """
         query = self.get_query()
+        if approximate:
+            plan = query.session.execute(_Explain(query.statement)).scalar()
+            return int(plan[0]['Plan']['Plan Rows'])
         return self._impl.count(query)
 
     def iterall(self, batch_size=100):
@@ -2045,8 +2400,12 @@ class QueryBuilder(object):
         """
 
         query = self.get_query()
+        results = self._impl.iterall(query, batch_size, self._attrkeys_as_in_sql_result)
+
+        if self._prefetch:
+            results = self._iter_prefetched(results, batch_size, lambda row: row)
 
-        for item in self._impl.iterall(query, batch_size, self._attrkeys_as_in_sql_result):
+        for item in results:
             yield item
         return
 
@@ -2066,9 +2425,37 @@ class QueryBuilder(object):
         """
 
         query = self.get_query()
-        for item in self._impl.iterdict(query, batch_size, self.tag_to_projected_entity_dict):
+        results = self._impl.iterdict(query, batch_size, self.tag_to_projected_entity_dict)
+
+        if self._prefetch:
+            results = self._iter_prefetched(
+                results, batch_size,
+                lambda row: [value for projections in row.values() for value in projections.values()])
+
+        for item in results:
             yield item
 
+    def _iter_prefetched(self, results, batch_size, get_values):
+        """
+        Yield the results, prefetching the data of the nodes of each batch of results.
+
+        :param results: an iterable of results
+        :param int batch_size: the number of results for which the data is prefetched at once
+        :param get_values: a function returning the list of the values of a result
+        """
+        from itertools import islice
+
+        results = iter(results)
+        batch_size = batch_size or self._PREFETCH_BATCH_SIZE
+        while True:
+            batch = list(islice(results, batch_size))
+            if not batch:
+                return
+            nodes = [value for result in batch for value in get_values(result) if isinstance(value, Node)]
+            Node.prefetch(nodes, self._prefetch, batch_size=batch_size)
+            for result in batch:
+                yield result
+
     def all(self, batch_size=None):
         """
         Executes the full query with the order of the rows as returned by the backend.
@@ -2140,6 +2527,109 @@ class QueryBuilder(object):
         """
         return list(self.iterdict(batch_size=batch_size))
 
+    def iter_batches(self, batch_size=10000, as_arrays=False):
+        """
+        Executes the full query and returns the results in a columnar format, batch by batch.
+        The rows are streamed from the database with a server-side cursor, so only one batch
+        is held in memory at any time. This is much more efficient than :meth:`.iterdict`
+        when projecting many rows of columns or attributes, since no dictionary is created for
+        every row. The values are converted as by :meth:`.dict`, e.g. projected entities
+        (``'*'``) to AiiDA instances, one projection of the batch at a time.
+
+        :param int batch_size: the number of rows in each batch
+        :param bool as_arrays: if True, the columns are returned as NumPy arrays instead of lists
+
+        :returns:
+            a generator of dictionaries with the same structure as the ones returned by
+            :meth:`.dict`, where each value is the list (or array) of the values of that
+            projection for all the rows in the batch.
+
+        Usage::
+
+            qb = QueryBuilder()
+            qb.append(Data, project=['id', 'attributes.energy'], tag='data')
+            for batch in qb.iter_batches(batch_size=1000, as_arrays=True):
+                print batch['data']['attributes.energy'].mean()
+        """
+        query = self.get_query()
+        attrkeys = self._attrkeys_as_in_sql_result
+        only_entity = attrkeys.values() == ['*']
+
+        for rows in self._impl.iter_batches(query, batch_size):
+            if only_entity:
+                # If only one entity is projected the backend does not return tuples
+                columns = [rows]
+            else:
+                columns = zip(*rows)
+
+            columns = [
+                self._impl.get_aiida_res_column(attrkeys[index], list(column))
+                for index, column in enumerate(columns)
+            ]
+            if as_arrays:
+                columns = [self._get_column_array(column) for column in columns]
+
+            yield {
+                tag: {
+                    attrkey: columns[index_in_sql_result]
+                    for attrkey, index_in_sql_result in projected_entities_dict.items()
+                }
+                for tag, projected_entities_dict in self.tag_to_projected_entity_dict.items()
+            }
+
+    def to_arrays(self, batch_size=10000):
+        """
+        Executes the full query and returns all the results as NumPy arrays, one for each projection.
+        The rows are streamed from the database in batches, see :meth:`.iter_batches`.
+
+        :param int batch_size: the number of rows to fetch from the database at once
+
+        :returns:
+            a dictionary with the same structure as the ones returned by :meth:`.dict`, where
+            each value is the array of the values of that projection for all the rows.
+            Numerical columns give arrays of the corresponding numerical type, other columns
+            (or columns containing null values) give arrays of objects.
+        """
+        # Initialize the columns, such that arrays are returned also if there are no results
+        self.get_query()
+        columns = {
+            tag: {attrkey: [] for attrkey in projected_entities_dict}
+            for tag, projected_entities_dict in self.tag_to_projected_entity_dict.items()
+        }
+
+        for batch in self.iter_batches(batch_size=batch_size):
+            for tag, projected_columns in batch.items():
+                for attrkey, column in projected_columns.items():
+                    columns[tag][attrkey].extend(column)
+
+        return {
+            tag: {attrkey: self._get_column_array(column) for attrkey, column in projected_columns.items()}
+            for tag, projected_columns in columns.items()
+        }
+
+    @staticmethod
+    def _get_column_array(column):
+        """
+        Convert a list of values to a one-dimensional NumPy array, with one element per value.
+
+        :param column: a list of values
+        :returns: a numpy.ndarray of length len(column)
+        """
+        import numpy as np
+
+        try:
+            array = np.array(column)
+        except ValueError:
+            array = None
+
+        if array is None or array.ndim != 1:
+            # Values that are lists themselves (e.g. list attributes) are kept as objects
+            array = np.empty(len(column), dtype=object)
+            for index, value in enumerate(column):
+                array[index] = value
+
+        return array
+
     def get_results_dict(self):
         """
         Deprecated, use :meth:`.dict` instead
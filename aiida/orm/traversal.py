@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Traversal of the provenance graph inside the database.
+
+The nodes reachable from a set of nodes through links of given types are found with a single
+recursive query, rather than with one query per step of a breadth-first search. The pks of the
+starting nodes are passed as a single array parameter, and the pks of the reachable nodes are
+streamed from the database in batches::
+
+    from aiida.common.links import LinkType
+    from aiida.orm.traversal import get_linked_pks
+
+    descendants = get_linked_pks(pks, [LinkType.CREATE, LinkType.INPUT])
+    ancestors = get_linked_pks(pks, [LinkType.CREATE, LinkType.INPUT], direction='incoming')
+"""
+from aiida.common.links import LinkType
+
+__all__ = ['get_linked_pks', 'iter_linked_pks', 'get_linked_pks_query']
+
+# Number of pks fetched at once from the database
+TRAVERSAL_BATCH_SIZE = 10000
+
+_DIRECTIONS = ('outgoing', 'incoming')
+
+
+def get_linked_pks_query(link_class, pks, link_types, direction='outgoing'):
+    """
+    Return the recursive query of the pks of the given nodes and of all the nodes reachable from
+    them through links of the given types.
+
+    :param link_class: the (SQLAlchemy) class of the links
+    :param pks: the pks of the nodes to start from
+    :param link_types: the types of the links to follow
+    :param str direction: 'outgoing' to follow the links from their input to their output
+        (i.e. to find descendants), 'incoming' to follow them from their output to their input
+    :returns: a select statement with the column id
+    """
+    from sqlalchemy import bindparam, func, join, select
+    from sqlalchemy.dialects.postgresql import ARRAY
+    from sqlalchemy.types import Integer
+
+    if direction == 'outgoing':
+        source, target = link_class.input_id, link_class.output_id
+    elif direction == 'incoming':
+        source, target = link_class.output_id, link_class.input_id
+    else:
+        raise ValueError("direction must be one of {}, not '{}'".format(_DIRECTIONS, direction))
+
+    link_types = [LinkType(link_type).value for link_type in link_types]
+
+    seeds = select([
+        func.unnest(bindparam('traversal_pks', value=[int(pk) for pk in pks], type_=ARRAY(Integer))).label('id')
+    ])
+    closure = seeds.cte('traversal_closure', recursive=True)
+    # A UNION rather than a UNION ALL, such that every node is only visited once, even if
+    # it can be reached through several paths or the links that are followed form cycles
+    closure = closure.union(
+        select([target.label('id')]).select_from(
+            join(closure, link_class.__table__, source == closure.c.id)
+        ).where(link_class.type.in_(link_types))
+    )
+    return select([closure.c.id])
+
+
+def iter_linked_pks(pks, link_types, direction='outgoing', batch_size=TRAVERSAL_BATCH_SIZE):
+    """
+    Iterate over the pks of the given nodes and of all the nodes reachable from them through links
+    of the given types, in no particular order. The graph is traversed by a single recursive query,
+    whose results are streamed from the database.
+
+    :param pks: the pks of the nodes to start from
+    :param link_types: the types of the links to follow, as values or members of
+        :py:class:`~aiida.common.links.LinkType`
+    :param str direction: 'outgoing' to follow the links from their input to their output
+        (i.e. to find descendants), 'incoming' to follow them from their output to their input
+    :param int batch_size: the number of pks fetched at once from the database
+    :returns: a generator of pks
+    """
+    from aiida.backends.utils import get_querybuilder_impl
+
+    pks = list(pks)
+    if not pks:
+        return
+
+    impl = get_querybuilder_impl()
+    query = get_linked_pks_query(impl.Link, pks, link_types, direction=direction)
+    session = impl.get_session()
+    result = session.execute(query.execution_options(stream_results=True))
+    try:
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            for pk, in rows:
+                yield pk
+    finally:
+        result.close()
+
+
+def get_linked_pks(pks, link_types, direction='outgoing'):
+    """
+    Return the set of the pks of the given nodes and of all the nodes reachable from them through
+    links of the given types, see :py:func:`iter_linked_pks`.
+
+    :param pks: the pks of the nodes to start from
+    :param link_types: the types of the links to follow
+    :param str direction: 'outgoing' to find descendants, 'incoming' to find ancestors
+    :returns: a set of pks
+    """
+    return set(iter_linked_pks(pks, link_types, direction=direction))
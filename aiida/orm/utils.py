@@ -12,8 +12,8 @@ from aiida.common.exceptions import InputValidationError, MultipleObjectsError,
 from aiida.plugins.factory import BaseFactory
 from aiida.common.utils import abstractclassmethod
 
-__all__ = ['CalculationFactory', 'DataFactory', 'WorkflowFactory', 'load_group', 
-           'load_node', 'load_workflow', 'BackendDelegateWithDefault']
+__all__ = ['CalculationFactory', 'DataFactory', 'WorkflowFactory', 'load_group',
+           'load_node', 'load_workflow', 'find_same_nodes', 'BackendDelegateWithDefault']
 
 
 def CalculationFactory(entry_point):
@@ -83,7 +83,7 @@ def create_node_id_qb(node_id=None, pk=None, uuid=None, parent_class=None, query
     if node_id is not None:
         if isinstance(node_id, (str, unicode)):
             uuid = node_id
-        elif isinstance(node_id, int):
+        elif isinstance(node_id, (int, long)):
             pk = node_id
         else:
             raise TypeError("'node_id' has to be either string, unicode or "
@@ -95,7 +95,7 @@ def create_node_id_qb(node_id=None, pk=None, uuid=None, parent_class=None, query
             raise TypeError("'uuid' has to be string or unicode")
     # Or whether the pk, if provided, is an integer
     elif pk is not None:
-        if not isinstance(pk, int):
+        if not isinstance(pk, (int, long)):
             raise TypeError("'pk' has to be an integer")
     else:
         # I really shouldn't get here
@@ -178,6 +178,7 @@ def load_node(node_id=None, pk=None, uuid=None, parent_class=None, query_with_da
 
     """
     from aiida.orm.implementation import Node
+    from aiida.orm.identity_map import get_node_identity_map
 
     # I can use this functions to load only nodes, i.e. not users, groups etc ...
     # If nothing is specified I assume the big granpa: Node!
@@ -185,6 +186,20 @@ def load_node(node_id=None, pk=None, uuid=None, parent_class=None, query_with_da
     if not issubclass(class_,  Node):
         raise TypeError("{} is not a subclass of {}".format(class_, Node))
 
+    # Only a pk or a full UUID identify a node without querying the DB
+    identity_map = get_node_identity_map()
+    if identity_map is not None:
+        lookup_pk, lookup_uuid = pk, uuid
+        if isinstance(node_id, (int, long)):
+            lookup_pk = node_id
+        elif isinstance(node_id, basestring):
+            lookup_uuid = node_id
+        if isinstance(lookup_pk, (int, long)) or (isinstance(lookup_uuid, basestring) and
+                                          len(lookup_uuid.replace('-', '')) == 32):
+            node = identity_map.get(pk=lookup_pk, uuid=lookup_uuid)
+            if isinstance(node, class_):
+                return node
+
     kwargs = {
         'node_id': node_id,
         'pk': pk,
@@ -198,12 +213,47 @@ def load_node(node_id=None, pk=None, uuid=None, parent_class=None, query_with_da
     qb.limit(2)
 
     try:
-        return qb.one()[0]
+        node = qb.one()[0]
     except MultipleObjectsError:
         raise MultipleObjectsError('More than one node found. Provide longer starting pattern for uuid.')
     except NotExistent:
         raise NotExistent('No node was found')
 
+    if identity_map is not None:
+        identity_map.add(node)
+    return node
+
+
+def find_same_nodes(nodes):
+    """
+    Find, for each of the given nodes, a stored node of the same class and with the same hash from
+    which it can be cached, like :py:meth:`~aiida.orm.implementation.general.node.AbstractNode._get_same_node`
+    does for a single node, but with a single query on the indexed hash column for all the nodes.
+
+    :param nodes: a list of nodes
+    :returns: a list with, for each node, a stored node that is a valid cache for it, or None
+    """
+    from aiida.orm.implementation import Node
+    from aiida.orm.querybuilder import QueryBuilder
+
+    hashes = [node.get_hash() if node._cacheable else None for node in nodes]
+    wanted = set((node._plugin_type_string, hash_) for node, hash_ in zip(nodes, hashes) if hash_)
+
+    matches = {}
+    if wanted:
+        qb = QueryBuilder()
+        qb.append(Node, filters={
+            'hash': {'in': sorted(set(hash_ for _, hash_ in wanted))},
+            'type': {'in': sorted(set(type_string for type_string, _ in wanted))},
+        }, project=['*', 'type', 'hash'])
+
+        for same_node, type_string, hash_ in qb.iterall():
+            key = (type_string, hash_)
+            if key in wanted and key not in matches and same_node._is_valid_cache():
+                matches[key] = same_node
+
+    return [matches.get((node._plugin_type_string, hash_)) if hash_ else None for node, hash_ in zip(nodes, hashes)]
+
 
 def load_workflow(wf_id=None, pk=None, uuid=None):
     """
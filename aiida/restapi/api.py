@@ -92,10 +92,22 @@ class AiidaApi(Api):
         from aiida.restapi.resources import Calculation, Computer, User, Code, Data, \
             Group, Node, StructureData, KpointsData, BandsData, UpfData, CifData, ServerInfo
 
+        from aiida.restapi.common.cache import cache_response, get_response_cache
+
         self.app = app
 
         super(AiidaApi, self).__init__(app=app, prefix=kwargs['PREFIX'], catch_all_404s=True)
 
+        # Serve the responses of the get methods of the resources from the cache, if any
+        self.cache = get_response_cache(kwargs.pop('CACHE_CONFIG', None),
+                                        kwargs.pop('CACHING_TIMEOUTS', None))
+        if self.cache is not None:
+            kwargs['get_decorators'] = list(kwargs.get('get_decorators', [])) + [cache_response(self.cache)]
+
+        # Find the translators of the node types now, rather than at the first request
+        from aiida.restapi.translator.node import NodeTranslator
+        for translator in NodeTranslator.get_subclasses().values():
+            translator.get_subclasses()
 
         self.add_resource(ServerInfo,
                           "/server/",
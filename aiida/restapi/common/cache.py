@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Cache of the responses of the REST API.
+
+The responses of the GET requests are cached with a key built from the normalized
+path and query string of the request, for a time that depends on the resource
+(see CACHING_TIMEOUTS in the configuration). The cached responses carry an ETag,
+such that a client sending it back in an If-None-Match header gets a
+304 Not Modified response without body.
+
+The cache is made of an in-process LRU cache and, optionally, of a cache in a
+directory of the filesystem, which is shared by the processes of the server.
+"""
+import cPickle
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import namedtuple
+from functools import wraps
+
+from aiida.common.lru import LRUCache
+
+_LOGGER = logging.getLogger(__name__)
+
+# The entry of a cached response: the body is a byte string, the headers a list of (name, value)
+CachedResponse = namedtuple('CachedResponse', ['status', 'headers', 'body', 'etag', 'expires'])
+
+# The query types whose responses only depend on the (immutable) content of a stored node
+IMMUTABLE_QUERY_TYPES = ('download', 'visualization')
+
+# The key of CACHING_TIMEOUTS for the responses of IMMUTABLE_QUERY_TYPES
+IMMUTABLE_TIMEOUT_KEY = 'immutable'
+
+
+class LRUCacheBackend(object):
+    """
+    An in-process cache, bounded by the number of entries and by the total size of the
+    bodies, which evicts the least recently used entries first.
+    """
+
+    def __init__(self, max_entries=1000, max_size=64 * 1024 * 1024):
+        """
+        :param max_entries: the maximum number of entries
+        :param max_size: the maximum total size of the bodies of the entries, in bytes
+        """
+        self.max_size = max_size
+        self._entries = LRUCache(max_entries, max_size=max_size)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, entry):
+        if len(entry.body) > self.max_size:
+            return
+        self._entries.set(key, entry, size=len(entry.body))
+
+    def delete(self, key):
+        self._entries.pop(key)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class FileSystemCacheBackend(object):
+    """
+    A cache in a directory of the filesystem, with one file per entry, which can be shared
+    by several processes. The expired entries are removed when they are read.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: the directory of the cache, created if it does not exist
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def _get_filename(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._get_filename(key), 'rb') as handle:
+                return cPickle.load(handle)
+        except (IOError, OSError, EOFError, cPickle.UnpicklingError):
+            return None
+
+    def set(self, key, entry):
+        # Write to a temporary file and rename it, such that other processes never read a partial entry
+        handle, filename = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as fileobj:
+                cPickle.dump(entry, fileobj, cPickle.HIGHEST_PROTOCOL)
+            os.rename(filename, self._get_filename(key))
+        except (IOError, OSError):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def delete(self, key):
+        try:
+            os.remove(self._get_filename(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+
+
+class ResponseCache(object):
+    """
+    A cache of responses with a time to live, looked up in a list of backends in order:
+    an entry found in a backend is copied to the previous ones.
+    """
+
+    def __init__(self, backends, timeouts=None):
+        """
+        :param backends: the list of backends, from the fastest to the slowest
+        :param timeouts: a dictionary with the time to live of the responses of each
+            resource, in seconds; resources that are not in it are not cached
+        """
+        self.backends = list(backends)
+        self.timeouts = dict(timeouts or {})
+
+    def get(self, key):
+        """
+        Return the entry with the given key, or None if there is none or it has expired.
+        """
+        now = time.time()
+        for index, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is None:
+                continue
+            if entry.expires <= now:
+                backend.delete(key)
+                continue
+            for previous_backend in self.backends[:index]:
+                previous_backend.set(key, entry)
+            return entry
+        return None
+
+    def set(self, key, entry):
+        for backend in self.backends:
+            backend.set(key, entry)
+
+    def delete(self, key):
+        for backend in self.backends:
+            backend.delete(key)
+
+    def clear(self):
+        """
+        Remove all the entries from all the backends.
+        """
+        for backend in self.backends:
+            backend.clear()
+
+    def get_timeout(self, resource_type, query_type=None):
+        """
+        Return the time to live of the responses of a resource.
+
+        :param resource_type: the resource, e.g. 'nodes' or 'structures'
+        :param query_type: the last field of the path, e.g. 'download'
+        :return: the time to live in seconds, 0 if the responses are not cached
+        """
+        if query_type in IMMUTABLE_QUERY_TYPES and IMMUTABLE_TIMEOUT_KEY in self.timeouts:
+            return self.timeouts[IMMUTABLE_TIMEOUT_KEY]
+        return self.timeouts.get(resource_type, 0)
+
+
+def get_response_cache(cache_config, timeouts):
+    """
+    Return the response cache described by a configuration.
+
+    :param cache_config: a dictionary with the keys 'CACHE_TYPE' (None to disable the cache,
+        'lru' or 'filesystem', the latter being used behind an LRU cache), 'CACHE_MAX_ENTRIES',
+        'CACHE_MAX_SIZE' (for the LRU cache) and 'CACHE_DIR' (for the filesystem cache)
+    :param timeouts: the time to live of the responses of each resource, in seconds
+    :return: a :py:class:`ResponseCache`, or None if the cache is disabled or its type is unknown
+    """
+    cache_config = cache_config or {}
+    cache_type = cache_config.get('CACHE_TYPE')
+
+    if not cache_type:
+        return None
+    if cache_type not in ('lru', 'filesystem'):
+        # E.g. the 'memcached' type of the configurations of former versions
+        _LOGGER.warning("Unknown CACHE_TYPE '{}', it must be 'lru' or 'filesystem': "
+                        "the responses are not cached".format(cache_type))
+        return None
+
+    backends = [LRUCacheBackend(
+        max_entries=cache_config.get('CACHE_MAX_ENTRIES', 1000),
+        max_size=cache_config.get('CACHE_MAX_SIZE', 64 * 1024 * 1024))]
+    if cache_type == 'filesystem':
+        if not cache_config.get('CACHE_DIR'):
+            raise ValueError("CACHE_DIR must be set for the 'filesystem' CACHE_TYPE")
+        backends.append(FileSystemCacheBackend(cache_config['CACHE_DIR']))
+
+    return ResponseCache(backends, timeouts=timeouts)
+
+
+def get_cache_key(url_root, path, query_string):
+    """
+    Return the key of the response to a request: the path without trailing slashes
+    and the fields of the query string in a fixed order, without the '_' field that
+    JQuery adds to prevent caching.
+    """
+    from urllib import unquote
+
+    path = unquote(path).rstrip('/')
+    fields = sorted(field for field in unquote(query_string).split('&')
+                    if field and field != '_' and not field.startswith('_='))
+    return '{}{}?{}'.format(url_root.rstrip('/'), path, '&'.join(fields))
+
+
+def cache_response(cache):
+    """
+    Return a decorator of the get methods of the resources that serves the responses
+    from the cache, and stores the successful responses that are not in it.
+
+    :param cache: a :py:class:`ResponseCache`
+    """
+
+    def decorator(method):
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            from flask import request, make_response
+
+            segments = [segment for segment in request.path.split('/') if segment]
+            query_type = segments[-1] if segments else None
+            if 'id' not in (request.view_args or {}):
+                query_type = None
+            timeout = cache.get_timeout(request.endpoint, query_type)
+            if not timeout:
+                return method(*args, **kwargs)
+
+            key = get_cache_key(request.url_root, request.path, request.query_string)
+            entry = cache.get(key)
+
+            if entry is None:
+                response = make_response(method(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                entry = CachedResponse(
+                    status=response.status_code,
+                    headers=[(name, value) for name, value in response.headers
+                             if name.lower() not in ('content-length', 'etag', 'cache-control')],
+                    body=body,
+                    etag=hashlib.md5(body).hexdigest(),
+                    expires=time.time() + timeout)
+                cache.set(key, entry)
+            else:
+                response = make_response(entry.body, entry.status, entry.headers)
+
+            response.set_etag(entry.etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = max(int(entry.expires - time.time()), 0)
+            # Turn the response into a 304 Not Modified one if the client has it already
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
@@ -44,19 +44,40 @@ DATETIME_FORMAT: allowed values are 'asinput' and 'default'.
 SERIALIZER_CONFIG = {'datetime_format': 'default'}
 
 """
-Caching configuration
-
-memcached: backend caching system
+Caching configuration of the responses (see aiida.restapi.common.cache)
+
+CACHE_TYPE: None to disable the cache, 'lru' for an in-process cache, or
+'filesystem' for an in-process cache backed by a directory shared by the
+processes of the server.
+CACHE_MAX_ENTRIES, CACHE_MAX_SIZE: the bounds of the in-process cache (number of
+responses and total size in bytes).
+CACHE_DIR: the directory of the 'filesystem' cache.
+
+CACHING_TIMEOUTS: the time to live of the responses of each resource, in
+seconds. Resources that are not listed, or with a timeout of 0, are not cached.
+The 'immutable' timeout applies to the download and visualization of nodes,
+which only depend on the content of the stored node.
 """
-cache_config={'CACHE_TYPE': 'memcached'}
+cache_config = {
+    'CACHE_TYPE': 'lru',
+    'CACHE_MAX_ENTRIES': 1000,
+    'CACHE_MAX_SIZE': 64 * 1024 * 1024,
+    'CACHE_DIR': None,
+}
 CACHING_TIMEOUTS = { #Caching TIMEOUTS (in seconds)
     'nodes': 10,
     'users': 10,
     'calculations': 10,
     'computers': 10,
-    'datas': 10,
+    'data': 10,
     'groups': 10,
     'codes': 10,
+    'structures': 10,
+    'kpoints': 10,
+    'bands': 10,
+    'upfs': 10,
+    'cifs': 10,
+    'immutable': 24 * 3600,
 }
 
 """
@@ -73,9 +94,20 @@ try:
 except IOError:
     custom_schema = {}
 
-# IO tree
+# IO tree: default and maximum number of levels of inputs and outputs
+# returned around a node (/nodes/<id>/io/tree)
+DEFAULT_TREE_DEPTH = 1
 MAX_TREE_DEPTH = 5
 
+# Node statistics: if True, the statistics of node creation are read from the
+# materialized statistics table rather than aggregated over all the nodes.
+# The table is refreshed incrementally by a request at most once every
+# NODE_STATISTICS_REFRESH_INTERVAL seconds. If None, the API only reads it (e.g.
+# with a read-only database role), and it has to be refreshed by other means with
+# QueryFactory()().refresh_creation_statistics()
+NODE_STATISTICS_MATERIALIZED = False
+NODE_STATISTICS_REFRESH_INTERVAL = 300
+
 """
 Aiida profile used by the REST api when no profile is specified (ex. by
 --aiida-profile flag).
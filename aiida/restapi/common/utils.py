@@ -20,6 +20,10 @@ from aiida.restapi.common.exceptions import RestValidationError, \
 pk_dbsynonym = 'id'
 # Example uuid (version 4)
 uuid_ref = 'd55082b6-76dc-426b-af89-0e08b59524d2'
+# Value of the cursor field of the query string that requests the first page of a keyset pagination
+CURSOR_START = 'start'
+# Allowed values of the count field of the query string
+COUNT_MODES = ('exact', 'approximate')
 
 
 ########################## Classes #####################
@@ -233,7 +237,7 @@ class Utils(object):
                 return (resource_type, page, id, query_type)
 
     def validate_request(self, limit=None, offset=None, perpage=None, page=None,
-                         query_type=None, is_querystring_defined=False):
+                         query_type=None, is_querystring_defined=False, cursor=None):
         """
         Performs various checks on the consistency of the request.
         Add here all the checks that you want to do, except validity of the page
@@ -260,6 +264,10 @@ class Utils(object):
         if query_type in ('schema') and is_querystring_defined:
             raise RestInputValidationError("schema requests do not allow "
                                            "specifying a query string")
+        # 5. cursor (keyset pagination) is incompatible with pages and offset
+        if cursor is not None and (page is not None or perpage is not None or offset is not None):
+            raise RestValidationError("cursor key is incompatible with "
+                                      "offset, perpage and /page/ in the path")
 
 
     def paginate(self, page, perpage, total_count):
@@ -331,13 +339,58 @@ class Utils(object):
 
         return (limit, offset, rel_pages)
 
-    def build_headers(self, rel_pages=None, url=None, total_count=None):
+    def parse_tree_filters(self, filters):
+        """
+        Extracts the parameters of a provenance tree request from the filters
+        of its query string, e.g. depth=2&link_type=in="createlink","inputlink"
+
+        :param filters: the filters as returned by parse_query_string
+        :return: depth (None if not given), link_types (list of link types, or
+            None if not given)
+        """
+        filters = dict(filters)
+        depth = None
+        link_types = None
+
+        if 'depth' in filters:
+            depth = filters.pop('depth')
+            if depth.keys() != ['=='] or not isinstance(depth['=='], int) \
+                    or isinstance(depth['=='], bool):
+                raise RestInputValidationError("depth must be assigned an "
+                                               "integer with '='")
+            depth = depth['==']
+
+        if 'link_type' in filters:
+            link_types = filters.pop('link_type')
+            if len(link_types) != 1 or link_types.keys()[0] not in ('==', 'in'):
+                raise RestInputValidationError("only the operators '=' and "
+                                               "'=in=' are permitted after "
+                                               "'link_type'")
+            link_types = link_types.values()[0]
+            if isinstance(link_types, basestring):
+                link_types = [link_types]
+            else:
+                link_types = list(link_types)
+
+        if filters:
+            raise RestInputValidationError("the tree only accepts the depth "
+                                           "and link_type fields, not {}".format(
+                ", ".join(filters.keys())))
+
+        return (depth, link_types)
+
+    def build_headers(self, rel_pages=None, url=None, total_count=None, next_cursor=None,
+                      approximate_count=False):
         """
         Construct the header dictionary for an HTTP response. It includes related
         pages, total count of results (before pagination).
 
         :param rel_pages: a dictionary defining related pages (first, prev, next, last)
         :param url: (string) the full url, i.e. the url that the client uses to get Rest resources
+        :param next_cursor: the cursor of the next page of a keyset pagination, linked as
+            the 'next' relation with the cursor field of the query string replaced
+        :param approximate_count: whether total_count is an estimate, signalled by
+            the X-Total-Count-Approximate header
         """
 
         ## Type validation
@@ -362,6 +415,9 @@ class Utils(object):
         if rel_pages is not None and url is None:
             raise InputValidationError("'rel_pages' parameter requires 'url' "
                                        "parameter to be defined")
+        if next_cursor is not None and url is None:
+            raise InputValidationError("'next_cursor' parameter requires 'url' "
+                                       "parameter to be defined")
 
         headers = {}
 
@@ -369,6 +425,9 @@ class Utils(object):
         # set X-Total-Count
         headers['X-Total-Count'] = total_count
         expose_header = ["X-Total-Count"]
+        if approximate_count:
+            headers['X-Total-Count-Approximate'] = 'true'
+            expose_header.append("X-Total-Count-Approximate")
 
         ## Two auxiliary functions
         def split_url(url):
@@ -402,6 +461,15 @@ class Utils(object):
             else:
                 pass
 
+        # set link to the next page of a keyset pagination
+        if next_cursor is not None:
+            (path, query_string, question_mark) = split_url(url)
+            fields = [field for field in query_string.split('&')
+                      if field and not field.startswith('cursor=')]
+            fields.append('cursor=' + next_cursor)
+            headers['Link'] = '<{}?{}>; rel=next, '.format(path, '&'.join(fields))
+            expose_header.append("Link")
+
         # to expose header access in cross-domain requests
         headers['Access-Control-Expose-Headers'] = ','.join(expose_header)
 
@@ -508,6 +576,8 @@ class Utils(object):
         visformat = None
         filename = None
         rtype = None
+        cursor = None
+        count = None
 
         ## Count how many time a key has been used for the filters and check if
         # reserved keyword
@@ -575,6 +645,14 @@ class Utils(object):
             raise RestInputValidationError(
                 "You cannot specify rtype more than "
                 "once")
+        if 'cursor' in field_counts.keys() and field_counts['cursor'] > 1:
+            raise RestInputValidationError(
+                "You cannot specify cursor more than "
+                "once")
+        if 'count' in field_counts.keys() and field_counts['count'] > 1:
+            raise RestInputValidationError(
+                "You cannot specify count more than "
+                "once")
 
         ## Extract results
         for field in field_list:
@@ -675,6 +753,25 @@ class Utils(object):
                         "only assignment operator '=' "
                         "is permitted after 'rtype'")
 
+            elif field[0] == 'cursor':
+                if field[1] == '=':
+                    cursor = field[2]
+                else:
+                    raise RestInputValidationError(
+                        "only assignment operator '=' "
+                        "is permitted after 'cursor'")
+
+            elif field[0] == 'count':
+                if field[1] == '=':
+                    count = field[2]
+                else:
+                    raise RestInputValidationError(
+                        "only assignment operator '=' "
+                        "is permitted after 'count'")
+                if count not in COUNT_MODES:
+                    raise RestInputValidationError(
+                        "count must be one of {}".format(", ".join(COUNT_MODES)))
+
             else:
 
                 ## Construct the filter entry.
@@ -707,7 +804,7 @@ class Utils(object):
         #     limit = self.LIMIT_DEFAULT
 
         return (limit, offset, perpage, orderby, filters, alist, nalist, elist,
-                nelist, downloadformat, visformat, filename, rtype)
+                nelist, downloadformat, visformat, filename, rtype, cursor, count)
 
     def parse_query_string(self, query_string):
         """
@@ -883,3 +980,60 @@ def list_routes():
 
     return sorted(set(output))
     
+
+
+def get_keyset_order(orderby=None):
+    """
+    Return the columns and the direction of the order of a keyset pagination, which
+    can be by id, or by ctime and then id.
+
+    :param orderby: the list of signed columns of the orderby field of the query string,
+        e.g. ['-ctime'], by default the results are ordered by ascending id
+    :return: a tuple (columns, descending)
+    """
+    orderby = list(orderby or ['id'])
+    columns = [column.lstrip('+-') for column in orderby]
+    columns = [pk_dbsynonym if column == 'pk' else column for column in columns]
+    directions = set(column.startswith('-') for column in orderby)
+
+    if len(directions) > 1 or columns not in (['id'], ['ctime'], ['ctime', 'id']):
+        raise RestInputValidationError("cursor requires the results to be ordered "
+                                       "by id, or by ctime (and id), in a single "
+                                       "direction")
+    if columns == ['ctime']:
+        columns.append('id')
+
+    return columns, directions.pop()
+
+
+def encode_cursor(columns, descending, values):
+    """
+    Return the opaque cursor of a keyset pagination, which continues after the row
+    with the given values of the columns of the order.
+    """
+    import binascii
+    import json
+
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return 'k' + binascii.hexlify(json.dumps([columns, descending, values]))
+
+
+def decode_cursor(cursor, columns, descending):
+    """
+    Return the values of the columns of the order encoded in a cursor.
+
+    :raise RestInputValidationError: if the cursor is invalid, or was not generated for
+        the given order
+    """
+    import binascii
+    import json
+    from dateutil import parser as dtparser
+
+    try:
+        cursor_columns, cursor_descending, values = json.loads(binascii.unhexlify(str(cursor)[1:]))
+    except (TypeError, ValueError):
+        raise RestInputValidationError("invalid cursor")
+    if cursor_columns != columns or cursor_descending != descending or len(values) != len(columns):
+        raise RestInputValidationError("the cursor does not match the order of the results")
+
+    return [dtparser.parse(value) if column == 'ctime' else value for column, value in zip(columns, values)]
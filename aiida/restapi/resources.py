@@ -81,8 +81,6 @@ class ServerInfo(Resource):
         return self.utils.build_response(status=200, headers=headers, data=data)
 
 
-## TODO add the caching support. I cache total count, results, and possibly
-# set_query
 class BaseResource(Resource):
     """
     Each derived class will instantiate a different type of translator.
@@ -118,7 +116,7 @@ class BaseResource(Resource):
         ## Parse request
         (resource_type, page, id, query_type) = self.utils.parse_path(path, parse_pk_uuid=self.parse_pk_uuid)
         (limit, offset, perpage, orderby, filters, _alist, _nalist, _elist, _nelist, _downloadformat, _visformat,
-         _filename, _rtype) = self.utils.parse_query_string(query_string)
+         _filename, _rtype, cursor, count) = self.utils.parse_query_string(query_string)
 
         ## Validate request
         self.utils.validate_request(
@@ -127,7 +125,8 @@ class BaseResource(Resource):
             perpage=perpage,
             page=page,
             query_type=query_type,
-            is_querystring_defined=(bool(query_string)))
+            is_querystring_defined=(bool(query_string)),
+            cursor=cursor)
 
         ## Treat the schema case which does not imply access to the DataBase
         if query_type == 'schema':
@@ -142,19 +141,29 @@ class BaseResource(Resource):
             self.trans.set_query(filters=filters, orders=orderby, id=id)
 
             ## Count results
-            total_count = self.trans.get_total_count()
+            approximate_count = (count == 'approximate')
+            total_count = self.trans.get_total_count(approximate=approximate_count)
 
             ## Pagination (if required)
             if page is not None:
                 (limit, offset, rel_pages) = self.utils.paginate(page, perpage, total_count)
                 self.trans.set_limit_offset(limit=limit, offset=offset)
-                headers = self.utils.build_headers(rel_pages=rel_pages, url=request.url, total_count=total_count)
+                results = self.trans.get_results()
+                headers = self.utils.build_headers(
+                    rel_pages=rel_pages, url=request.url, total_count=total_count, approximate_count=approximate_count)
+            elif cursor is not None:
+                self.trans.set_keyset(cursor, orderby=orderby, limit=limit or self.utils.PERPAGE_DEFAULT)
+                results = self.trans.get_results()
+                headers = self.utils.build_headers(
+                    url=request.url,
+                    total_count=total_count,
+                    next_cursor=self.trans.get_next_cursor(),
+                    approximate_count=approximate_count)
             else:
                 self.trans.set_limit_offset(limit=limit, offset=offset)
-                headers = self.utils.build_headers(url=request.url, total_count=total_count)
-
-            ## Retrieve results
-            results = self.trans.get_results()
+                results = self.trans.get_results()
+                headers = self.utils.build_headers(
+                    url=request.url, total_count=total_count, approximate_count=approximate_count)
 
         ## Build response and return it
         data = dict(
@@ -211,7 +220,7 @@ class Node(Resource):
         (resource_type, page, id, query_type) = self.utils.parse_path(path, parse_pk_uuid=self.parse_pk_uuid)
 
         (limit, offset, perpage, orderby, filters, alist, nalist, elist, nelist, downloadformat, visformat, filename,
-         rtype) = self.utils.parse_query_string(query_string)
+         rtype, cursor, count) = self.utils.parse_query_string(query_string)
 
         ## Validate request
         self.utils.validate_request(
@@ -220,7 +229,8 @@ class Node(Resource):
             perpage=perpage,
             page=page,
             query_type=query_type,
-            is_querystring_defined=(bool(query_string)))
+            is_querystring_defined=(bool(query_string)),
+            cursor=cursor)
 
         ## Treat the schema case which does not imply access to the DataBase
         if query_type == 'schema':
@@ -234,7 +244,7 @@ class Node(Resource):
         ## Treat the statistics
         elif query_type == "statistics":
             (limit, offset, perpage, orderby, filters, alist, nalist, elist, nelist, downloadformat, visformat,
-             filename, rtype) = self.utils.parse_query_string(query_string)
+             filename, rtype, cursor, count) = self.utils.parse_query_string(query_string)
             headers = self.utils.build_headers(url=request.url, total_count=0)
             if filters:
                 usr = filters["user"]["=="]
@@ -242,10 +252,10 @@ class Node(Resource):
                 usr = []
             results = self.trans.get_statistics(usr)
 
-        # TODO Might need to be improved
         elif query_type == "tree":
+            (depth, link_types) = self.utils.parse_tree_filters(filters)
             headers = self.utils.build_headers(url=request.url, total_count=0)
-            results = self.trans.get_io_tree(id)
+            results = self.trans.get_io_tree(id, depth=depth, link_types=link_types)
         else:
             ## Initialize the translator
             self.trans.set_query(
@@ -263,7 +273,8 @@ class Node(Resource):
                 rtype=rtype)
 
             ## Count results
-            total_count = self.trans.get_total_count()
+            approximate_count = (count == 'approximate')
+            total_count = self.trans.get_total_count(approximate=approximate_count)
 
             ## Pagination (if required)
             if page is not None:
@@ -273,7 +284,19 @@ class Node(Resource):
                 ## Retrieve results
                 results = self.trans.get_results()
 
-                headers = self.utils.build_headers(rel_pages=rel_pages, url=request.url, total_count=total_count)
+                headers = self.utils.build_headers(
+                    rel_pages=rel_pages, url=request.url, total_count=total_count, approximate_count=approximate_count)
+            elif cursor is not None:
+                self.trans.set_keyset(cursor, orderby=orderby, limit=limit or self.utils.PERPAGE_DEFAULT)
+
+                ## Retrieve results
+                results = self.trans.get_results()
+
+                headers = self.utils.build_headers(
+                    url=request.url,
+                    total_count=total_count,
+                    next_cursor=self.trans.get_next_cursor(),
+                    approximate_count=approximate_count)
             else:
 
                 self.trans.set_limit_offset(limit=limit, offset=offset)
@@ -311,7 +334,8 @@ class Node(Resource):
                     elif status == 500:
                         results = results[query_type]["data"]
 
-                headers = self.utils.build_headers(url=request.url, total_count=total_count)
+                headers = self.utils.build_headers(
+                    url=request.url, total_count=total_count, approximate_count=approximate_count)
 
         ## Build response
         data = dict(
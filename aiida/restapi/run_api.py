@@ -175,10 +175,19 @@ def run_api(App, Api, *args, **kwargs):
                                           restrictions=[30])
 
     # Instantiate an Api by associating its app
+    from aiida.restapi.common import config as default_confs
     api_kwargs = dict(PREFIX=confs.PREFIX,
                       PERPAGE_DEFAULT=confs.PERPAGE_DEFAULT,
                       LIMIT_DEFAULT=confs.LIMIT_DEFAULT,
-                      custom_schema=confs.custom_schema)
+                      custom_schema=confs.custom_schema,
+                      CACHE_CONFIG=getattr(confs, 'cache_config', None),
+                      CACHING_TIMEOUTS=getattr(confs, 'CACHING_TIMEOUTS', None),
+                      DEFAULT_TREE_DEPTH=getattr(confs, 'DEFAULT_TREE_DEPTH', default_confs.DEFAULT_TREE_DEPTH),
+                      MAX_TREE_DEPTH=getattr(confs, 'MAX_TREE_DEPTH', default_confs.MAX_TREE_DEPTH),
+                      NODE_STATISTICS_MATERIALIZED=getattr(confs, 'NODE_STATISTICS_MATERIALIZED',
+                                                           default_confs.NODE_STATISTICS_MATERIALIZED),
+                      NODE_STATISTICS_REFRESH_INTERVAL=getattr(confs, 'NODE_STATISTICS_REFRESH_INTERVAL',
+                                                               default_confs.NODE_STATISTICS_REFRESH_INTERVAL))
     api = Api(app, **api_kwargs)
 
     # Check if the app has to be hooked-up or just returned
@@ -43,6 +43,7 @@ class BaseTranslator(object):
     _is_qb_initialized = False
     _is_id_query = None
     _total_count = None
+    _is_count_approximate = False
 
     def __init__(self, Class=None, **kwargs):
         """
@@ -73,6 +74,14 @@ class BaseTranslator(object):
         self._is_qb_initialized = Class._is_qb_initialized
         self._is_id_query = Class._is_id_query
         self._total_count = Class._total_count
+        self._is_count_approximate = Class._is_count_approximate
+
+        # Columns of the order of a keyset pagination, their values in the
+        # last result and the columns only projected to build the cursor
+        self._keyset = None
+        self._keyset_limit = None
+        self._next_cursor = None
+        self._keyset_extra_projections = []
 
         # Basic filter (dict) to set the identity of the uuid. None if
         #  no specific node is requested
@@ -213,38 +222,31 @@ class BaseTranslator(object):
         self.qb.__init__(**self._query_help)
         self._is_qb_initialized = True
 
-    def count(self):
+    def count(self, approximate=False):
         """
         Count the number of rows returned by the query and set total_count
+
+        :param approximate: if True, take the estimate of the query planner
+            rather than counting the rows, see QueryBuilder.count
         """
         if self._is_qb_initialized:
-            self._total_count = self.qb.count()
+            self._total_count = self.qb.count(approximate=approximate)
+            self._is_count_approximate = approximate
         else:
             raise InvalidOperation("query builder object has not been "
                                    "initialized.")
 
-            # def caching_method(self):
-            #     """
-            #     class method for caching. It is a wrapper of the
-            # flask_cache memoize
-            #     method. To be used as a decorator
-            #     :return: the flask_cache memoize method with the timeout kwarg
-            #     corrispondent to the class
-            #     """
-            #     return cache.memoize()
-            #
-
-            #    @cache.memoize(timeout=CACHING_TIMEOUTS[self.__label__])
-
-    def get_total_count(self):
+    def get_total_count(self, approximate=False):
         """
         Returns the number of rows of the query.
 
+        :param approximate: if True, return an estimate of the number of rows,
+            which does not require to scan the tables
         :return: total_count
         """
         ## Count the results if needed
         if not self._total_count:
-            self.count()
+            self.count(approximate=approximate)
 
         return self._total_count
 
@@ -457,6 +459,69 @@ class BaseTranslator(object):
             raise InvalidOperation("query builder object has not been "
                                    "initialized.")
 
+    def set_keyset(self, cursor, orderby=None, limit=None):
+        """
+        Restrict the query to the page of a keyset pagination that follows the
+        row encoded in the cursor. The rows are ordered by id, or by ctime and
+        id, such that the next page is found through an index rather than by
+        skipping all the rows of the previous pages as with an offset.
+
+        :param cursor: the cursor returned with the previous page, or
+            CURSOR_START for the first page
+        :param orderby: the list of signed columns of the orderby field
+        :param limit: the number of rows of the page
+        """
+        from aiida.restapi.common.utils import CURSOR_START, decode_cursor, \
+            get_keyset_order
+
+        if not self._is_qb_initialized:
+            raise InvalidOperation("query builder object has not been "
+                                   "initialized.")
+
+        columns, descending = get_keyset_order(orderby)
+        operator = '<' if descending else '>'
+        tag = self._result_type
+
+        if cursor != CURSOR_START:
+            values = decode_cursor(cursor, columns, descending)
+            if len(columns) == 1:
+                keyset_filter = {columns[0]: {operator: values[0]}}
+            else:
+                # (ctime, id) > (c, i), with a condition on ctime alone that
+                # can be answered by its index
+                keyset_filter = {
+                    columns[0]: {operator + '=': values[0]},
+                    'or': [{columns[0]: {operator: values[0]}},
+                           {columns[1]: {operator: values[1]}}]
+                }
+            filters = self._query_help['filters'].get(tag)
+            if filters:
+                keyset_filter = {'and': [filters, keyset_filter]}
+            self._query_help['filters'][tag] = keyset_filter
+
+        order = 'desc' if descending else 'asc'
+        self._query_help['order_by'][tag] = [{column: {'order': order}}
+                                             for column in columns]
+
+        projections = self._query_help['project'].get(tag, [])
+        if '**' not in projections:
+            self._keyset_extra_projections = [column for column in columns
+                                              if column not in projections]
+            self._query_help['project'][tag] = list(projections) + \
+                self._keyset_extra_projections
+
+        self._keyset = columns, descending
+        self.init_qb()
+        self.set_limit_offset(limit=limit)
+        self._keyset_limit = int(limit) if limit is not None else self.LIMIT_DEFAULT
+
+    def get_next_cursor(self):
+        """
+        Returns the cursor of the page that follows the results of a keyset
+        pagination, or None if they are the last page.
+        """
+        return self._next_cursor
+
     def get_formatted_result(self, label):
         """
         Runs the query and retrieves results tagged as "label".
@@ -472,9 +537,23 @@ class BaseTranslator(object):
                                    "initialized.")
 
         results = []
-        if self._total_count > 0:
+        # An approximate count can be 0 even if the query has results
+        if self._total_count > 0 or self._is_count_approximate:
             results = [res[label] for res in self.qb.dict()]
 
+        if self._keyset is not None:
+            from aiida.restapi.common.utils import encode_cursor
+
+            columns, descending = self._keyset
+            # A full page is assumed to be followed by another one, that
+            # may be empty
+            if results and len(results) == self._keyset_limit:
+                values = [results[-1][column] for column in columns]
+                self._next_cursor = encode_cursor(columns, descending, values)
+            for result in results:
+                for column in self._keyset_extra_projections:
+                    result.pop(column, None)
+
         # TODO think how to make it less hardcoded
         if self._result_type == 'input_of':
             return {'inputs': results}
@@ -7,11 +7,57 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import threading
+
 from aiida.common.exceptions import InputValidationError, ValidationError, \
     InvalidOperation
 from aiida.restapi.common.exceptions import RestValidationError
 from aiida.restapi.translator.base import BaseTranslator
 
+# The subclasses of each translator class, see NodeTranslator.get_subclasses
+_subclasses_cache = {}
+_subclasses_cache_lock = threading.RLock()
+
+
+def clear_subclasses_cache():
+    """
+    Empty the cache of the subclasses of the translators, such that the
+    packages are inspected again, e.g. after new translators are added
+    """
+    with _subclasses_cache_lock:
+        _subclasses_cache.clear()
+
+
+def _find_subclasses(parent_class):
+    """
+    Import all the submodules of the package containing a class, including
+    its subpackages recursively, and return the subclasses of the class
+    defined in them.
+
+    :param parent_class: the class of which to look for subclasses
+    :return: a dictionary with the names of the classes as keys and the
+        classes as values
+    """
+    import importlib
+    import inspect
+    import pkgutil
+
+    # The package containing the class, which is the module of the class if
+    # the class is defined in the __init__ of a package
+    module = importlib.import_module(parent_class.__module__)
+    if not hasattr(module, '__path__'):
+        module = importlib.import_module(module.__name__.rpartition('.')[0])
+
+    results = {}
+    for _, name, _ in pkgutil.walk_packages(module.__path__,
+                                            prefix=module.__name__ + '.'):
+        submodule = importlib.import_module(name)
+        for obj_name, obj in inspect.getmembers(submodule, inspect.isclass):
+            if issubclass(obj, parent_class):
+                results[obj_name] = obj
+
+    return results
+
 
 class NodeTranslator(BaseTranslator):
     """
@@ -59,6 +105,17 @@ class NodeTranslator(BaseTranslator):
         # basic initialization
         super(NodeTranslator, self).__init__(Class=Class, **kwargs)
 
+        # Default and maximum depth of the provenance tree
+        from aiida.restapi.common import config
+        self._default_tree_depth = kwargs.get('DEFAULT_TREE_DEPTH', config.DEFAULT_TREE_DEPTH)
+        self._max_tree_depth = kwargs.get('MAX_TREE_DEPTH', config.MAX_TREE_DEPTH)
+
+        # Source of the statistics of node creation
+        self._statistics_materialized = kwargs.get('NODE_STATISTICS_MATERIALIZED',
+                                                   config.NODE_STATISTICS_MATERIALIZED)
+        self._statistics_refresh_interval = kwargs.get('NODE_STATISTICS_REFRESH_INTERVAL',
+                                                       config.NODE_STATISTICS_REFRESH_INTERVAL)
+
         # Extract the default projections from custom_schema if they are defined
         if self.custom_schema is not None and 'columns' in self.custom_schema:
             self._default_projections = self.custom_schema['columns'][
@@ -79,7 +136,7 @@ class NodeTranslator(BaseTranslator):
                          \- CalculationTranslator
         """
 
-        self._subclasses = self._get_subclasses()
+        self._subclasses = self.get_subclasses()
 
     def set_query_type(self, query_type, alist=None, nalist=None, elist=None,
                        nelist=None, downloadformat=None, visformat=None,
@@ -277,76 +334,37 @@ class NodeTranslator(BaseTranslator):
 
         return data
 
-    def _get_subclasses(self, parent=None, parent_class=None, recursive=True):
-        """
-        Import all submodules of the package containing the present class.
-        
-        Includes subpackages recursively, if specified.
-
-        :param parent: package/class. 
-            If package looks for the classes in submodules.
-            If class, first lookss for the package where it is contained
-        :param parent_class: class of which to look for subclasses
-        :param recursive: True/False (go recursively into submodules)
+    @classmethod
+    def get_subclasses(cls):
         """
+        Return the subclasses of the present class defined in the modules of
+        the package containing it, including its subpackages.
 
-        import pkgutil
-        import imp
-        import inspect
-        import os
-
-        # If no parent class is specified set it to self.__class
-        parent = self.__class__ if parent is None else parent
-
-        # Suppose parent is class
-        if inspect.isclass(parent):
-
-            # Set the package where the class is contained
-            classfile = inspect.getfile(parent)
-            package_path = os.path.dirname(classfile)
-
-            # If parent class is not specified, assume it is the parent
-            if parent_class is None:
-                parent_class = parent
+        The translator package is inspected only once, for NodeTranslator, at
+        the first call (the REST API calls it when the resources are created),
+        and the subclasses of each translator of the package are selected
+        among the ones that were found. The result is reused by all the
+        following calls, i.e. by all the requests.
 
-        # Suppose parent is a package (directory containing __init__.py).
-        # Check if it contains attribute __path__
-        elif inspect.ismodule(parent) and hasattr(parent, '__path__'):
-
-            # Assume path is one element list
-            package_path = parent.__path__[0]
-
-            # if parent is a package, parent_class cannot be None
-            if parent_class is None:
-                raise TypeError('argument parent_class cannot be None')
-
-                # Recursively check the subpackages
-        results = {}
-
-        for loader, name, is_pkg in pkgutil.walk_packages([package_path]):
-            # N.B. pkgutil.walk_package requires a LIST of paths.
-
-            full_path_base = os.path.join(package_path, name)
-
-            if is_pkg:
-                app_module = imp.load_package(full_path_base, full_path_base)
-            else:
-                full_path = full_path_base + '.py'
-                # I could use load_module but it takes lots of arguments,
-                # then I use load_source
-                app_module = imp.load_source("rst"+name, full_path)
-
-            # Go through the content of the module
-            if not is_pkg:
-                for name, obj in inspect.getmembers(app_module):
-                    if inspect.isclass(obj) and issubclass(obj, parent_class):
-                        results[name] = obj
-            # Look in submodules
-            elif is_pkg and recursive:
-                results.update(self._get_subclasses(parent=app_module,
-                                                    parent_class=parent_class))
-
-        return results
+        :return: a dictionary with the names of the classes as keys and the
+            classes as values; it must not be modified
+        """
+        with _subclasses_cache_lock:
+            if cls not in _subclasses_cache:
+                if NodeTranslator not in _subclasses_cache:
+                    _subclasses_cache[NodeTranslator] = _find_subclasses(NodeTranslator)
+
+                package = NodeTranslator.__module__.rpartition('.')[0]
+                if cls.__module__.startswith(package + '.'):
+                    _subclasses_cache[cls] = {
+                        name: subclass for name, subclass
+                        in _subclasses_cache[NodeTranslator].items()
+                        if issubclass(subclass, cls)
+                    }
+                else:
+                    # A translator defined outside of the translator package
+                    _subclasses_cache[cls] = _find_subclasses(cls)
+            return _subclasses_cache[cls]
 
     def get_visualization_data(self, node, format=None):
         """
@@ -479,10 +497,31 @@ class NodeTranslator(BaseTranslator):
         "Return statistics for a given node"
         from aiida.backends.utils import QueryFactory
         qmanager = QueryFactory()()
-        return qmanager.get_creation_statistics(user_email=user_email)
+        return qmanager.get_creation_statistics(user_email=user_email,
+                                                materialized=self._statistics_materialized,
+                                                refresh_interval=self._statistics_refresh_interval)
 
 
-    def get_io_tree(self, uuid_pattern):
+    def get_io_tree(self, uuid_pattern, depth=None, link_types=None):
+        """
+        Returns the provenance graph around a node, i.e. its inputs and
+        outputs, the inputs of its inputs, and so on up to a given depth.
+
+        The graph is explored one level at a time, with one query for all the
+        nodes of the level in each direction, so the number of queries only
+        depends on the depth, not on the number of nodes.
+
+        :param uuid_pattern: the uuid (or its starting pattern) of the node
+        :param depth: the number of levels of inputs and outputs (by default
+            DEFAULT_TREE_DEPTH, at most MAX_TREE_DEPTH of the configuration)
+        :param link_types: the types of links to follow (default all)
+        :return: a dictionary with the pk of the node ("root"), the list of
+            the nodes ("nodes", with their level: negative for inputs and
+            positive for outputs) and the adjacency lists of the graph
+            ("adjacency", the pk of each node with inputs in the graph
+            mapped to a list of [input pk, link type, link label])
+        """
+        from aiida.common.links import LinkType
         from aiida.orm.querybuilder import QueryBuilder
         from aiida.orm.node import Node
 
@@ -499,114 +538,85 @@ class NodeTranslator(BaseTranslator):
 
             return shape
 
+        ## Validate the parameters
+        if depth is None:
+            depth = self._default_tree_depth
+        if depth < 0 or depth > self._max_tree_depth:
+            raise RestValidationError("depth must be between 0 and {}".format(
+                self._max_tree_depth))
+
+        if link_types is None:
+            link_types = [link_type.value for link_type in LinkType]
+        else:
+            try:
+                link_types = [LinkType(link_type).value
+                              for link_type in link_types]
+            except ValueError:
+                raise RestValidationError("link_type must be one of {}".format(
+                    ", ".join(link_type.value for link_type in LinkType)))
+
         # Check whether uuid_pattern identifies a unique node
         self._check_id_validity(uuid_pattern)
 
-        qb = QueryBuilder()
-        qb.append(Node, tag="main", project=["*"],
-                  filters=self._id_filter)
-
-        nodes = []
-        edges = []
-        nodeCount = 0
-
-        if qb.count() > 0:
-            mainNode = qb.first()[0]
-            pk = mainNode.pk
-            uuid = mainNode.uuid
-            nodetype = mainNode.type
-            display_type = nodetype.split('.')[-2]
-            description = mainNode.get_desc()
-            if description == '':
-                description = mainNode.type.split('.')[-2]
-
-            nodes.append({
-                "id": nodeCount,
-                "nodeid": pk,
-                "nodeuuid": uuid,
+        projections = ['id', 'uuid', 'type', 'label']
+        nodes = {}
+
+        def add_node(pk, uuid, nodetype, label, level):
+            nodes[pk] = {
+                "id": pk,
+                "nodeuuid": str(uuid),
                 "nodetype": nodetype,
-                "displaytype": display_type,
-                "group": "mainNode",
-                "description": description,
-                "shape": get_node_shape(nodetype)
-            })
-        nodeCount += 1
-
-        # get all inputs
-        qb = QueryBuilder()
-        qb.append(Node, tag="main", project=['*'],
-                  filters=self._id_filter)
-        qb.append(Node, tag="in", project=['*'], edge_project=['label'],
-                  input_of='main')
-
-        if qb.count() > 0:
-            for input in qb.iterdict():
-                node = input['in']['*']
-                linktype = input['main--in']['label']
-                pk = node.pk
-                uuid = node.uuid
-                nodetype = node.type
-                display_type = nodetype.split('.')[-2]
-                description = node.get_desc()
-                if description == '':
-                    description = node.type.split('.')[-2]
-
-                nodes.append({
-                    "id": nodeCount,
-                    "nodeid": pk,
-                    "nodeuuid": uuid,
-                    "nodetype": nodetype,
-                    "displaytype": display_type,
-                    "group": "inputs",
-                    "description": description,
-                    "linktype": linktype,
-                    "shape": get_node_shape(nodetype)
-                })
-                edges.append({
-                    "from": nodeCount,
-                    "to": 0,
-                    "arrows": "to",
-                    "color": {"inherit": 'from'},
-                    "linktype": linktype,
-                })
-                nodeCount += 1
+                "displaytype": nodetype.split('.')[-2],
+                "label": label,
+                "shape": get_node_shape(nodetype),
+                "level": level
+            }
 
-        # get all outputs
         qb = QueryBuilder()
-        qb.append(Node, tag="main", project=['*'],
-                  filters=self._id_filter)
-        qb.append(Node, tag="out", project=['*'], edge_project=['label'],
-                  output_of='main')
-        if qb.count() > 0:
-            for output in qb.iterdict():
-                node = output['out']['*']
-                linktype = output['main--out']['label']
-                pk = node.pk
-                uuid = node.uuid
-                nodetype = node.type
-                display_type = nodetype.split('.')[-2]
-                description = node.get_desc()
-                if description == '':
-                    description = node.type.split('.')[-2]
-
-                nodes.append({
-                    "id": nodeCount,
-                    "nodeid": pk,
-                    "nodeuuid": uuid,
-                    "nodetype": nodetype,
-                    "displaytype": display_type,
-                    "group": "outputs",
-                    "description": description,
-                    "linktype": linktype,
-                    "shape": get_node_shape(nodetype)
-                })
-                edges.append({
-                    "from": 0,
-                    "to": nodeCount,
-                    "arrows": "to",
-                    "color": {"inherit": 'to'},
-                    "linktype": linktype
-                })
-                nodeCount += 1
-
-        return {"nodes": nodes, "edges": edges}
+        qb.append(Node, project=projections, filters=self._id_filter)
+        root = qb.first()
+        add_node(*(list(root) + [0]))
+
+        # Links as (input pk, output pk, type, label)
+        links = set()
+
+        # Explore the inputs and the outputs of the nodes of each level
+        for relationship, sign in (('input_of', -1), ('output_of', 1)):
+            frontier = [root[0]]
+            for level in range(1, depth + 1):
+                if not frontier:
+                    break
+
+                qb = QueryBuilder()
+                qb.append(Node, tag='frontier', project=['id'],
+                          filters={'id': {'in': frontier}})
+                qb.append(Node, tag='neighbour', project=projections,
+                          edge_tag='link', edge_project=['type', 'label'],
+                          edge_filters={'type': {'in': link_types}},
+                          **{relationship: 'frontier'})
+
+                frontier = []
+                for row in qb.iterdict():
+                    pk = row['frontier']['id']
+                    neighbour = row['neighbour']
+                    link = (row['link']['type'], row['link']['label'])
+                    if sign < 0:
+                        links.add((neighbour['id'], pk) + link)
+                    else:
+                        links.add((pk, neighbour['id']) + link)
+                    if neighbour['id'] not in nodes:
+                        add_node(*([neighbour[key] for key in projections] +
+                                   [sign * level]))
+                        frontier.append(neighbour['id'])
+
+        adjacency = {}
+        for input_pk, output_pk, link_type, link_label in sorted(links):
+            adjacency.setdefault(output_pk, []).append(
+                [input_pk, link_type, link_label])
+
+        return {
+            "root": root[0],
+            "nodes": sorted(nodes.values(),
+                            key=lambda node: (node["level"], node["id"])),
+            "adjacency": adjacency
+        }
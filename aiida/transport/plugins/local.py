@@ -18,7 +18,7 @@
 import os
 import shutil
 import subprocess
-from aiida.transport.transport import Transport, TransportInternalError
+from aiida.transport.transport import Transport, TransportInternalError, STDIN_CHUNK_SIZE
 from aiida.transport.util import FileAttribute
 import StringIO
 import glob
@@ -718,6 +718,15 @@ class LocalTransport(Transport):
         )
         return proc.stdin, proc.stdout, proc.stderr, proc
 
+    def _get_exit_status(self, session):
+        """
+        Wait for a command started with _exec_command_internal to finish and return its exit status.
+
+        :param session: the process object as returned by _exec_command_internal
+        :return: the retcode (int)
+        """
+        return session.wait()
+
     def exec_command_wait(self, command, stdin=None):
         """
         Executes the specified command and waits for it to finish.
@@ -736,8 +745,9 @@ class LocalTransport(Transport):
                 filelike_stdin = stdin
 
             try:
-                for l in filelike_stdin.readlines():
-                    local_proc.stdin.write(l)
+                # Copy in chunks, such that large inputs are streamed rather than loaded in memory
+                for chunk in iter(lambda: filelike_stdin.read(STDIN_CHUNK_SIZE), ''):
+                    local_proc.stdin.write(chunk)
             except AttributeError:
                 raise ValueError("stdin can only be either a string of a " "file-like object!")
         else:
@@ -16,6 +16,7 @@ import os
 import glob
 
 import aiida.transport
+from aiida.transport.transport import STDIN_CHUNK_SIZE
 from aiida.common.utils import escape_for_bash
 from aiida.transport.util import FileAttribute
 from aiida.common import aiidalogger
@@ -88,6 +89,10 @@ class SshTransport(aiida.transport.Transport):
     # This should be incremented to 30, probably.
     _DEFAULT_SAFE_OPEN_INTERVAL = 5.
 
+    # Interval in seconds between keep-alive packets sent on an idle connection, such that
+    # connections that are kept open are not dropped by firewalls or the server
+    _KEEPALIVE_INTERVAL = 30
+
     @classmethod
     def _convert_username_fromstring(cls, string):
         """
@@ -474,6 +479,8 @@ class SshTransport(aiida.transport.Transport):
                               "connect_args were: {}".format(e.__class__.__name__, e.message, self._connect_args))
             raise
 
+        self._client.get_transport().set_keepalive(self._KEEPALIVE_INTERVAL)
+
         # Open also a SFTPClient
         self._sftp = self._client.open_sftp()
         # Set the current directory to a explicit path, and not to None
@@ -500,6 +507,18 @@ class SshTransport(aiida.transport.Transport):
         self._client.close()
         self._is_open = False
 
+    def is_alive(self):
+        """
+        Check whether the SSH connection is still active
+
+        :return: True if the transport is open and the underlying SSH connection is active
+        """
+        if not self._is_open:
+            return False
+
+        transport = self._client.get_transport()
+        return transport is not None and transport.is_active()
+
     @property
     def sshclient(self):
         if not self._is_open:
@@ -1290,6 +1309,15 @@ class SshTransport(aiida.transport.Transport):
 
         return stdin, stdout, stderr, channel
 
+    def _get_exit_status(self, session):
+        """
+        Wait for a command started with _exec_command_internal to finish and return its exit status.
+
+        :param session: the paramiko.Channel as returned by _exec_command_internal
+        :return: the retcode (int)
+        """
+        return session.recv_exit_status()
+
     def exec_command_wait(self, command, stdin=None, combine_stderr=False, bufsize=-1):
         """
         Executes the specified command and waits for it to finish.
@@ -1315,8 +1343,9 @@ class SshTransport(aiida.transport.Transport):
                 filelike_stdin = stdin
 
             try:
-                for l in filelike_stdin.readlines():
-                    ssh_stdin.write(l)
+                # Copy in chunks, such that large inputs are streamed rather than loaded in memory
+                for chunk in iter(lambda: filelike_stdin.read(STDIN_CHUNK_SIZE), ''):
+                    ssh_stdin.write(chunk)
             except AttributeError:
                 raise ValueError("stdin can only be either a string of a " "file-like object!")
 
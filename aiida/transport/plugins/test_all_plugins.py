@@ -1239,6 +1239,141 @@ class TestPutGetTree(unittest.TestCase):
             t.rmdir(directory)
 
 
+class TestPutBundle(unittest.TestCase):
+    """
+    Test the upload of many files and folders at once with put_bundle.
+    """
+
+    @run_for_all_plugins
+    def test_put_bundle(self, custom_transport):
+        import os
+        import shutil
+        import tempfile
+
+        local_dir = tempfile.mkdtemp()
+        remote_dir = tempfile.mkdtemp()
+
+        try:
+            os.mkdir(os.path.join(local_dir, 'folder'))
+            with open(os.path.join(local_dir, 'folder', 'file_a.txt'), 'w') as handle:
+                handle.write('a')
+            with open(os.path.join(local_dir, 'file_b.txt'), 'w') as handle:
+                handle.write('b')
+            with open(os.path.join(local_dir, 'file_c.txt'), 'w') as handle:
+                handle.write('c')
+
+            entries = [
+                (os.path.join(local_dir, 'folder'), 'folder'),
+                (os.path.join(local_dir, 'file_b.txt'), 'renamed_b.txt'),
+                # A file put on a folder of the bundle should end up inside it
+                (os.path.join(local_dir, 'file_c.txt'), 'folder'),
+            ]
+
+            with custom_transport as t:
+                t.chdir(remote_dir)
+                num_files, size = t.put_bundle(entries)
+
+                self.assertEquals(num_files, 3)
+                self.assertTrue(size > 0)
+                self.assertEquals(sorted(t.listdir('.')), ['folder', 'renamed_b.txt'])
+                self.assertEquals(sorted(t.listdir('folder')), ['file_a.txt', 'file_c.txt'])
+
+                retcode, stdout, stderr = t.exec_command_wait('cat folder/file_a.txt renamed_b.txt folder/file_c.txt')
+                self.assertEquals(stdout, 'abc')
+
+                with self.assertRaises(ValueError):
+                    t.put_bundle([('relative_path', 'file')])
+
+                with self.assertRaises(OSError):
+                    t.put_bundle([(os.path.join(local_dir, 'non_existing'), 'file')])
+        finally:
+            shutil.rmtree(local_dir)
+            shutil.rmtree(remote_dir)
+
+
+class TestGetBundle(unittest.TestCase):
+    """
+    Test the retrieval of many files and folders at once with get_bundle.
+    """
+
+    @run_for_all_plugins
+    def test_get_bundle(self, custom_transport):
+        import os
+        import shutil
+        import tempfile
+
+        local_dir = tempfile.mkdtemp()
+        remote_dir = tempfile.mkdtemp()
+
+        try:
+            os.mkdir(os.path.join(remote_dir, 'folder'))
+            os.mkdir(os.path.join(remote_dir, 'folder', 'subfolder'))
+            with open(os.path.join(remote_dir, 'folder', 'subfolder', 'file_a.txt'), 'w') as handle:
+                handle.write('a')
+            with open(os.path.join(remote_dir, 'file_b.txt'), 'w') as handle:
+                handle.write('bb')
+
+            entries = [
+                ('folder', os.path.join(local_dir, 'retrieved_folder')),
+                ('./file_b.txt', os.path.join(local_dir, 'file_b.txt')),
+                (os.path.join(remote_dir, 'file_b.txt'), os.path.join(local_dir, 'copy', 'file_b.txt')),
+                # Non existing remote paths are ignored
+                ('non_existing', os.path.join(local_dir, 'non_existing')),
+            ]
+
+            with custom_transport as t:
+                t.chdir(remote_dir)
+                num_files, size = t.get_bundle(entries)
+
+                self.assertEquals(num_files, 3)
+                self.assertEquals(size, 5)
+                self.assertEquals(sorted(os.listdir(local_dir)), ['copy', 'file_b.txt', 'retrieved_folder'])
+                with open(os.path.join(local_dir, 'retrieved_folder', 'subfolder', 'file_a.txt')) as handle:
+                    self.assertEquals(handle.read(), 'a')
+                with open(os.path.join(local_dir, 'file_b.txt')) as handle:
+                    self.assertEquals(handle.read(), 'bb')
+                with open(os.path.join(local_dir, 'copy', 'file_b.txt')) as handle:
+                    self.assertEquals(handle.read(), 'bb')
+
+                with self.assertRaises(ValueError):
+                    t.get_bundle([('file_b.txt', 'relative_path')])
+        finally:
+            shutil.rmtree(local_dir)
+            shutil.rmtree(remote_dir)
+
+    @run_for_all_plugins
+    def test_get_bundle_large_stderr(self, custom_transport):
+        """
+        Many non existing remote paths make tar write more warnings than fit in the stderr pipe:
+        this should neither block the transfer nor make it fail.
+        """
+        import os
+        import shutil
+        import tempfile
+
+        local_dir = tempfile.mkdtemp()
+        remote_dir = tempfile.mkdtemp()
+
+        try:
+            with open(os.path.join(remote_dir, 'file_a.txt'), 'w') as handle:
+                handle.write('a')
+
+            entries = [('file_a.txt', os.path.join(local_dir, 'file_a.txt'))]
+            entries.extend(('non_existing_{:04d}_{}'.format(index, 'x' * 40), os.path.join(local_dir, 'non_existing'))
+                           for index in range(1000))
+
+            with custom_transport as t:
+                t.chdir(remote_dir)
+                num_files, size = t.get_bundle(entries)
+
+                self.assertEquals(num_files, 1)
+                self.assertEquals(size, 1)
+                self.assertEquals(os.listdir(local_dir), ['file_a.txt'])
+        finally:
+            shutil.rmtree(local_dir)
+            shutil.rmtree(remote_dir)
+
+
 class TestExecuteCommandWait(unittest.TestCase):
     """
     Test some simple command executions and stdin/stdout management.
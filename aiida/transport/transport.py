@@ -7,6 +7,9 @@ import aiida.common
 from aiida.common.exceptions import InternalError
 from aiida.utils import DEFAULT_TRANSPORT_INTERVAL
 
+# Size in bytes of the chunks in which the stdin of a command is passed to it
+STDIN_CHUNK_SIZE = 1024 * 1024
+
 
 class Transport(object):
     """
@@ -82,6 +85,18 @@ class Transport(object):
         """
         raise NotImplementedError
 
+    def is_alive(self):
+        """
+        Check whether an open transport can still be used. This is used to decide whether
+        a transport that is kept open, e.g. by the daemon, has to be reopened.
+
+        In the main class it always returns True; plugins whose connection can drop should override it.
+
+        :return: False if the connection of an open transport has been lost
+        :rtype: bool
+        """
+        return True
+
     def __repr__(self):
         return '<{}: {}>'.format(self.__class__.__name__, str(self))
 
@@ -331,6 +346,15 @@ class Transport(object):
         """
         raise NotImplementedError
 
+    def _get_exit_status(self, session):
+        """
+        Wait for a command started with _exec_command_internal to finish and return its exit status.
+
+        :param session: the session as returned by _exec_command_internal
+        :return: the retcode (int)
+        """
+        raise NotImplementedError
+
     def get(self, remotepath, localpath, *args, **kwargs):
         """
         Retrieve a file or folder from remote source to local destination
@@ -361,6 +385,99 @@ class Transport(object):
         """
         raise NotImplementedError
 
+    def get_bundle(self, entries, compress=False):
+        """
+        Retrieve many files and folders from remote to local at once.
+
+        Rather than transferring the entries one by one, a single ``tar`` command is run on the
+        remote, in the current working directory, and its output is unpacked on the fly into the
+        local destinations. The cost of the transfer then depends on the total size of the files
+        rather than on their number. Symbolic links are followed and remote paths that do not
+        exist are ignored.
+
+        .. note:: this relies on GNU tar being available on the remote.
+
+        :param entries: a list of tuples (remotepath, localpath), where localpath is an absolute
+            local path; if remotepath is a folder, its content is retrieved recursively in localpath
+        :param bool compress: if True, the archive is compressed with gzip before the transfer
+        :return: a tuple (number of files retrieved, number of bytes retrieved)
+
+        :raise ValueError: if one of the local paths is not absolute
+        :raise IOError: if the remote tar command failed, e.g. because tar is not available
+        """
+        import shutil
+        import tarfile
+        import threading
+        from aiida.common.utils import escape_for_bash
+
+        destinations = []
+        for remotepath, localpath in entries:
+            if not os.path.isabs(localpath):
+                raise ValueError("The localpath must be an absolute path")
+            # tar strips the leading slash from the member names of absolute paths
+            destinations.append((os.path.normpath(remotepath).lstrip('/'), localpath))
+
+        if not destinations:
+            return 0, 0
+
+        command = 'tar --dereference --hard-dereference --ignore-failed-read -c{}f - {}'.format(
+            'z' if compress else '', ' '.join(escape_for_bash(remotepath) for remotepath, _ in entries))
+
+        num_files = 0
+        num_bytes = 0
+
+        stdin, stdout, stderr, session = self._exec_command_internal(command)
+
+        # tar writes a warning for every remote path it cannot read: stderr is drained while the
+        # archive is read from stdout, otherwise tar blocks as soon as the stderr pipe is full
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(stderr.read()))
+        stderr_thread.daemon = True
+        stderr_thread.start()
+
+        try:
+            archive = tarfile.open(fileobj=stdout, mode='r|gz' if compress else 'r|')
+        except tarfile.ReadError:
+            # Nothing was written on stdout, the command failed before archiving anything
+            archive = None
+
+        if archive is not None:
+            for member in archive:
+                name = os.path.normpath(member.name)
+                targets = []
+                for remotepath, localpath in destinations:
+                    if name == remotepath:
+                        targets.append(localpath)
+                    elif name.startswith(remotepath + '/'):
+                        targets.append(os.path.join(localpath, name[len(remotepath) + 1:]))
+
+                if member.isdir():
+                    for target in targets:
+                        if not os.path.isdir(target):
+                            os.makedirs(target)
+                elif member.isfile() and targets:
+                    for target in targets:
+                        if not os.path.isdir(os.path.dirname(target)):
+                            os.makedirs(os.path.dirname(target))
+                    # The archive is read as a stream, so the content can only be read once
+                    with open(targets[0], 'wb') as handle:
+                        shutil.copyfileobj(archive.extractfile(member), handle)
+                    for target in targets[1:]:
+                        shutil.copyfile(targets[0], target)
+
+                    self.logger.debug("Retrieved {} ({} bytes) from bundle".format(member.name, member.size))
+                    num_files += 1
+                    num_bytes += member.size
+            archive.close()
+
+        retval = self._get_exit_status(session)
+        stderr_thread.join()
+        if retval != 0:
+            raise IOError("Unable to create the bundle on the remote (retval {}): {}".format(
+                retval, ''.join(stderr_chunks).strip()))
+
+        return num_files, num_bytes
+
     def getcwd(self):
         """
         Get working directory
@@ -534,6 +651,65 @@ class Transport(object):
         """
         raise NotImplementedError
 
+    def put_bundle(self, entries, compress=False):
+        """
+        Put many files and folders from local to remote at once.
+
+        Rather than transferring the entries one by one, they are packed in a single tar archive
+        that is streamed to the remote and unpacked there by a single ``tar`` command, run in the
+        current working directory. The cost of the transfer then depends on the total size of the
+        files rather than on their number.
+
+        As for `put`, if an entry is a file and its remotepath is a folder that is also being
+        transferred, the file is put inside that folder. Symbolic links are followed.
+
+        :param entries: a list of tuples (localpath, remotepath), where localpath is an absolute
+            local path and remotepath a path relative to the current working directory
+        :param bool compress: if True, the archive is compressed with gzip
+        :return: a tuple (number of files transferred, size in bytes of the archive)
+
+        :raise ValueError: if one of the local paths is not absolute
+        :raise OSError: if one of the local paths does not exist
+        :raise IOError: if the archive could not be unpacked on the remote, e.g. because tar is not available
+        """
+        import tarfile
+        import tempfile
+
+        counts = {'files': 0}
+        folders = set()
+
+        def log_member(tarinfo):
+            if tarinfo.isdir():
+                folders.add(tarinfo.name)
+            elif tarinfo.isfile():
+                counts['files'] += 1
+                self.logger.debug("Adding {} ({} bytes) to bundle".format(tarinfo.name, tarinfo.size))
+            return tarinfo
+
+        with tempfile.TemporaryFile() as handle:
+            with tarfile.open(fileobj=handle, mode='w:gz' if compress else 'w', dereference=True) as archive:
+                for localpath, remotepath in entries:
+                    if not os.path.isabs(localpath):
+                        raise ValueError("The localpath must be an absolute path")
+                    if not os.path.exists(localpath):
+                        raise OSError("The local path {} does not exist".format(localpath))
+
+                    arcname = os.path.normpath(remotepath)
+                    if os.path.isfile(localpath) and arcname in folders:
+                        arcname = os.path.join(arcname, os.path.basename(localpath))
+
+                    archive.add(localpath, arcname=arcname, filter=log_member)
+
+            size = handle.tell()
+            handle.seek(0)
+
+            retval, stdout, stderr = self.exec_command_wait('tar -x{}f -'.format('z' if compress else ''), stdin=handle)
+
+        if retval != 0:
+            raise IOError("Unable to unpack the bundle on the remote (retval {}): {}".format(retval, stderr.strip()))
+
+        return counts['files'], size
+
     def remove(self, path):
         """
         Remove the file at the given path. This only works on files;
@@ -38,6 +38,7 @@ def delete_nodes(pks, follow_calls=False, follow_returns=False,
     from aiida.orm.data import Data
     from aiida.orm import load_node
     from aiida.orm.backend import construct_backend
+    from aiida.orm.traversal import get_linked_pks
     from aiida.backends.utils import delete_nodes_and_connections
 
     backend = construct_backend()
@@ -50,32 +51,14 @@ def delete_nodes(pks, follow_calls=False, follow_returns=False,
             print "Nothing to delete"
         return
 
-    # The following code is just for the querying of downwards provenance.
-    # Ideally, there should be a module to interface with, but this is the solution for now.
-    # By only dealing with ids, and keeping track of what has been already
-    # visited in the query, there's good performance and no infinite loops.
+    # The downwards provenance is traversed in the database, following only the links specified
     link_types_to_follow = [LinkType.CREATE.value, LinkType.INPUT.value]
     if follow_calls:
         link_types_to_follow.append(LinkType.CALL.value)
     if follow_returns:
         link_types_to_follow.append(LinkType.RETURN.value)
 
-    edge_filters = {'type': {'in': link_types_to_follow}}
-
-    # Operational set always includes the recently (in the last iteration added) nodes.
-    operational_set = set().union(set(pks))  # Union to copy the set!
-    pks_set_to_delete = set().union(set(pks))
-    while operational_set:
-        # new_pks_set are the the pks of all nodes that are connected to the operational node set
-        # with the links specified.
-        new_pks_set = set([i for i, in QueryBuilder().append(
-            Node, filters={'id': {'in': operational_set}}).append(
-            Node, project='id', edge_filters=edge_filters).iterall()])
-        # The operational set is only those pks that haven't been yet put into the pks_set_to_delete.
-        operational_set = new_pks_set.difference(pks_set_to_delete)
-
-        # I add these pks in the pks_set_to_delete with a union
-        pks_set_to_delete = pks_set_to_delete.union(new_pks_set)
+    pks_set_to_delete = get_linked_pks(pks, link_types_to_follow, direction='outgoing')
 
     if verbosity > 0:
         print "I {} delete {} node{}".format(
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from collections import namedtuple
+import logging
+import sys
+import threading
+import time
+import traceback
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = ['JobsList', 'JobManager']
+
+
+class JobsList(object):
+    """
+    Gathers the scheduler update requests for all the jobs that belong to a given
+    authinfo, i.e. a (computer, user) pair.
+
+    Requests that arrive before the transport for the authinfo is handed out by the
+    transport queue are all served by a single call to the scheduler, such that the
+    number of scheduler queries per poll cycle scales with the number of computers
+    rather than with the number of jobs.
+
+    Since the transport queue may hand out an already open transport straight away, the
+    scheduler is not polled more often than once every poll interval, which defaults to
+    the safe open interval of the transport of the authinfo.
+    """
+    UpdateRequest = namedtuple('UpdateRequest', ['job_id', 'callback', 'errback'])
+
+    def __init__(self, authinfo, transport_queue, poll_interval=None):
+        """
+        :param authinfo: the authinfo for which to poll the scheduler
+        :param transport_queue: the transport queue used to obtain an open transport
+        :param poll_interval: the minimum interval in seconds between two scheduler polls,
+            if None the safe open interval of the transport of the authinfo is used
+        """
+        super(JobsList, self).__init__()
+
+        if poll_interval is None:
+            poll_interval = authinfo.get_transport().get_safe_open_interval()
+
+        self._authinfo = authinfo
+        self._transport_queue = transport_queue
+        self._poll_interval = poll_interval
+        self._last_poll = None
+        self._requests = []
+        self._poll_scheduled = False
+        self._requests_lock = threading.Lock()
+
+    @property
+    def authinfo(self):
+        return self._authinfo
+
+    def request_job_info_update(self, job_id, callback, errback):
+        """
+        Request an update of the scheduler information of a job.
+
+        Once the scheduler has been polled, the callback is called with the authinfo, the open
+        transport and the :py:class:`aiida.scheduler.datastructures.JobInfo` of the job, which is
+        None if the job was not found by the scheduler. If polling the scheduler fails, the errback
+        is called instead with the exception information as returned by `sys.exc_info()`.
+
+        :param job_id: the scheduler job id
+        :param callback: callable with signature `callback(authinfo, transport, job_info)`
+        :param errback: callable with signature `errback(exc_info)`
+        """
+        with self._requests_lock:
+            self._requests.append(self.UpdateRequest(job_id, callback, errback))
+            if not self._poll_scheduled:
+                self._schedule_poll()
+                self._poll_scheduled = True
+
+    def _schedule_poll(self):
+        """
+        Ask the transport queue for a transport to poll the scheduler, respecting the poll interval
+        """
+        delay = 0.
+        if self._last_poll is not None:
+            delay = self._last_poll + self._poll_interval - time.time()
+
+        if delay > 0.:
+            self._transport_queue.loop.call_later(delay, self._request_transport)
+        else:
+            self._request_transport()
+
+    def _request_transport(self):
+        self._transport_queue.call_me_with_transport(self._authinfo, self._poll)
+
+    def _get_jobs_from_scheduler(self, transport, job_ids):
+        """
+        Query the scheduler once for all the given job ids
+
+        :param transport: an open transport
+        :param job_ids: the list of job ids to query
+        :return: a dictionary of JobInfo objects keyed on the job id
+        """
+        scheduler = self._authinfo.computer.get_scheduler()
+        scheduler.set_transport(transport)
+
+        kwargs = {'as_dict': True}
+        if scheduler.get_feature('can_query_by_user'):
+            kwargs['user'] = '$USER'
+        else:
+            kwargs['jobs'] = job_ids
+
+        return scheduler.getJobs(**kwargs)
+
+    def _poll(self, authinfo, transport):
+        with self._requests_lock:
+            requests, self._requests = self._requests, []
+            self._poll_scheduled = False
+            self._last_poll = time.time()
+
+        job_ids = sorted(set(str(request.job_id) for request in requests))
+        _LOGGER.debug("Polling scheduler of {} for {} job(s)".format(authinfo, len(job_ids)))
+
+        try:
+            found_jobs = self._get_jobs_from_scheduler(transport, job_ids)
+        except Exception:
+            exc_info = sys.exc_info()
+            for request in requests:
+                request.errback(exc_info)
+            return
+
+        for request in requests:
+            try:
+                request.callback(authinfo, transport, found_jobs.get(str(request.job_id), None))
+            except BaseException:
+                _LOGGER.error("Callback '{}' raised exception when passed job info:\n{}".format(
+                    request.callback, traceback.format_exc()))
+
+
+class JobManager(object):
+    """
+    Keeps a :py:class:`JobsList` for every authinfo that has pending scheduler update requests
+    """
+
+    def __init__(self, transport_queue):
+        """
+        :param transport_queue: the transport queue used to obtain open transports
+        """
+        super(JobManager, self).__init__()
+
+        self._transport_queue = transport_queue
+        self._job_lists = {}
+        self._job_lists_lock = threading.Lock()
+
+    @property
+    def transport_queue(self):
+        return self._transport_queue
+
+    def get_jobs_list(self, authinfo):
+        """
+        Get or create the jobs list for the given authinfo
+
+        :param authinfo: the authinfo
+        :return: the :py:class:`JobsList` of the authinfo
+        """
+        with self._job_lists_lock:
+            if authinfo.id not in self._job_lists:
+                self._job_lists[authinfo.id] = JobsList(authinfo, self._transport_queue)
+
+            return self._job_lists[authinfo.id]
+
+    def request_job_info_update(self, authinfo, job_id, callback, errback):
+        """
+        Request an update of the scheduler information of a job, see :py:meth:`JobsList.request_job_info_update`
+
+        :param authinfo: the authinfo of the computer and user the job belongs to
+        :param job_id: the scheduler job id
+        :param callback: callable with signature `callback(authinfo, transport, job_info)`
+        :param errback: callable with signature `errback(exc_info)`
+        """
+        self.get_jobs_list(authinfo).request_job_info_update(job_id, callback, errback)
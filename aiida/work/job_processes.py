@@ -51,6 +51,10 @@ class TransportTask(plumpy.Future):
         super(TransportTask, self).__init__()
         self._calc = calc_node
         self._authinfo = calc_node.get_computer().get_authinfo(calc_node.get_user())
+        self._schedule(transport_queue)
+
+    def _schedule(self, transport_queue):
+        """ Register with the transport queue to be called back once the transport is open """
         transport_queue.call_me_with_transport(self._authinfo, self._execute)
 
     def execute(self, transport):
@@ -76,9 +80,37 @@ class SubmitJob(TransportTask):
 
 
 class UpdateSchedulerState(TransportTask):
-    """ A task to update the scheduler state of a job calculation """
+    """
+    A task to update the scheduler state of a job calculation
 
-    def execute(self, transport):
+    The scheduler is not queried by the task itself, instead the request is passed to the
+    job manager which polls the scheduler once for all the jobs of the same authinfo.
+    """
+
+    def __init__(self, calc_node, job_manager):
+        self._job_manager = job_manager
+        super(UpdateSchedulerState, self).__init__(calc_node, job_manager.transport_queue)
+
+    def _schedule(self, transport_queue):
+        self._job_manager.request_job_info_update(
+            self._authinfo, self._calc.get_job_id(), self._execute_with_job_info, self._poll_failed)
+
+    def _execute_with_job_info(self, authinfo, transport, job_info):
+        if not self.cancelled():
+            try:
+                self.set_result(self.execute(transport, job_info))
+            except Exception:
+                self.set_exc_info(sys.exc_info())
+
+    def _poll_failed(self, exc_info):
+        if not self.cancelled():
+            self.set_exc_info(exc_info)
+
+    def execute(self, transport, info):
+        """
+        :param transport: the open transport
+        :param info: the JobInfo of the job as returned by the scheduler, None if it was not found
+        """
         self._calc.logger.info('Updating scheduler state calculation<{}>'.format(self._calc.pk))
 
         # We are the only ones to set the calc state to COMPUTED, so if it is set here
@@ -91,20 +123,11 @@ class UpdateSchedulerState(TransportTask):
 
         job_id = self._calc.get_job_id()
 
-        kwargs = {'jobs': [job_id], 'as_dict': True}
-        if scheduler.get_feature('can_query_by_user'):
-            kwargs['user'] = "$USER"
-        found_jobs = scheduler.getJobs(**kwargs)
-
-        info = found_jobs.get(job_id, None)
         if info is None:
             # If the job is computed or not found assume it's done
             job_done = True
             self._calc._set_scheduler_state(job_states.DONE)
         else:
-            # Has the state changed?
-            last_jobinfo = self._calc._get_last_jobinfo()
-
             execmanager.update_job_calc_from_job_info(self._calc, info)
 
             job_done = info.job_state == job_states.DONE
@@ -218,6 +241,7 @@ class Waiting(plumpy.Waiting):
 
         calc = self.process.calc
         transport_queue = self.process.runner.transport
+        job_manager = self.process.runner.job_manager
         calc.logger.info('Waiting for calculation<{}> on {}'.format(calc.pk, self.data))
 
         try:
@@ -235,7 +259,7 @@ class Waiting(plumpy.Waiting):
                 job_done = False
                 # Keep geting scheduler updates until done
                 while not job_done:
-                    self._task = UpdateSchedulerState(calc, transport_queue)
+                    self._task = UpdateSchedulerState(calc, job_manager)
                     job_done = yield self._task
                     if self._kill_future:
                         yield self._do_kill()
@@ -8,50 +8,438 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 
+import base64
+from collections import namedtuple, OrderedDict
+import cPickle as pickle
+import hashlib
 import logging
+import threading
+import time
+import zlib
 import plumpy
 import yaml
 
 from aiida import orm
 
-__all__ = ['ObjectLoader', 'get_object_loader']
+__all__ = ['ObjectLoader', 'get_object_loader', 'CheckpointCodec', 'YamlCheckpointCodec',
+           'PickleCheckpointCodec', 'register_checkpoint_codec', 'get_checkpoint_codec']
 
 LOGGER = logging.getLogger(__name__)
 
+# Binary checkpoints are stored as '<prefix><codec name>:<base64 data>'. The prefix can never
+# start a YAML document, so checkpoints written before codecs existed are still recognised as YAML.
+CHECKPOINT_PREFIX = '!aiida-checkpoint:'
+# Prefix of the checkpoint deltas, that store the changes of the bundle with respect to the checkpoint
+CHECKPOINT_DELTA_PREFIX = '!aiida-checkpoint-delta:'
+# A delta is written instead of the full checkpoint only if it is smaller than this fraction of the checkpoint
+CHECKPOINT_DELTA_MAX_RATIO = 0.5
+# Maximum number of processes for which the persister remembers the last full checkpoint to compute deltas
+CHECKPOINT_DELTA_MAX_BASES = 1000
+
 
 class PersistenceError(Exception):
     pass
 
 
+class CheckpointCodec(object):
+    """
+    Converts a checkpoint bundle to the string that is stored in the checkpoint attribute of the
+    calculation, and back.
+    """
+    name = None
+
+    def encode(self, bundle):
+        """
+        :param bundle: the :class:`plumpy.Bundle` to encode
+        :return: the encoded checkpoint string
+        """
+        raise NotImplementedError
+
+    def decode(self, checkpoint):
+        """
+        :param checkpoint: the checkpoint string, as returned by :meth:`encode`
+        :return: the decoded :class:`plumpy.Bundle`
+        """
+        raise NotImplementedError
+
+
+class YamlCheckpointCodec(CheckpointCodec):
+    """
+    The original, human readable checkpoint format
+    """
+    name = 'yaml'
+
+    def encode(self, bundle):
+        return yaml.dump(bundle)
+
+    def decode(self, checkpoint):
+        return yaml.load(checkpoint)
+
+
+class PickleCheckpointCodec(CheckpointCodec):
+    """
+    A compact binary checkpoint format based on pickle protocol 2, optionally compressed with zlib.
+    The binary data is base64 encoded, since the checkpoint is stored as a string attribute.
+    """
+
+    def __init__(self, compress=False, compression_level=1):
+        """
+        :param compress: whether to compress the pickled bundle with zlib
+        :param compression_level: the zlib compression level, the default favours speed over size
+        """
+        self._compress = compress
+        self._compression_level = compression_level
+
+    @property
+    def name(self):
+        return 'pickle-zlib' if self._compress else 'pickle'
+
+    def encode(self, bundle):
+        data = pickle.dumps(bundle, 2)
+        if self._compress:
+            data = zlib.compress(data, self._compression_level)
+        return '{}{}:{}'.format(CHECKPOINT_PREFIX, self.name, base64.b64encode(data))
+
+    def decode(self, checkpoint):
+        data = base64.b64decode(checkpoint.split(':', 2)[2])
+        if self._compress:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+
+_checkpoint_codecs = {}
+
+
+def register_checkpoint_codec(codec):
+    """
+    Register a checkpoint codec, such that it can be selected with the ``checkpoint.codec`` property
+    and checkpoints written with it can be loaded
+
+    :param codec: the :class:`CheckpointCodec` instance
+    """
+    _checkpoint_codecs[codec.name] = codec
+
+
+def get_checkpoint_codec(name=None):
+    """
+    Return the checkpoint codec with the given name
+
+    :param name: the name of the codec, if None the value of the ``checkpoint.codec`` property is used
+    :return: the :class:`CheckpointCodec`
+    """
+    if name is None:
+        from aiida.common.setup import get_property
+        name = get_property('checkpoint.codec')
+
+    try:
+        return _checkpoint_codecs[name]
+    except KeyError:
+        raise ValueError("Unknown checkpoint codec '{}', registered codecs are: {}".format(
+            name, ', '.join(sorted(_checkpoint_codecs.keys()))))
+
+
+def decode_checkpoint(checkpoint):
+    """
+    Decode a checkpoint string with the codec that was used to encode it
+
+    :param checkpoint: the checkpoint string
+    :return: the decoded :class:`plumpy.Bundle`
+    """
+    if checkpoint.startswith(CHECKPOINT_PREFIX):
+        name = checkpoint[len(CHECKPOINT_PREFIX):].split(':', 1)[0]
+    else:
+        name = YamlCheckpointCodec.name
+
+    return get_checkpoint_codec(name).decode(checkpoint)
+
+
+register_checkpoint_codec(YamlCheckpointCodec())
+register_checkpoint_codec(PickleCheckpointCodec())
+register_checkpoint_codec(PickleCheckpointCodec(compress=True))
+
+
+def _split_bundle(bundle):
+    """
+    Split the bundle into chunks that are compared between checkpoints to compute deltas. Every top
+    level entry is a chunk, except for non-empty dictionaries of which every entry is a chunk, such that
+    e.g. a change of a single entry of the context of a workchain does not include the whole context.
+
+    :param bundle: the :class:`plumpy.Bundle`
+    :return: a dictionary of the pickled chunks keyed on their path, a tuple of one or two keys
+    """
+    chunks = {}
+    for key, value in bundle.iteritems():
+        if type(value) is dict and value:
+            for subkey, subvalue in value.iteritems():
+                chunks[(key, subkey)] = pickle.dumps(subvalue, 2)
+        else:
+            chunks[(key,)] = pickle.dumps(value, 2)
+    return chunks
+
+
+def _get_chunk_digests(chunks):
+    """
+    :param chunks: the chunks of a bundle, as returned by :func:`_split_bundle`
+    :return: a dictionary with the digests of the chunks, keyed on their path
+    """
+    return {path: hashlib.sha1(chunk).digest() for path, chunk in chunks.iteritems()}
+
+
+def _get_checkpoint_digest(checkpoint):
+    return hashlib.sha1(checkpoint).hexdigest()
+
+
+def encode_checkpoint_delta(chunks, base_digests, base_checkpoint_digest):
+    """
+    Encode the changes of the chunks of a bundle with respect to the chunks of the base checkpoint
+
+    :param chunks: the chunks of the bundle, as returned by :func:`_split_bundle`
+    :param base_digests: the digests of the chunks of the base checkpoint, as returned by :func:`_get_chunk_digests`
+    :param base_checkpoint_digest: the digest of the encoded base checkpoint, used to verify that the
+        delta is applied to the checkpoint it was computed for
+    :return: the encoded delta string
+    """
+    digests = _get_chunk_digests(chunks)
+    delta = {
+        'base': base_checkpoint_digest,
+        'set': {path: chunk for path, chunk in chunks.iteritems() if base_digests.get(path) != digests[path]},
+        'delete': [path for path in base_digests if path not in chunks],
+    }
+    data = zlib.compress(pickle.dumps(delta, 2), 1)
+    return CHECKPOINT_DELTA_PREFIX + base64.b64encode(data)
+
+
+def apply_checkpoint_delta(bundle, checkpoint, checkpoint_delta):
+    """
+    Apply the changes of a checkpoint delta to the bundle of the base checkpoint, in place
+
+    :param bundle: the decoded :class:`plumpy.Bundle` of the base checkpoint
+    :param checkpoint: the base checkpoint string
+    :param checkpoint_delta: the delta string, as returned by :func:`encode_checkpoint_delta`
+    :return: the updated bundle
+    :raise PersistenceError: if the delta was not computed for the given base checkpoint
+    """
+    if not checkpoint_delta.startswith(CHECKPOINT_DELTA_PREFIX):
+        raise PersistenceError('Invalid checkpoint delta')
+
+    delta = pickle.loads(zlib.decompress(base64.b64decode(checkpoint_delta[len(CHECKPOINT_DELTA_PREFIX):])))
+    if delta['base'] != _get_checkpoint_digest(checkpoint):
+        raise PersistenceError('The checkpoint delta does not belong to the checkpoint')
+
+    for path in delta['delete']:
+        if len(path) == 1:
+            bundle.pop(path[0], None)
+        elif type(bundle.get(path[0], None)) is dict:
+            bundle[path[0]].pop(path[1], None)
+
+    for path, chunk in delta['set'].iteritems():
+        value = pickle.loads(chunk)
+        if len(path) == 1:
+            bundle[path[0]] = value
+        else:
+            if type(bundle.get(path[0], None)) is not dict:
+                bundle[path[0]] = {}
+            bundle[path[0]][path[1]] = value
+
+    return bundle
+
+
 class AiiDAPersister(plumpy.Persister):
     """
     This node is responsible to taking saved process instance states and
     persisting them to the database.
+
+    The checkpoints are encoded with a :class:`CheckpointCodec`, by default the one selected
+    with the ``checkpoint.codec`` property, while checkpoints are always decoded with the codec
+    they were written with.
+
+    Once a full checkpoint of a process has been written, following checkpoints are written as a
+    delta with respect to it, containing only the entries of the bundle that changed, as long as
+    the delta stays small compared to the full checkpoint.
+
+    Checkpoints saved with ``coalesce=True`` are not written straight away but after the coalesce
+    interval, such that several transitions in a short time result in a single write of the latest
+    state. Any checkpoint saved without coalescing, or deleted, replaces the pending one.
     """
+    PendingCheckpoint = namedtuple('PendingCheckpoint', ['process', 'handle'])
+    BaseCheckpoint = namedtuple('BaseCheckpoint', ['digests', 'size', 'checkpoint_digest'])
 
-    def save_checkpoint(self, process, tag=None):
-        LOGGER.info('Persisting process<{}>'.format(process.pid))
+    def __init__(self, codec=None, coalesce_interval=None):
+        """
+        :param codec: the :class:`CheckpointCodec` used to encode checkpoints, or its name
+        :param coalesce_interval: the time in seconds during which coalesced checkpoints are held back,
+            if None the value of the ``checkpoint.coalesce_interval`` property (in milliseconds) is used
+        """
+        from aiida.common.setup import get_property
+
+        super(AiiDAPersister, self).__init__()
+        if codec is None or isinstance(codec, basestring):
+            codec = get_checkpoint_codec(codec)
+        if coalesce_interval is None:
+            coalesce_interval = get_property('checkpoint.coalesce_interval') / 1000.
+
+        self._codec = codec
+        self._coalesce_interval = coalesce_interval
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._bases = OrderedDict()
+        self._metrics_lock = threading.Lock()
+        self.reset_metrics()
+
+    @property
+    def codec(self):
+        return self._codec
+
+    def get_metrics(self):
+        """
+        Return the statistics of the checkpoints saved by this persister: the number of checkpoints,
+        the total, last and largest size in bytes and the total and last time in seconds spent saving them
+
+        :return: a dictionary with the metrics
+        """
+        with self._metrics_lock:
+            return dict(self._metrics)
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = {
+                'checkpoints': 0,
+                'deltas': 0,
+                'coalesced': 0,
+                'total_size': 0,
+                'last_size': 0,
+                'max_size': 0,
+                'total_save_time': 0.,
+                'last_save_time': 0.,
+            }
+
+    def save_checkpoint(self, process, tag=None, coalesce=False):
+        """
+        Persist the current state of the process
 
+        :param process: the process
+        :param tag: checkpoint tags are not supported
+        :param coalesce: if True, and a coalesce interval is set, the checkpoint is only written at the
+            end of the interval, with the state of the process at that time
+        :return: the bundle, or None if the checkpoint was deferred
+        """
         if tag is not None:
             raise NotImplementedError('Checkpoint tags not supported yet')
 
+        if coalesce and self._coalesce_interval > 0:
+            with self._pending_lock:
+                if process.pid in self._pending:
+                    self._metrics_increment('coalesced')
+                    return None
+                handle = process.loop().call_later(self._coalesce_interval, self.flush, process.pid)
+                self._pending[process.pid] = self.PendingCheckpoint(process, handle)
+            return None
+
+        self._cancel_pending(process.pid)
+        return self._write_checkpoint(process)
+
+    def flush(self, pid=None):
+        """
+        Write the pending coalesced checkpoints straight away
+
+        :param pid: the pid of the process whose checkpoint to write, if None all pending checkpoints are written
+        """
+        with self._pending_lock:
+            pids = list(self._pending.keys()) if pid is None else [pid]
+            pending = [self._pending.pop(pid) for pid in pids if pid in self._pending]
+
+        for entry in pending:
+            entry.process.loop().remove_timeout(entry.handle)
+            if not entry.process.has_terminated():
+                self._write_checkpoint(entry.process)
+
+    def _cancel_pending(self, pid):
+        with self._pending_lock:
+            entry = self._pending.pop(pid, None)
+        if entry is not None:
+            entry.process.loop().remove_timeout(entry.handle)
+            self._metrics_increment('coalesced')
+
+    def _write_checkpoint(self, process):
+        LOGGER.info('Persisting process<{}>'.format(process.pid))
+
+        start = time.time()
         bundle = plumpy.Bundle(process, plumpy.LoadSaveContext(loader=get_object_loader()))
         calc = process.calc
-        calc._set_checkpoint(yaml.dump(bundle))
+
+        try:
+            chunks = _split_bundle(bundle)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            chunks = None
+
+        base = self._bases.get(process.pid, None)
+        if chunks is not None and base is not None:
+            checkpoint_delta = encode_checkpoint_delta(chunks, base.digests, base.checkpoint_digest)
+            if len(checkpoint_delta) < base.size * CHECKPOINT_DELTA_MAX_RATIO:
+                calc._set_checkpoint_delta(checkpoint_delta)
+                self._metrics_increment('deltas')
+                self._record_save(process, len(checkpoint_delta), time.time() - start)
+                return bundle
+
+        checkpoint = self._encode(bundle)
+        # Delete the delta first, such that the stored checkpoint is never combined with a delta of another one
+        calc._del_checkpoint_delta()
+        calc._set_checkpoint(checkpoint)
+        self._bases.pop(process.pid, None)
+        if chunks is not None:
+            self._bases[process.pid] = self.BaseCheckpoint(
+                _get_chunk_digests(chunks), len(checkpoint), _get_checkpoint_digest(checkpoint))
+            while len(self._bases) > CHECKPOINT_DELTA_MAX_BASES:
+                self._bases.popitem(last=False)
+        self._record_save(process, len(checkpoint), time.time() - start)
 
         return bundle
 
+    def _encode(self, bundle):
+        try:
+            return self._codec.encode(bundle)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            if isinstance(self._codec, YamlCheckpointCodec):
+                raise
+            LOGGER.warning('Checkpoint codec {} failed to encode the bundle, falling back to yaml'.format(
+                self._codec.name), exc_info=True)
+            return get_checkpoint_codec(YamlCheckpointCodec.name).encode(bundle)
+
+    def _metrics_increment(self, key):
+        with self._metrics_lock:
+            self._metrics[key] += 1
+
+    def _record_save(self, process, size, save_time):
+        LOGGER.debug('Saved checkpoint of process<{}>: {} bytes in {:.3f} s'.format(process.pid, size, save_time))
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics['checkpoints'] += 1
+            metrics['total_size'] += size
+            metrics['last_size'] = size
+            metrics['max_size'] = max(metrics['max_size'], size)
+            metrics['total_save_time'] += save_time
+            metrics['last_save_time'] = save_time
+
     def load_checkpoint(self, pid, tag=None):
         if tag is not None:
             raise NotImplementedError('Checkpoint tags not supported yet')
 
+        # The checkpoint may have been written by another persister since this one last wrote it, so the
+        # next checkpoint of the process has to be a full one
+        self._bases.pop(pid, None)
+
         calculation = orm.load_node(pid)
         checkpoint = calculation.checkpoint
 
         if checkpoint is None:
             raise PersistenceError('Calculation<{}> does not have a saved checkpoint'.format(calculation.pk))
 
-        bundle = yaml.load(checkpoint)
+        bundle = decode_checkpoint(checkpoint)
+
+        checkpoint_delta = calculation.checkpoint_delta
+        if checkpoint_delta is not None:
+            apply_checkpoint_delta(bundle, checkpoint, checkpoint_delta)
+
         return bundle
 
     def get_checkpoints(self):
@@ -75,6 +463,8 @@ class AiiDAPersister(plumpy.Persister):
         pass
 
     def delete_checkpoint(self, pid, tag=None):
+        self._cancel_pending(pid)
+        self._bases.pop(pid, None)
         calc = orm.load_node(pid)
         calc._del_checkpoint()
 
@@ -210,10 +210,18 @@ class Process(plumpy.Process):
         # Update the node attributes every time we enter a new state
         
     def on_entered(self, from_state):
+        from aiida.work.persistence import AiiDAPersister
+
         super(Process, self).on_entered(from_state)
         self.update_node_state(self._state)
         if self._enable_persistence and not self._state.is_terminal():
-            self.runner.persister.save_checkpoint(self)
+            persister = self.runner.persister
+            if isinstance(persister, AiiDAPersister) and self._state.LABEL == ProcessState.RUNNING:
+                # Consecutive running states may be coalesced into a single checkpoint, any other
+                # state, in particular a waiting one, is written straight away
+                persister.save_checkpoint(self, coalesce=True)
+            else:
+                persister.save_checkpoint(self)
 
     @override
     def on_terminated(self):
@@ -6,6 +6,7 @@ import tornado.ioloop
 
 from aiida.orm import load_node, load_workflow
 from . import futures
+from . import job_calcs
 from . import persistence
 from . import rmq
 from . import transports
@@ -67,6 +68,7 @@ class Runner(object):
         self._poll_interval = poll_interval
         self._rmq_submit = rmq_submit
         self._transport = transports.TransportQueue(self._loop)
+        self._job_manager = job_calcs.JobManager(self._transport)
 
         if enable_persistence:
             self._persister = persister if persister is not None else persistence.AiiDAPersister()
@@ -104,6 +106,10 @@ class Runner(object):
     def transport(self):
         return self._transport
 
+    @property
+    def job_manager(self):
+        return self._job_manager
+
     @property
     def persister(self):
         return self._persister
@@ -131,7 +137,10 @@ class Runner(object):
     def close(self):
         assert not self._closed
 
+        if isinstance(self._persister, persistence.AiiDAPersister):
+            self._persister.flush()
         self.stop()
+        self._transport.close()
         if self._rmq_connector is not None:
             self._rmq_connector.disconnect()
         self._closed = True
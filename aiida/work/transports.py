@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 import logging
 import threading
 import traceback
@@ -17,14 +17,29 @@ class TransportQueue(object):
     it will open the transport and give it to all the clients that asked for it
     up to that point.  This way opening of transports (a costly operation) can
     be minimised.
+
+    Once the callbacks have been served, the transport is not closed but kept in
+    a pool of open transports, such that following requests for the same authinfo
+    can reuse the connection straight away.  The safe open interval of a transport
+    therefore only applies when the connection has to be (re)opened.  Pooled
+    transports are closed once they have been idle for longer than the idle timeout
+    or when the pool exceeds the maximum number of open transports, in which case
+    the least recently used ones are closed first.
     """
-    AuthinfoEntry = namedtuple("AuthinfoEntry", ['authinfo', 'transport', 'callbacks', 'callback_handle'])
+    AuthinfoEntry = namedtuple("AuthinfoEntry", ['authinfo', 'transport', 'is_open', 'callbacks', 'callback_handle'])
+    PooledTransport = namedtuple("PooledTransport", ['transport', 'close_handle'])
 
-    def __init__(self, loop=None, interval=DEFAULT_TRANSPORT_INTERVAL):
+    def __init__(self, loop=None, interval=DEFAULT_TRANSPORT_INTERVAL, idle_timeout=None, max_open=None):
         """
         :param loop: The io loop
         :param interval: The callback interval in seconds
+        :param idle_timeout: The time in seconds after which an unused open transport is closed,
+            if None the value of the `transport.idle_timeout` property is used
+        :param max_open: The maximum number of transports that are kept open at the same time,
+            if None the value of the `transport.max_open` property is used
         """
+        from aiida.common.setup import get_property
+
         super(TransportQueue, self).__init__()
 
         self._loop = loop
@@ -32,45 +47,138 @@ class TransportQueue(object):
         self._interval = interval
         self._entries_lock = threading.Lock()
 
+        self._idle_timeout = idle_timeout if idle_timeout is not None else get_property('transport.idle_timeout')
+        self._max_open = max_open if max_open is not None else get_property('transport.max_open')
+        self._pool = OrderedDict()
+
         self._callback_handle = None
 
+    @property
+    def loop(self):
+        return self._loop
+
     def call_me_with_transport(self, authinfo, callback):
         _LOGGER.debug("Got request for transport with callback '{}'".format(callback))
 
         with self._entries_lock:
             self._get_or_create_entry(authinfo).callbacks.append(callback)
 
+    def close(self):
+        """
+        Close all the transports that are currently kept open in the pool
+        """
+        with self._entries_lock:
+            while self._pool:
+                authinfo_id = next(iter(self._pool))
+                self._close_pooled(authinfo_id)
+
     def _get_or_create_entry(self, authinfo):
         if authinfo.id in self._entries:
             return self._entries[authinfo.id]
 
-        transport = authinfo.get_transport()
-
-        # Check if the transport is happy to be opened with any frequency
-        # I put <= 0 to avoid that if the user, by mistake, puts a negative
-        # number, we get errors. Negative errors will be considered as zero.
-        safe_open_interval = transport.get_safe_open_interval()
-        if safe_open_interval <= 0.:
+        transport = self._take_from_pool(authinfo.id)
+        if transport is not None:
+            # The connection is still open, no need to wait
+            is_open = True
             callback_handle = self._loop.add_callback(self._do_callback, authinfo.id)
         else:
-            # Ok, we have to use a delay
-            callback_handle = self._loop.call_later(safe_open_interval, self._do_callback, authinfo.id)
+            is_open = False
+            transport = authinfo.get_transport()
+
+            # Check if the transport is happy to be opened with any frequency
+            # I put <= 0 to avoid that if the user, by mistake, puts a negative
+            # number, we get errors. Negative errors will be considered as zero.
+            safe_open_interval = transport.get_safe_open_interval()
+            if safe_open_interval <= 0.:
+                callback_handle = self._loop.add_callback(self._do_callback, authinfo.id)
+            else:
+                # Ok, we have to use a delay
+                callback_handle = self._loop.call_later(safe_open_interval, self._do_callback, authinfo.id)
 
-        entry = self.AuthinfoEntry(authinfo, transport, [], callback_handle)
+        entry = self.AuthinfoEntry(authinfo, transport, is_open, [], callback_handle)
         self._entries[authinfo.id] = entry
 
         return entry
 
     def _do_callback(self, authinfo_id):
-        entry = self._entries.pop(authinfo_id)
-        with entry.transport:
+        with self._entries_lock:
+            entry = self._entries.pop(authinfo_id)
+
+        transport = entry.transport
+        if entry.is_open and not transport.is_alive():
+            _LOGGER.info("Pooled transport {} is no longer alive, reopening it".format(transport))
+            self._exit_transport(transport)
+            transport = entry.authinfo.get_transport()
+            transport.__enter__()
+        elif not entry.is_open:
+            transport.__enter__()
+
+        try:
             for fn in entry.callbacks:
                 _LOGGER.debug("Passing transport to {}...".format(fn))
                 try:
-                    fn(entry.authinfo, entry.transport)
+                    fn(entry.authinfo, transport)
                 except BaseException:
                     _LOGGER.error(
                         "Callback '{}' raised exception when passed transport:\n{}".format(
                             fn, traceback.format_exc())
                     )
                 _LOGGER.debug("...callback finished")
+        finally:
+            with self._entries_lock:
+                self._return_to_pool(authinfo_id, transport)
+
+    def _take_from_pool(self, authinfo_id):
+        """
+        Take the open transport of the authinfo out of the pool, if there is one
+
+        :return: the open transport or None if there is no open transport in the pool
+        """
+        pooled = self._pool.pop(authinfo_id, None)
+        if pooled is None:
+            return None
+
+        self._loop.remove_timeout(pooled.close_handle)
+        return pooled.transport
+
+    def _return_to_pool(self, authinfo_id, transport):
+        """
+        Put the open transport back in the pool, or close it if pooling is disabled
+        """
+        if self._idle_timeout <= 0 or self._max_open <= 0:
+            self._exit_transport(transport)
+            return
+
+        if authinfo_id in self._pool:
+            # Another transport of the same authinfo was opened while this one was in use,
+            # e.g. by a request made from a callback: keep only the most recently used one
+            self._close_pooled(authinfo_id)
+
+        close_handle = self._loop.call_later(self._idle_timeout, self._close_idle, authinfo_id)
+        self._pool[authinfo_id] = self.PooledTransport(transport, close_handle)
+
+        # Evict the least recently used transports
+        while len(self._pool) > self._max_open:
+            self._close_pooled(next(iter(self._pool)))
+
+    def _close_idle(self, authinfo_id):
+        with self._entries_lock:
+            if authinfo_id in self._pool:
+                _LOGGER.debug("Closing transport of authinfo<{}> after being idle".format(authinfo_id))
+                self._close_pooled(authinfo_id, remove_timeout=False)
+
+    def _close_pooled(self, authinfo_id, remove_timeout=True):
+        pooled = self._pool.pop(authinfo_id)
+        if remove_timeout:
+            self._loop.remove_timeout(pooled.close_handle)
+        self._exit_transport(pooled.transport)
+
+    @staticmethod
+    def _exit_transport(transport):
+        """
+        Close a transport that was opened by the queue, without letting any exception propagate
+        """
+        try:
+            transport.__exit__(None, None, None)
+        except BaseException:
+            _LOGGER.warning("Exception while closing transport {}:\n{}".format(transport, traceback.format_exc()))
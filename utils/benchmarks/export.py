@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Measure the time and the peak memory of the export of the most recent nodes of a profile
+to a tar.gz or zip archive. The entries and the files are streamed to the archive, so the
+peak memory should not grow with the number of exported nodes.
+
+Every run exports to a temporary file, which is deleted afterwards; run the benchmark in
+separate processes to compare the peak memory of exports of different sizes.
+
+Usage: python utils/benchmarks/export.py [--profile PROFILE] [--format tar|zip] [--nodes N]
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from aiida import load_dbenv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default=None, help='the profile to use')
+    parser.add_argument('--format', choices=['tar', 'zip'], default='tar', help='the format of the archive')
+    parser.add_argument('--nodes', type=int, default=10000, help='number of the most recent nodes to export')
+    args = parser.parse_args()
+
+    load_dbenv(profile=args.profile)
+
+    from aiida.orm.importexport import export, export_zip
+    from aiida.orm.node import Node
+    from aiida.orm.querybuilder import QueryBuilder
+
+    qb = QueryBuilder()
+    qb.append(Node)
+    qb.order_by({Node: [{'id': {'order': 'desc'}}]})
+    qb.limit(args.nodes)
+    # The export takes the database entries of the nodes
+    what = [node.dbnode for node, in qb.iterall()]
+
+    folder = tempfile.mkdtemp()
+    try:
+        outfile = os.path.join(folder, 'export.{}'.format('aiida.tar.gz' if args.format == 'tar' else 'zip'))
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.time()
+        if args.format == 'tar':
+            export(what, outfile=outfile, silent=True)
+        else:
+            export_zip(what, outfile=outfile, silent=True)
+        elapsed = time.time() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        size = os.path.getsize(outfile) / 1024. / 1024.
+    finally:
+        shutil.rmtree(folder)
+
+    print 'exported {} nodes to {}'.format(len(what), args.format)
+    print '  time:        {:10.3f} s'.format(elapsed)
+    print '  archive:     {:10.3f} MB, {:.3f} MB/s'.format(size, size / elapsed)
+    # ru_maxrss is in kilobytes on Linux
+    print '  peak memory: {:10.3f} MB, {:.3f} MB during the export'.format(
+        rss_after / 1024., (rss_after - rss_before) / 1024.)
+
+
+if __name__ == '__main__':
+    main()
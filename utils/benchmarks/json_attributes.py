@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Compare the throughput of the JSON (de)serialization of the attributes of the SQLAlchemy
+backend with the previous implementation, which walked every value in Python and matched
+every string against a regular expression to revive datetimes.
+
+The attributes are those of a large ParameterData node, with or without a datetime.
+
+Usage: python utils/benchmarks/json_attributes.py [--entries N] [--repeat R]
+"""
+import argparse
+import datetime
+import json
+import re
+import timeit
+
+from dateutil import parser as date_parser
+
+from aiida.backends.sqlalchemy.utils import dumps_json, loads_json
+
+date_reg = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+(\+\d{2}:\d{2})?$')
+
+
+def legacy_dumps_json(d):
+    def f(v):
+        if isinstance(v, list):
+            return [f(_) for _ in v]
+        elif isinstance(v, dict):
+            return dict((key, f(val)) for key, val in v.iteritems())
+        elif isinstance(v, datetime.datetime):
+            return v.isoformat()
+        return v
+
+    return json.dumps(f(d))
+
+
+def legacy_loads_json(s):
+    ret = json.loads(s)
+
+    def f(d):
+        if isinstance(d, list):
+            for i, val in enumerate(d):
+                d[i] = f(val)
+            return d
+        elif isinstance(d, dict):
+            for k, v in d.iteritems():
+                d[k] = f(v)
+            return d
+        elif isinstance(d, basestring):
+            if date_reg.match(d):
+                try:
+                    return date_parser.parse(d)
+                except (ValueError, TypeError):
+                    return d
+            return d
+        return d
+
+    return f(ret)
+
+
+def get_parameters(num_entries, with_datetime):
+    """
+    Return a dictionary with the given number of entries, with a mix of value types and some nesting
+    """
+    parameters = {}
+    for index in range(num_entries):
+        key = 'key_{}'.format(index)
+        kind = index % 4
+        if kind == 0:
+            parameters[key] = index * 0.5
+        elif kind == 1:
+            parameters[key] = u'value_{}'.format(index)
+        elif kind == 2:
+            parameters[key] = [index, index + 1., u'item']
+        else:
+            parameters[key] = {'nested': index, 'label': u'label_{}'.format(index)}
+    if with_datetime:
+        parameters['time'] = datetime.datetime(2018, 5, 9, 15, 43, 7, 512097)
+    return parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100000, help='number of entries of the attributes')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions, the best one is reported')
+    args = parser.parse_args()
+
+    def measure(function, value):
+        timer = timeit.Timer(lambda: function(value))
+        return min(timer.repeat(repeat=args.repeat, number=1))
+
+    for with_datetime in (False, True):
+        parameters = get_parameters(args.entries, with_datetime)
+        print 'attributes {} a datetime:'.format('with' if with_datetime else 'without')
+        for operation, legacy, new, value in [
+                ('dumps', legacy_dumps_json, dumps_json, parameters),
+                ('loads', legacy_loads_json, loads_json, dumps_json(parameters)),
+        ]:
+            if operation == 'loads':
+                # Each implementation loads the JSON it writes
+                legacy_time = measure(legacy, legacy_dumps_json(parameters))
+            else:
+                legacy_time = measure(legacy, value)
+            new_time = measure(new, value)
+            print '  {}: {:8.3f} s -> {:8.3f} s, {:6.1f}x'.format(
+                operation, legacy_time, new_time, legacy_time / new_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Compare the speed of the original make_hash with make_streaming_hash on large
+nested attribute dictionaries, like those of a big ParameterData or ArrayData.
+
+Usage: python utils/benchmarks/make_hash.py [--entries N] [--repeat R]
+"""
+import argparse
+import timeit
+
+from aiida.common.hashing import make_hash, make_streaming_hash
+
+
+def get_parameters(num_entries):
+    """
+    Return a dictionary with the given number of entries, with a mix of value types and some nesting
+    """
+    parameters = {}
+    for index in range(num_entries):
+        key = 'key_{}'.format(index)
+        kind = index % 5
+        if kind == 0:
+            parameters[key] = index
+        elif kind == 1:
+            parameters[key] = index * 0.5
+        elif kind == 2:
+            parameters[key] = u'value_{}'.format(index)
+        elif kind == 3:
+            parameters[key] = [index, index + 1., 'item']
+        else:
+            parameters[key] = {'nested': index, 'flag': bool(index % 2)}
+    return parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100000, help='number of entries of the dictionary')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions, the best one is reported')
+    args = parser.parse_args()
+
+    parameters = get_parameters(args.entries)
+
+    results = {}
+    for name, function in [('make_hash', make_hash), ('make_streaming_hash', make_streaming_hash)]:
+        timer = timeit.Timer(lambda: function(parameters))
+        results[name] = min(timer.repeat(repeat=args.repeat, number=1))
+        print '{:<20s} {:10.3f} s'.format(name, results[name])
+
+    print 'speedup: {:.1f}x'.format(results['make_hash'] / results['make_streaming_hash'])
+
+
+if __name__ == '__main__':
+    main()
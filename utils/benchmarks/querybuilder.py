@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Measure the Python overhead of building QueryBuilder queries of the same shape with
+different filter values, with and without the cache of query templates.
+Only the query is built and compiled to SQL, no query is sent to the database.
+
+Usage: python utils/benchmarks/querybuilder.py [--profile PROFILE] [--queries N] [--repeat R]
+"""
+import argparse
+import timeit
+
+from aiida import load_dbenv
+
+
+def build_query(index):
+    """
+    Build and compile a query like the ones of the daemon and the REST API, with filter values depending on index
+    """
+    from sqlalchemy.dialects import postgresql
+    from aiida.orm.querybuilder import QueryBuilder
+    from aiida.orm.calculation import Calculation
+    from aiida.orm.data.parameter import ParameterData
+
+    qb = QueryBuilder()
+    qb.append(Calculation, filters={'id': {'>': index}, 'label': {'like': 'calc_{}%'.format(index)}}, tag='calc')
+    qb.append(ParameterData, output_of='calc', project=['id', 'uuid', 'attributes'], tag='parameters')
+    qb.order_by({'parameters': ['id']})
+    qb.limit(10)
+    return qb.get_query().statement.compile(dialect=postgresql.dialect())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default=None, help='the profile to use')
+    parser.add_argument('--queries', type=int, default=1000, help='number of queries to build')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions, the best one is reported')
+    args = parser.parse_args()
+
+    load_dbenv(profile=args.profile)
+
+    from aiida.orm import querybuilder
+
+    def run(cached):
+        for index in range(args.queries):
+            if not cached:
+                querybuilder.clear_query_template_cache()
+            build_query(index)
+
+    results = {}
+    for name, cached in [('uncached', False), ('cached', True)]:
+        timer = timeit.Timer(lambda: run(cached))
+        results[name] = min(timer.repeat(repeat=args.repeat, number=1)) / args.queries
+        print '{:<10s} {:10.3f} ms per query'.format(name, results[name] * 1000)
+
+    print 'speedup: {:.1f}x'.format(results['uncached'] / results['cached'])
+
+
+if __name__ == '__main__':
+    main()
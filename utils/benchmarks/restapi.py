@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Measure the startup time of the REST API and the latency of the requests to /nodes of a profile,
+with the translators of the node types found once at startup (the default) and, for comparison,
+found again at every request by re-executing the modules of the translator package.
+
+The requests are sent through the test client of Flask, so the times do not include the network
+and the serialization of the HTTP server. The response cache is disabled.
+
+Usage: python utils/benchmarks/restapi.py [--profile PROFILE] [--requests N] [--limit L]
+"""
+import argparse
+import time
+
+from aiida import load_dbenv
+
+
+def find_subclasses_per_request(parent_class):
+    """
+    Return the subclasses of a translator class as they were found at every request before
+    they were cached: the modules of the translator package are executed again.
+    """
+    import imp
+    import inspect
+    import os
+    import pkgutil
+
+    def find(package_path):
+        results = {}
+        for _, name, is_pkg in pkgutil.walk_packages([package_path]):
+            full_path = os.path.join(package_path, name)
+            if is_pkg:
+                results.update(find(full_path))
+            else:
+                module = imp.load_source('rst' + name, full_path + '.py')
+                for obj_name, obj in inspect.getmembers(module, inspect.isclass):
+                    if issubclass(obj, parent_class):
+                        results[obj_name] = obj
+        return results
+
+    return find(os.path.dirname(inspect.getfile(parent_class)))
+
+
+def create_app():
+    from aiida.restapi.api import App, AiidaApi
+
+    app = App(__name__)
+    AiidaApi(app, PREFIX='/api/v2', PERPAGE_DEFAULT=20, LIMIT_DEFAULT=400)
+    return app
+
+
+def time_requests(app, url, num_requests):
+    """
+    Return the time of the first request and the mean time of the following ones, in seconds.
+    """
+    with app.test_client() as client:
+        start = time.time()
+        response = client.get(url)
+        first = time.time() - start
+        if response.status_code != 200:
+            raise RuntimeError('GET {} returned {}: {}'.format(url, response.status_code, response.data))
+
+        start = time.time()
+        for _ in range(num_requests):
+            client.get(url)
+        return first, (time.time() - start) / max(num_requests, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default=None, help='the profile to use')
+    parser.add_argument('--requests', type=int, default=100, help='number of requests after the first one')
+    parser.add_argument('--limit', type=int, default=20, help='number of nodes returned by each request')
+    args = parser.parse_args()
+
+    load_dbenv(profile=args.profile)
+
+    from aiida.restapi.translator.node import NodeTranslator, clear_subclasses_cache
+
+    url = '/api/v2/nodes?limit={}&orderby=-id'.format(args.limit)
+
+    clear_subclasses_cache()
+    start = time.time()
+    app = create_app()
+    startup = time.time() - start
+    first, mean = time_requests(app, url, args.requests)
+
+    print 'translators found at startup:'
+    print '  startup:       {:10.3f} ms'.format(startup * 1000)
+    print '  first request: {:10.3f} ms'.format(first * 1000)
+    print '  mean request:  {:10.3f} ms over {} requests'.format(mean * 1000, args.requests)
+
+    get_subclasses = NodeTranslator.__dict__['get_subclasses']
+    NodeTranslator.get_subclasses = classmethod(find_subclasses_per_request)
+    try:
+        first, mean = time_requests(app, url, args.requests)
+    finally:
+        NodeTranslator.get_subclasses = get_subclasses
+        clear_subclasses_cache()
+
+    print 'translators found at every request:'
+    print '  first request: {:10.3f} ms'.format(first * 1000)
+    print '  mean request:  {:10.3f} ms over {} requests'.format(mean * 1000, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Compare the traversal of a large provenance graph with the recursive queries of the QueryBuilder
+to the lookup in a transitive closure table maintained by the trigger of the old DbPath table.
+
+A synthetic graph of calculations, each with some input data created by earlier calculations and
+some output data, is written to temporary tables of the database of the profile, with and without
+the trigger (see aiida.backends.sqlalchemy.utils.get_pg_tc). The benchmark reports the time to
+insert the links, the size of the closure table, and the time to find the descendants of nodes,
+without and with a bound on the depth. Everything is done in a transaction that is rolled back,
+so the database of the profile is not modified.
+
+Usage: python utils/benchmarks/transitive_closure.py [--profile PROFILE] [--calculations N] [--queries Q]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine
+
+from aiida.backends.sqlalchemy.utils import get_pg_tc
+from aiida.common.links import LinkType
+from aiida.common.setup import get_default_profile, get_profile_config
+
+CREATE_TABLES = """
+CREATE TEMPORARY TABLE bench_link (
+    id SERIAL PRIMARY KEY, input_id INTEGER NOT NULL, output_id INTEGER NOT NULL, type VARCHAR(255));
+CREATE INDEX ON bench_link (input_id, type, output_id);
+CREATE INDEX ON bench_link (output_id, type, input_id);
+CREATE TEMPORARY TABLE bench_link_tc (LIKE bench_link INCLUDING ALL);
+CREATE TEMPORARY TABLE bench_path (
+    id SERIAL PRIMARY KEY, parent_id INTEGER NOT NULL, child_id INTEGER NOT NULL, depth INTEGER NOT NULL,
+    entry_edge_id INTEGER, direct_edge_id INTEGER, exit_edge_id INTEGER);
+CREATE INDEX ON bench_path (parent_id);
+CREATE INDEX ON bench_path (child_id);
+"""
+
+# The recursive query built by the QueryBuilder for descendant_of, with the depth bound of the recursive step
+DESCENDANTS_CTE = """
+WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+    SELECT input_id, output_id, 0 FROM bench_link WHERE input_id = %(pk)s AND type IN %(types)s
+    UNION ALL
+    SELECT walk.ancestor_id, bench_link.output_id, walk.depth + 1
+    FROM walk JOIN bench_link ON bench_link.input_id = walk.descendant_id
+    WHERE bench_link.type IN %(types)s AND walk.depth < %(max_depth)s
+)
+SELECT DISTINCT descendant_id FROM walk
+"""
+
+DESCENDANTS_TC = """
+SELECT DISTINCT child_id FROM bench_path WHERE parent_id = %(pk)s AND depth <= %(max_depth)s
+"""
+
+
+def get_graph(num_calculations, num_inputs, num_outputs, seed=0):
+    """
+    Return the links of a synthetic provenance graph, as a list of (input_id, output_id, type) tuples,
+    and the ids of its data nodes. The calculations take inputs among the most recent data nodes,
+    such that the graph is deep.
+    """
+    rnd = random.Random(seed)
+    data = range(1, num_inputs + 1)
+    next_id = num_inputs + 1
+    links = []
+    for _ in range(num_calculations):
+        calculation = next_id
+        next_id += 1
+        for input_id in rnd.sample(data[-20 * num_inputs:], num_inputs):
+            links.append((input_id, calculation, LinkType.INPUT.value))
+        for _ in range(num_outputs):
+            links.append((calculation, next_id, LinkType.CREATE.value))
+            data.append(next_id)
+            next_id += 1
+    return links, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default=None, help='the profile to use')
+    parser.add_argument('--calculations', type=int, default=2000, help='number of calculations of the graph')
+    parser.add_argument('--inputs', type=int, default=3, help='number of inputs of each calculation')
+    parser.add_argument('--outputs', type=int, default=2, help='number of outputs of each calculation')
+    parser.add_argument('--queries', type=int, default=100, help='number of descendant queries')
+    parser.add_argument('--max-depth', type=int, default=4, help='depth of the bounded descendant queries')
+    args = parser.parse_args()
+
+    config = get_profile_config(args.profile or get_default_profile())
+    engine = create_engine((
+        "postgresql://{AIIDADB_USER}:{AIIDADB_PASS}@"
+        "{AIIDADB_HOST}:{AIIDADB_PORT}/{AIIDADB_NAME}"
+    ).format(**config))
+
+    links, data = get_graph(args.calculations, args.inputs, args.outputs)
+    # The descendants of the oldest data nodes are the largest
+    seeds = random.Random(1).sample(data[:len(data) // 4], min(args.queries, len(data) // 4))
+    link_types = (LinkType.CREATE.value, LinkType.INPUT.value)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(CREATE_TABLES)
+        cursor.execute(get_pg_tc('bench_link_tc', 'input_id', 'output_id', 'bench_path', 'parent_id', 'child_id'))
+
+        print 'graph: {} links'.format(len(links))
+        for table in ('bench_link', 'bench_link_tc'):
+            start = time.time()
+            cursor.executemany(
+                'INSERT INTO {} (input_id, output_id, type) VALUES (%s, %s, %s)'.format(table), links)
+            print '  insert into {:<14s} {:8.3f} s'.format(table + ':', time.time() - start)
+        cursor.execute('ANALYZE bench_link; ANALYZE bench_path')
+
+        cursor.execute('SELECT count(*) FROM bench_path')
+        num_paths = cursor.fetchone()[0]
+        print '  closure table: {} rows, {:.1f} per link'.format(num_paths, float(num_paths) / len(links))
+
+        for name, max_depth in [('all descendants', 2 ** 30), ('depth <= {}'.format(args.max_depth), args.max_depth)]:
+            print '{} of {} nodes:'.format(name, len(seeds))
+            for method, query in [('recursive CTE', DESCENDANTS_CTE), ('closure table', DESCENDANTS_TC)]:
+                start = time.time()
+                num_results = 0
+                for pk in seeds:
+                    cursor.execute(query, {'pk': pk, 'types': link_types, 'max_depth': max_depth})
+                    num_results += len(cursor.fetchall())
+                print '  {:<14s} {:8.3f} ms per query, {} results'.format(
+                    method + ':', (time.time() - start) * 1000 / len(seeds), num_results)
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()